@@ -6,6 +6,10 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 
+python manage.py prebuild_openapi_schema
+
 python manage.py migrate
+# Stock move ledger partitions for the coming months; also run nightly
+python manage.py create-stock-move-partitions-all
 # For Inventory
-python manage.py create_default_locations
\ No newline at end of file
+python manage.py create_default_locations
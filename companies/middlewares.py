@@ -1,5 +1,11 @@
+import gzip
+import logging
+import re
+
 from django_tenants.utils import schema_context
+from django.conf import settings
 from django.db import connection
+from django.utils.cache import patch_vary_headers
 from django.urls import get_resolver, resolve
 from django.urls.resolvers import RegexPattern
 from django_tenants.middleware.main import TenantMainMiddleware
@@ -8,10 +14,93 @@ from rest_framework import status
 
 from core.errors.exceptions import TenantNotFoundException
 from registration.models import Tenant
+from registration.utils import get_cached_tenant_for_domain
+from shared.utils import get_public_user
 from users.models import TenantUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.models import User
 
+logger = logging.getLogger(__name__)
+
+
+class SchemaSwitchTrackerMiddleware:
+    """
+    Counts the schema switches requested and the SET search_path statements actually
+    sent while serving a request. Must be the first middleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if hasattr(connection, 'reset_schema_switch_counters'):
+            connection.reset_schema_switch_counters()
+        response = self.get_response(request)
+        switches = getattr(connection, 'search_path_switches', None)
+        if switches is not None:
+            if settings.DEBUG:
+                response['X-Search-Path-Switches'] = str(switches)
+                response['X-Schema-Switch-Requests'] = str(connection.schema_switch_requests)
+            if switches > 1:
+                logger.debug("%s %s sent %s search_path changes", request.method, request.path, switches)
+        return response
+
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+re_accepts_brotli = re.compile(r'\bbr\b')
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'application/javascript', 'application/xml', 'text/')
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes with brotli (when the
+    `brotli` package is installed and the client accepts it) or gzip.
+    Streaming responses, binary content types and already encoded responses are left alone.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_brotli.search(accept_encoding):
+            encoding, content = 'br', brotli.compress(response.content, quality=settings.RESPONSE_BROTLI_QUALITY)
+        elif re_accepts_gzip.search(accept_encoding):
+            encoding, content = 'gzip', gzip.compress(response.content, compresslevel=settings.RESPONSE_GZIP_LEVEL)
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # The encoded body is no longer byte-identical, so the ETag becomes weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """TenantMainMiddleware that resolves hostnames through the cache instead of querying Domain."""
+    def get_tenant(self, domain_model, hostname):
+        return get_cached_tenant_for_domain(hostname)
+
 class TenantMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -33,7 +122,10 @@ class TenantMiddleware:
         schema_name = full_host.split('.')[0]
 
         try:
-            tenant = Tenant.objects.get(schema_name=schema_name)
+            # Reuse the tenant already resolved from the domain when it is the same one
+            tenant = getattr(request, 'tenant', None)
+            if tenant is None or tenant.schema_name != schema_name:
+                tenant = Tenant.objects.get(schema_name=schema_name)
             connection.set_tenant(tenant)
             request.tenant = tenant
 
@@ -87,7 +179,9 @@ class TenantJWTAuthentication(JWTAuthentication):
         connection.set_schema(schema_name)
 
         try:
-            tenant = Tenant.objects.get(schema_name=schema_name)
+            tenant = getattr(request, 'tenant', None)
+            if tenant is None or tenant.schema_name != schema_name:
+                tenant = Tenant.objects.get(schema_name=schema_name)
             tenant_user = TenantUser.objects.get(user_id=user.id, tenant=tenant)
             return (user, validated_token)
         except Tenant.DoesNotExist:
@@ -105,10 +199,8 @@ class TenantJWTAuthentication(JWTAuthentication):
             user_id = validated_token['user_id']
             print(f"Extracted user_id from token: {user_id}")
 
-            # Set the schema to public before querying the User model
-            connection.set_schema_to_public()
-            
-            user = User.objects.get(id=user_id)
+            # Read the User from the public schema without switching the search_path
+            user = get_public_user(user_id)
             print(f"Found user: {user.username}")
             return user
         except (User.DoesNotExist, KeyError):
@@ -119,7 +211,7 @@ class TenantJWTAuthentication(JWTAuthentication):
             print(f"Resetting schema to: {connection.schema_name}")
             # connection.set_schema(previous_schema_name)  # Uncomment if you want to reset
 
-class DebugTenantMainMiddleware(TenantMainMiddleware):
+class DebugTenantMainMiddleware(CachedTenantMainMiddleware):
     def process_request(self, request):
         print(f"Starting TenantMainMiddleware with hostname: {request.get_host()}")
         super().process_request(request)
@@ -1,9 +1,10 @@
 from django.db import models
-import pytz
 from django.contrib.auth.models import User
 from django.utils import timezone
 import random
 from registration.models import Tenant, UserProfile
+from shared.tenant_config import clear_tenant_config
+from shared.utils import get_timezone_choices
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -23,7 +24,7 @@ LANGUAGE_CHOICES = [
     # Add more language choices as needed
 ]
 
-TIMEZONE_CHOICES = [(tz, tz) for tz in pytz.all_timezones]
+TIMEZONE_CHOICES = get_timezone_choices
 
 
 
@@ -57,6 +58,11 @@ class CompanyProfile(models.Model):
     website = models.URLField(max_length=255, blank=True, null=True)
 
 
+@receiver(post_save, sender=CompanyProfile)
+def clear_company_profile_config(sender, instance, **kwargs):
+    clear_tenant_config()
+
+
 class CompanyRole(models.Model):
     name = models.CharField(max_length=100)
     company = models.ForeignKey('CompanyProfile', related_name='roles', on_delete=models.CASCADE)
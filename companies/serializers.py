@@ -4,7 +4,7 @@ from django.utils.text import slugify
 
 from rest_framework import serializers
 
-from users.utils import convert_to_base64
+from shared.images import StoredImageField, save_uploaded_image
 from django.db import transaction
 
 from .models import CompanyRole, Tenant, CompanyProfile
@@ -77,11 +77,13 @@ class CompanyRoleSerializer(serializers.ModelSerializer):
 class CompanyProfileSerializer(serializers.ModelSerializer):
     roles = CompanyRoleSerializer(many=True, required=False)
     logo_image = serializers.ImageField(write_only=True, required=False, allow_null=True)
+    logo = StoredImageField()
+    logo_thumbnail = StoredImageField(source='logo', thumbnail=True)
 
     class Meta:
         model = CompanyProfile
         fields = [
-            'logo', 'logo_image', 'phone', 'street_address', 'city', 'state', 'country',
+            'logo', 'logo_thumbnail', 'logo_image', 'phone', 'street_address', 'city', 'state', 'country',
             'registration_number', 'tax_id', 'industry', 'language',
             'company_size', 'website', 'roles'
         ]
@@ -94,7 +96,7 @@ class CompanyProfileSerializer(serializers.ModelSerializer):
         # Handle logo_image properly
         logo_image = validated_data.pop('logo_image', None)
         if logo_image is not None:
-            validated_data["logo"] = convert_to_base64(logo_image)
+            validated_data["logo"] = save_uploaded_image(logo_image, 'logos')
         
         # Update other profile fields
         for attr, value in validated_data.items():
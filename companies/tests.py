@@ -1,3 +1,51 @@
-from django.test import TestCase
+import gzip
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .middlewares import CompressionMiddleware
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=200)
+@mock.patch('companies.middlewares.brotli', None)
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    body = json.dumps([{'id': index, 'product_name': 'Bolt'} for index in range(50)]).encode()
+
+    def get(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get('/purchase/products/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_json_response_is_gzipped(self):
+        response = self.get(HttpResponse(self.body, content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_compressed_response_has_a_weak_etag(self):
+        original = HttpResponse(self.body, content_type='application/json')
+        original['ETag'] = '"abc"'
+
+        self.assertEqual(self.get(original)['ETag'], 'W/"abc"')
+
+    def test_small_response_is_sent_as_is(self):
+        response = self.get(HttpResponse(b'{"id": 1}', content_type='application/json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_binary_response_is_sent_as_is(self):
+        response = self.get(HttpResponse(self.body, content_type='application/pdf'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_client_without_gzip_gets_the_plain_body(self):
+        response = self.get(HttpResponse(self.body, content_type='application/json'), accept_encoding='identity')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
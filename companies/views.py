@@ -39,6 +39,7 @@ from registration.models import OTP
 from .serializers import ChangeAdminPasswordSerializer, OTPVerificationSerializer, TenantSerializer, VerifyEmailSerializer, RequestForgottenPasswordSerializer, \
     ForgottenPasswordSerializer, CompanyProfileSerializer,MarkOnboardedSerializer, ResendVerificationEmailSerializer
 from .utils import Util
+from shared.images import get_image_url
 from .permissions import IsAdminUser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import  permissions
@@ -372,7 +373,7 @@ class LoginDetailsView(APIView):
                 "username": tenant_user.user.username,
                 "first_name": tenant_user.user.first_name,
                 "last_name": tenant_user.user.last_name,
-                "user_image": tenant_user.user_image,
+                "user_image": get_image_url(tenant_user.user_image, request),
             },
             "tenant_id": tenant_id,
             "tenant_schema_name": tenant_schema_name,
@@ -0,0 +1,192 @@
+import time
+
+from django.db.backends.postgresql.base import CursorDebugWrapper
+from django.db.backends.utils import CursorWrapper
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper
+from django_tenants.utils import get_public_schema_name
+
+from .metrics import connection_metrics
+
+
+class LocalSearchPathCursorMixin:
+    """
+    Sets the search_path with SET LOCAL in the transaction of every statement. A statement run in
+    autocommit mode is wrapped in a transaction of its own, since pgbouncer in transaction pooling
+    mode may send each transaction to a different server connection.
+    """
+
+    def execute(self, sql, params=None):
+        return self._with_search_path(super().execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._with_search_path(super().executemany, sql, param_list)
+
+    def callproc(self, procname, params=None, kparams=None):
+        return self._with_search_path(super().callproc, procname, params, kparams)
+
+    def _with_search_path(self, run, *args):
+        if not self.db.get_autocommit():
+            self.db.set_local_search_path(self.cursor)
+            return run(*args)
+        # Server-side cursors are disabled in this mode, so the rows are fetched before the commit
+        self.db.set_autocommit(False)
+        try:
+            self.db.set_local_search_path(self.cursor)
+            result = run(*args)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        finally:
+            self.db.set_autocommit(True)
+        return result
+
+
+class LocalSearchPathCursorWrapper(LocalSearchPathCursorMixin, CursorWrapper):
+    pass
+
+
+class LocalSearchPathCursorDebugWrapper(LocalSearchPathCursorMixin, CursorDebugWrapper):
+    pass
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+    """
+    django-tenants backend that is safe to keep connections open between requests.
+
+    Django checks persistent connections in and out around every request through
+    close_if_unusable_or_obsolete(); each checkout resets the connection to the public
+    schema, so a schema set by one request can never be seen by the next. Connection
+    and checkout timings are collected in `connection_metrics`.
+
+    With PGBOUNCER_TRANSACTION_POOLING in the database settings no session state is relied on: consecutive transactions
+    may be served by different server connections, so the search_path is set with SET LOCAL once
+    per transaction, and statements outside of a transaction get one of their own (see
+    `LocalSearchPathCursorMixin`). Session-level SET search_path is never sent in that mode.
+
+    Schema switches are tracked: switching to the schema that is already active is a
+    no-op, and since django-tenants only sends SET search_path with the next cursor
+    (TENANT_LIMIT_SET_CALLS), switching away and back before any query costs nothing.
+    `search_path_switches` counts the SET statements actually sent and
+    `schema_switch_requests` the set_tenant/set_schema calls made.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._checkout_pending = False
+        self._sent_search_path = None
+        self._local_search_path = None
+        self.search_path_switches = 0
+        self.schema_switch_requests = 0
+        super().__init__(*args, **kwargs)
+
+    def set_tenant(self, tenant, include_public=True):
+        self.schema_switch_requests += 1
+        if (self.tenant is not None and tenant.schema_name == self.schema_name
+                and include_public == self.include_public_schema):
+            # Same schema: keep the search_path already sent and the ContentType cache
+            self.tenant = tenant
+            return
+        super().set_tenant(tenant, include_public)
+        if self._sent_search_path is not None and self._get_cursor_search_paths() == self._sent_search_path:
+            # Back on the search_path the server already has, nothing needs to be sent
+            self.search_path_set_schemas = self._sent_search_path
+
+    def reset_schema_switch_counters(self):
+        self.search_path_switches = 0
+        self.schema_switch_requests = 0
+
+    @property
+    def pgbouncer_transaction_pooling(self):
+        return self.settings_dict.get('PGBOUNCER_TRANSACTION_POOLING', False)
+
+    def forget_search_path(self):
+        # The server-side search_path is unknown: send it again with the next cursor
+        self.search_path_set_schemas = None
+        self._sent_search_path = None
+        self._local_search_path = None
+
+    def set_local_search_path(self, cursor):
+        """Set the search_path for the rest of the current transaction, unless it already is."""
+        search_paths = self._get_cursor_search_paths()
+        if search_paths == self._local_search_path:
+            return
+        cursor.execute('SET LOCAL search_path = {0}'.format(','.join("'{}'".format(s) for s in search_paths)))
+        self._local_search_path = search_paths
+        self.search_path_switches += 1
+
+    def make_cursor(self, cursor):
+        if self.pgbouncer_transaction_pooling:
+            return LocalSearchPathCursorWrapper(cursor, self)
+        return super().make_cursor(cursor)
+
+    def make_debug_cursor(self, cursor):
+        if self.pgbouncer_transaction_pooling:
+            return LocalSearchPathCursorDebugWrapper(cursor, self)
+        return super().make_debug_cursor(cursor)
+
+    def connect(self):
+        self.forget_search_path()
+        super().connect()
+
+    def close(self):
+        self._sent_search_path = None
+        super().close()
+
+    def _commit(self):
+        # SET LOCAL ends with the transaction
+        self._local_search_path = None
+        super()._commit()
+
+    def _rollback(self):
+        # A rolled back transaction also reverts any SET search_path issued inside it
+        self.forget_search_path()
+        super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self.forget_search_path()
+        super()._savepoint_rollback(sid)
+
+    def get_new_connection(self, conn_params):
+        started = time.monotonic()
+        new_connection = super().get_new_connection(conn_params)
+        connection_metrics.record_connect(time.monotonic() - started)
+        return new_connection
+
+    def _close(self):
+        had_connection = self.connection is not None
+        super()._close()
+        if had_connection:
+            connection_metrics.record_close()
+
+    def close_if_health_check_failed(self):
+        had_connection = self.connection is not None
+        super().close_if_health_check_failed()
+        if had_connection and self.connection is None:
+            connection_metrics.record_health_check_failure()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Called on request start and finish: never hand a connection over in a tenant schema
+        if self.schema_name != get_public_schema_name():
+            self.set_schema_to_public()
+        self._checkout_pending = True
+
+    def ensure_connection(self):
+        if not self._checkout_pending:
+            return super().ensure_connection()
+        reused = self.connection is not None
+        started = time.monotonic()
+        super().ensure_connection()
+        self._checkout_pending = False
+        connection_metrics.record_checkout(time.monotonic() - started, reused and self.connection is not None)
+
+    def _cursor(self, name=None):
+        if self.pgbouncer_transaction_pooling:
+            # Skip django-tenants' session-level SET; the cursor sets the search_path per transaction
+            return super(TenantDatabaseWrapper, self)._cursor(name=name)
+        pending = self.search_path_set_schemas is None
+        cursor = super()._cursor(name=name)
+        if pending and self.search_path_set_schemas is not None:
+            self._sent_search_path = self.search_path_set_schemas
+            self.search_path_switches += 1
+        return cursor
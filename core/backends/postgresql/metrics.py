@@ -0,0 +1,67 @@
+import threading
+
+
+class ConnectionMetrics:
+    """Per-process counters describing how database connections are opened and reused."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open_connections = 0
+            self.connections_opened = 0
+            self.connections_closed = 0
+            self.checkouts = 0
+            self.reused_checkouts = 0
+            self.health_check_failures = 0
+            self.connect_time_total = 0.0
+            self.connect_time_max = 0.0
+            self.checkout_time_total = 0.0
+            self.checkout_time_max = 0.0
+
+    def record_connect(self, duration):
+        with self._lock:
+            self.open_connections += 1
+            self.connections_opened += 1
+            self.connect_time_total += duration
+            self.connect_time_max = max(self.connect_time_max, duration)
+
+    def record_close(self):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+            self.connections_closed += 1
+
+    def record_checkout(self, duration, reused):
+        with self._lock:
+            self.checkouts += 1
+            self.reused_checkouts += int(reused)
+            self.checkout_time_total += duration
+            self.checkout_time_max = max(self.checkout_time_max, duration)
+
+    def record_health_check_failure(self):
+        with self._lock:
+            self.health_check_failures += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "pool_size": self.open_connections,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "checkouts": self.checkouts,
+                "reused_checkouts": self.reused_checkouts,
+                "health_check_failures": self.health_check_failures,
+                "connect_wait_ms_avg": self._avg_ms(self.connect_time_total, self.connections_opened),
+                "connect_wait_ms_max": round(self.connect_time_max * 1000, 3),
+                "checkout_latency_ms_avg": self._avg_ms(self.checkout_time_total, self.checkouts),
+                "checkout_latency_ms_max": round(self.checkout_time_max * 1000, 3),
+            }
+
+    @staticmethod
+    def _avg_ms(total, count):
+        return round(total / count * 1000, 3) if count else 0.0
+
+
+connection_metrics = ConnectionMetrics()
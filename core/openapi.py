@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import path
+from django.utils.http import parse_etags
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+# urlconf -> schema dict, and (urlconf, renderer format) -> (rendered bytes, etag)
+_schemas = {}
+_rendered = {}
+_lock = threading.Lock()
+
+
+def get_schema_urlconfs():
+    """The URLconfs that serve a schema: tenant and public."""
+    return [settings.ROOT_URLCONF, settings.PUBLIC_SCHEMA_URLCONF]
+
+
+def get_schema_artifact_path(urlconf):
+    return os.path.join(settings.OPENAPI_SCHEMA_DIR, f'{urlconf}.json')
+
+
+def generate_schema(urlconf):
+    generator = SchemaGenerator(urlconf=urlconf)
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema_artifact(urlconf):
+    """Generate the schema of `urlconf` and write it to the artifact directory. Returns the path."""
+    schema = generate_schema(urlconf)
+    artifact_path = get_schema_artifact_path(urlconf)
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    temporary_path = f'{artifact_path}.tmp'
+    with open(temporary_path, 'w') as artifact:
+        json.dump(schema, artifact)
+    # Workers starting mid-deploy never read a half-written file
+    os.replace(temporary_path, artifact_path)
+    with _lock:
+        _schemas[urlconf] = schema
+        for key in [key for key in _rendered if key[0] == urlconf]:
+            del _rendered[key]
+    return artifact_path
+
+
+def _read_schema_artifact(urlconf):
+    # In development code changes between runs, so the artifact could be stale
+    if settings.DEBUG:
+        return None
+    try:
+        with open(get_schema_artifact_path(urlconf)) as artifact:
+            return json.load(artifact)
+    except (OSError, ValueError):
+        return None
+
+
+def get_schema(urlconf):
+    """
+    The schema of `urlconf`, generated at most once per process: from the prebuilt artifact when
+    there is one, otherwise lazily on the first request.
+    """
+    schema = _schemas.get(urlconf)
+    if schema is not None:
+        return schema
+    with _lock:
+        schema = _schemas.get(urlconf)
+        if schema is None:
+            schema = _read_schema_artifact(urlconf)
+            if schema is None:
+                schema = generate_schema(urlconf)
+            _schemas[urlconf] = schema
+    return schema
+
+
+def get_rendered_schema(urlconf, renderer):
+    """Return (content, etag) of the schema of `urlconf` rendered with `renderer`."""
+    key = (urlconf, renderer.format)
+    rendered = _rendered.get(key)
+    if rendered is None:
+        content = renderer.render(get_schema(urlconf), renderer.media_type, renderer_context={})
+        rendered = (content, f'"{hashlib.md5(content).hexdigest()}"')
+        _rendered[key] = rendered
+    return rendered
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Serves the OpenAPI schema of the request's URLconf (tenant or public) from a per-process cache,
+    with an ETag. Requests for a specific version or language are generated on the fly.
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        if version or (settings.USE_I18N and request.GET.get('lang')):
+            return super()._get_schema_response(request)
+
+        urlconf = self.urlconf or getattr(request, 'urlconf', None) or settings.ROOT_URLCONF
+        content, etag = get_rendered_schema(urlconf, request.accepted_renderer)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and etag in [value.removeprefix('W/') for value in parse_etags(if_none_match)]:
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, version)}"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+# Shared by core.urls and core.urls_public
+schema_urlpatterns = [
+    path('schema/', CachedSpectacularAPIView.as_view(), name='schema'),
+    path('docs', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+]
+
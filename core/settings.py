@@ -67,6 +67,7 @@ SHARED_APPS = [
     'drf_spectacular',
     'django_tenants',
     'registration',
+    'jobs',
 
     'django.contrib.admin',
     'django.contrib.auth',
@@ -109,8 +110,10 @@ TENANT_APPS = [
 INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in SHARED_APPS]
 
 MIDDLEWARE = [
+    'companies.middlewares.SchemaSwitchTrackerMiddleware',
+    'companies.middlewares.CompressionMiddleware',
     # Middleware for accessing schemas and permissions
-    'django_tenants.middleware.main.TenantMainMiddleware',
+    'companies.middlewares.CachedTenantMainMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -157,14 +160,29 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Create database in PgAdmin and store the variables in the .env file
 
+# Set DB_PGBOUNCER_TRANSACTION_POOLING=True when connecting through pgbouncer in transaction
+# pooling mode: pgbouncer then owns the pool, server-side cursors are disabled and each request runs
+# in a single transaction. The search_path is set with SET LOCAL per transaction, and statements run
+# outside of one (middleware, workers, commands) each get their own (see core.backends.postgresql).
+# Session-level state such as pg_advisory_lock must not be used in that mode.
+PGBOUNCER_TRANSACTION_POOLING = os.getenv('DB_PGBOUNCER_TRANSACTION_POOLING') == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv("DB_ENGINE"),
+        # core.backends.postgresql wraps django_tenants.postgresql_backend
+        'ENGINE': os.getenv("DB_ENGINE", 'core.backends.postgresql'),
         'NAME': os.getenv("DB_NAME"),
         'USER': os.getenv("DB_USER"),
         'PASSWORD': os.getenv("DB_PASSWORD"),
         'HOST': os.getenv("DB_HOST"),
-        'PORT': os.getenv("DB_PORT")
+        'PORT': os.getenv("DB_PORT"),
+        # Keep connections open between requests; 0 closes them after every request
+        'CONN_MAX_AGE': 0 if PGBOUNCER_TRANSACTION_POOLING else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': PGBOUNCER_TRANSACTION_POOLING,
+        'ATOMIC_REQUESTS': PGBOUNCER_TRANSACTION_POOLING,
+        # Read by core.backends.postgresql
+        'PGBOUNCER_TRANSACTION_POOLING': PGBOUNCER_TRANSACTION_POOLING,
     }
 }
 
@@ -173,6 +191,34 @@ DATABASE_ROUTERS = (
     'django_tenants.routers.TenantSyncRouter',
 )
 
+# Caches
+# Redis whenever CACHE_LOCATION is set (as in the compose files, e.g. redis://redis:6379/1), so cache
+# invalidation and single-flight locks are seen by every web and worker process. locmem otherwise, for
+# tests and local runs; the shared.cache system check refuses a per-process backend when DEBUG is off.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', (
+    'django.core.cache.backends.redis.RedisCache' if CACHE_LOCATION
+    else 'django.core.cache.backends.locmem.LocMemCache'
+))
+
+CACHES = {
+    # Tenant-aware: keys are prefixed with the active schema (see shared.cache)
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION or 'fastra-default',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'KEY_FUNCTION': 'shared.cache.make_key',
+        'KEY_PREFIX': 'fastra',
+    },
+    # Entries shared by every tenant, such as domain lookups
+    'global': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION or 'fastra-global',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'fastra-global',
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -208,6 +254,9 @@ SHOW_PUBLIC_IF_NO_TENANT_FOUND = True
 
 PG_EXTRA_SEARCH_PATHS = ['extensions']
 
+# Only send SET search_path when the schema actually changed (see core.backends.postgresql)
+TENANT_LIMIT_SET_CALLS = True
+
 MEDIA_URL = '/media/'
 # MEDIA_ROOT = os.path.join(BASE_DIR, '/media')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -216,6 +265,9 @@ media_root = MEDIA_ROOT
 if not os.path.exists(media_root):
     os.makedirs(media_root, exist_ok=True)
 
+# Longest side, in pixels, of the thumbnails generated for uploaded images (see shared.images)
+IMAGE_THUMBNAIL_SIZE = int(os.getenv('IMAGE_THUMBNAIL_SIZE', 128))
+
 vendor_profiles_dir = os.path.join(media_root, 'vendor_profiles')
 if not os.path.exists(vendor_profiles_dir):
     os.makedirs(vendor_profiles_dir, exist_ok=True)
@@ -333,6 +385,12 @@ TENANT_MODEL = 'registration.Tenant'
 
 TENANT_DOMAIN_MODEL = 'registration.Domain'
 
+# New tenants are provisioned by cloning this pre-migrated, pre-seeded schema
+# (built with `manage.py prepare_tenant_template`) instead of running every migration
+# at signup. TENANT_SPARE_SCHEMAS pre-cloned schemas are kept ready to be renamed.
+TENANT_TEMPLATE_SCHEMA = os.getenv('TENANT_TEMPLATE_SCHEMA', 'tenant_template')
+TENANT_SPARE_SCHEMAS = int(os.getenv('TENANT_SPARE_SCHEMAS', 3))
+
 SPECTACULAR_SETTINGS = {
     'ENUM_NAME_OVERRIDES': {
         'status': {
@@ -344,6 +402,16 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Bulk printing of documents as one merged PDF
+BULK_PRINT_MAX_DOCUMENTS = int(os.getenv('BULK_PRINT_MAX_DOCUMENTS', 500))
+BULK_PRINT_SPOOL_SIZE = int(os.getenv('BULK_PRINT_SPOOL_SIZE', 10 * 1024 * 1024))
+
+# Monthly partitions of the stock move ledger created ahead of time, see inventory.utilities.partitions
+STOCK_MOVE_PARTITION_MONTHS_AHEAD = int(os.getenv('STOCK_MOVE_PARTITION_MONTHS_AHEAD', 3))
+
+# Prebuilt OpenAPI schemas, written by `manage.py prebuild_openapi_schema` on deploy
+OPENAPI_SCHEMA_DIR = os.getenv('OPENAPI_SCHEMA_DIR', os.path.join(BASE_DIR, 'openapi'))
+
 AUTHENTICATION_BACKENDS = [
     # 'companies.authenticate.EmailBackend',
     'core.backends.tenant_auth_backend.TenantUserBackend',
@@ -367,8 +435,23 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson-backed; both fall back to the standard JSON implementation when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'shared.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'shared.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Responses smaller than this are sent uncompressed (see companies.middlewares.CompressionMiddleware)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 6))
+RESPONSE_BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', 5))
+
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND')
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
@@ -377,6 +460,13 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Vendor mass mailing: the most emails one background batch sends, and the default
+# per-tenant sending rate (emails per minute, 0 for no limit), enforced across all of a
+# tenant's mailings. Individual tenants can be given their own limit by schema name.
+VENDOR_MASS_MAIL_CHUNK_SIZE = int(os.getenv('VENDOR_MASS_MAIL_CHUNK_SIZE', 100))
+VENDOR_MASS_MAIL_RATE_LIMIT = int(os.getenv('VENDOR_MASS_MAIL_RATE_LIMIT', 120))
+VENDOR_MASS_MAIL_TENANT_RATE_LIMITS = {}
+
 AUTH_USER_MODEL = 'auth.User'
 
 # JWT settings
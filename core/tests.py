@@ -0,0 +1,179 @@
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from core import openapi
+from core.backends.postgresql.metrics import connection_metrics
+
+
+class ConnectionPoolTests(TestCase):
+
+    def get_connection(self, **settings):
+        """A connection of its own, outside of the test transaction."""
+        db = connection.copy()
+        db.settings_dict.update(settings)
+        self.addCleanup(db.close)
+        return db
+
+    def fetch_value(self, db, sql):
+        with db.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+
+    def test_checkout_resets_the_search_path_of_a_reused_connection(self):
+        connection_metrics.reset()
+        db = self.get_connection(CONN_MAX_AGE=60)
+
+        # Request start, a query in a tenant schema, request end
+        db.close_if_unusable_or_obsolete()
+        db.set_schema('information_schema', include_public=False)
+        self.fetch_value(db, "SELECT 1")
+        db.close_if_unusable_or_obsolete()
+
+        self.assertEqual(db.schema_name, 'public')
+        self.assertEqual(self.fetch_value(db, "SHOW search_path"), 'public')
+        metrics = connection_metrics.as_dict()
+        self.assertEqual(metrics['connections_opened'], 1)
+        self.assertEqual((metrics['checkouts'], metrics['reused_checkouts']), (2, 1))
+        self.assertEqual(metrics['pool_size'], 1)
+
+    def test_closed_connection_leaves_the_pool(self):
+        connection_metrics.reset()
+        db = self.get_connection()
+        db.ensure_connection()
+
+        db.close()
+
+        metrics = connection_metrics.as_dict()
+        self.assertEqual((metrics['pool_size'], metrics['connections_closed']), (0, 1))
+
+    def test_transaction_pooling_sets_the_search_path_only_for_the_statement(self):
+        db = self.get_connection(PGBOUNCER_TRANSACTION_POOLING=True)
+        db.set_schema('information_schema', include_public=False)
+
+        self.assertEqual(self.fetch_value(db, "SELECT current_setting('search_path')"), 'information_schema')
+
+        # The statement ran in a transaction of its own, which took the SET LOCAL with it
+        self.assertTrue(db.get_autocommit())
+        with db.connection.cursor() as cursor:
+            cursor.execute("SHOW search_path")
+            self.assertNotEqual(cursor.fetchone()[0], 'information_schema')
+
+    def test_transaction_pooling_sets_the_search_path_once_per_transaction(self):
+        db = self.get_connection(PGBOUNCER_TRANSACTION_POOLING=True)
+        db.set_autocommit(False)
+        db.reset_schema_switch_counters()
+
+        self.fetch_value(db, "SELECT 1")
+        self.fetch_value(db, "SELECT 1")
+        self.assertEqual(db.search_path_switches, 1)
+
+        db.set_schema('information_schema', include_public=False)
+        self.assertEqual(self.fetch_value(db, "SELECT current_setting('search_path')"), 'information_schema')
+        self.assertEqual(db.search_path_switches, 2)
+
+        db.commit()
+        self.fetch_value(db, "SELECT 1")
+        self.assertEqual(db.search_path_switches, 3)
+        db.rollback()
+        db.set_autocommit(True)
+
+
+class SchemaSwitchTests(TestCase):
+
+    def setUp(self):
+        self.db = connection.copy()
+        self.addCleanup(self.db.close)
+        self.db.set_schema('information_schema', include_public=False)
+        self.fetch_search_path()
+        self.db.reset_schema_switch_counters()
+
+    def fetch_search_path(self):
+        with self.db.cursor() as cursor:
+            cursor.execute("SHOW search_path")
+            return cursor.fetchone()[0]
+
+    def test_switch_to_the_active_schema_sends_nothing(self):
+        self.db.set_schema('information_schema', include_public=False)
+
+        self.assertEqual(self.fetch_search_path(), 'information_schema')
+        self.assertEqual((self.db.schema_switch_requests, self.db.search_path_switches), (1, 0))
+
+    def test_switch_away_and_back_before_a_query_sends_nothing(self):
+        self.db.set_schema_to_public()
+        self.db.set_schema('information_schema', include_public=False)
+
+        self.assertEqual(self.fetch_search_path(), 'information_schema')
+        self.assertEqual((self.db.schema_switch_requests, self.db.search_path_switches), (2, 0))
+
+    def test_switch_to_another_schema_is_sent_once(self):
+        self.db.set_schema_to_public()
+
+        self.assertEqual(self.fetch_search_path(), 'public')
+        self.assertEqual(self.fetch_search_path(), 'public')
+        self.assertEqual(self.db.search_path_switches, 1)
+
+    def test_rollback_sends_the_search_path_again(self):
+        self.db.set_autocommit(False)
+        self.db.rollback()
+
+        self.assertEqual(self.fetch_search_path(), 'information_schema')
+        self.assertEqual(self.db.search_path_switches, 1)
+        self.db.rollback()
+        self.db.set_autocommit(True)
+
+
+class OpenAPISchemaTests(SimpleTestCase):
+
+    urlconf = 'core.urls'
+
+    def setUp(self):
+        self.enterContext(mock.patch.dict(openapi._schemas, clear=True))
+        self.enterContext(mock.patch.dict(openapi._rendered, clear=True))
+        self.schema_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir, DEBUG=False))
+        self.generate_schema = self.enterContext(mock.patch(
+            'core.openapi.generate_schema', return_value={'openapi': '3.0.3', 'paths': {}},
+        ))
+
+    def get(self, **headers):
+        request = APIRequestFactory().get('/schema/?format=json', **headers)
+        request.urlconf = self.urlconf
+        return openapi.CachedSpectacularAPIView.as_view()(request)
+
+    def test_schema_is_generated_once_per_process(self):
+        openapi.get_schema(self.urlconf)
+        openapi.get_schema(self.urlconf)
+
+        self.assertEqual(self.generate_schema.call_count, 1)
+
+    def test_prebuilt_artifact_is_read_instead_of_generating(self):
+        openapi.write_schema_artifact(self.urlconf)
+        openapi._schemas.clear()
+        self.generate_schema.reset_mock()
+
+        self.assertEqual(openapi.get_schema(self.urlconf)['openapi'], '3.0.3')
+        self.generate_schema.assert_not_called()
+
+    def test_artifact_is_ignored_in_debug(self):
+        openapi.write_schema_artifact(self.urlconf)
+        openapi._schemas.clear()
+        self.generate_schema.reset_mock()
+
+        with override_settings(DEBUG=True):
+            openapi.get_schema(self.urlconf)
+
+        self.generate_schema.assert_called_once_with(self.urlconf)
+
+    def test_unchanged_schema_returns_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # As sent back after the compression middleware made it weak
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
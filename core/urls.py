@@ -3,7 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from core.openapi import schema_urlpatterns
+from core.views import DatabaseConnectionMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,12 +12,13 @@ urlpatterns = [
     path('company/', include('companies.urls')),
     path('hr/', include('hr.urls')),
     path('inventory/', include('inventory.urls')),
+    path('jobs/', include('jobs.urls')),
     path('project-costing/', include('project_costing.urls')),
     path('purchase/', include('purchase.urls')),
     path('sales/', include('sales.urls')),
     path('users/', include('users.urls')),
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('docs', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    *schema_urlpatterns,
+    path('metrics/db/', DatabaseConnectionMetricsView.as_view(), name='db-metrics'),
 
     
 ]
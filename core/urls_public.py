@@ -2,13 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+from core.openapi import schema_urlpatterns
+from core.views import DatabaseConnectionMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('registration.urls'), name='registration'),
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('docs', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    *schema_urlpatterns,
+    path('metrics/db/', DatabaseConnectionMetricsView.as_view(), name='db-metrics'),
 
 ]
 
@@ -0,0 +1,18 @@
+from django.db import connection
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.backends.postgresql.metrics import connection_metrics
+
+
+class DatabaseConnectionMetricsView(APIView):
+    """Connection pool metrics of the worker process that serves the request."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "conn_max_age": connection.settings_dict.get('CONN_MAX_AGE'),
+            "health_checks": connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            **connection_metrics.as_dict(),
+        })
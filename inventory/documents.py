@@ -0,0 +1,70 @@
+from django.db.models import Prefetch
+
+from shared.documents import register_document
+
+from .models import (DeliveryOrder, DeliveryOrderItem, IncomingProduct, IncomingProductItem,
+                     InternalTransfer, InternalTransferItem)
+
+
+@register_document(
+    DeliveryOrder,
+    select_related=('source_location',),
+    prefetch_related=(Prefetch('delivery_order_items', queryset=DeliveryOrderItem.objects.filter(
+        is_hidden=False).select_related('product_item')),),
+)
+def render_delivery_order(delivery_order, writer):
+    writer.heading(f"Delivery Order: {delivery_order.order_unique_id}")
+    writer.field("Customer", delivery_order.customer_name)
+    writer.field("Delivery Address", delivery_order.delivery_address)
+    writer.field("Delivery Date", delivery_order.delivery_date)
+    writer.field("Source Location", delivery_order.source_location.location_name)
+    writer.field("Assigned To", delivery_order.assigned_to)
+    writer.field("Status", delivery_order.status)
+    writer.line()
+    writer.line("Products:", bold=True)
+    for item in delivery_order.delivery_order_items.all():
+        writer.line(f"- {item.product_item.product_name}, Qty: {item.quantity_to_deliver}, "
+                    f"Unit Price: {item.unit_price}, Total: {item.total_price}", indent=10)
+
+
+@register_document(
+    IncomingProduct,
+    select_related=('supplier', 'source_location', 'destination_location'),
+    prefetch_related=(Prefetch('incoming_product_items', queryset=IncomingProductItem.objects.select_related(
+        'product')),),
+)
+def render_incoming_product(incoming_product, writer):
+    writer.heading(f"Incoming Product: {incoming_product.incoming_product_id}")
+    writer.field("Receipt Type", incoming_product.get_receipt_type_display())
+    writer.field("Supplier", incoming_product.supplier.company_name)
+    writer.field("Source Location", incoming_product.source_location.location_name)
+    writer.field("Destination Location", incoming_product.destination_location.location_name
+                 if incoming_product.destination_location else None)
+    writer.field("Related PO", incoming_product.related_po_id)
+    writer.field("Status", incoming_product.status)
+    writer.line()
+    writer.line("Products:", bold=True)
+    for item in incoming_product.incoming_product_items.all():
+        writer.line(f"- {item.product.product_name}, Expected: {item.expected_quantity}, "
+                    f"Received: {item.quantity_received}", indent=10)
+
+
+@register_document(
+    InternalTransfer,
+    select_related=('source_location', 'destination_location'),
+    prefetch_related=(Prefetch('internal_transfer_items', queryset=InternalTransferItem.objects.select_related(
+        'product__unit_of_measure')),),
+)
+def render_internal_transfer(internal_transfer, writer):
+    """Pick list: what to take from the source location and where it goes."""
+    writer.heading(f"Internal Transfer: {internal_transfer.id}")
+    writer.field("Date Created", internal_transfer.date_created.strftime('%Y-%m-%d'))
+    writer.field("Pick From", internal_transfer.source_location.location_name)
+    writer.field("Deliver To", internal_transfer.destination_location.location_name)
+    writer.field("Status", internal_transfer.get_status_display())
+    writer.line()
+    writer.line("Products to pick:", bold=True)
+    for item in internal_transfer.internal_transfer_items.all():
+        unit = item.product.unit_of_measure
+        writer.line(f"[  ] {item.product.product_name}, Qty: {item.quantity_requested}"
+                    f"{f' {unit}' if unit else ''}", indent=10)
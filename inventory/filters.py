@@ -1,7 +1,8 @@
 import django_filters
-from .models import StockMove
+from .models import ArchivedStockMove, StockMove
 
 class StockMoveFilter(django_filters.FilterSet):
+    # The ledger is partitioned by month of date_moved: bounded queries only scan the months they cover
     date_from = django_filters.DateTimeFilter(field_name='date_moved', lookup_expr='gte')
     date_to = django_filters.DateTimeFilter(field_name='date_moved', lookup_expr='lte')
     source_location = django_filters.NumberFilter(field_name='source_location__id')
@@ -11,3 +12,8 @@ class StockMoveFilter(django_filters.FilterSet):
     class Meta:
         model = StockMove
         fields = ['date_from', 'date_to', 'source_location', 'destination_location', 'product']
+
+
+class ArchivedStockMoveFilter(StockMoveFilter):
+    class Meta(StockMoveFilter.Meta):
+        model = ArchivedStockMove
@@ -0,0 +1,19 @@
+from django.conf import settings
+
+from inventory.models import StockMove
+from inventory.utilities.partitions import ensure_partitions
+from shared.tenant_commands import TenantTaskCommand
+
+
+class Command(TenantTaskCommand):
+    help = ('Creates the monthly partitions of the stock move ledger for the coming months, and for months with '
+            'rows in the default partition, in all schemas except public. Meant to run nightly.')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--months-ahead', type=int, default=settings.STOCK_MOVE_PARTITION_MONTHS_AHEAD,
+                            help='Number of months after the current one to create partitions for.')
+
+    def handle_schema(self, schema_name, **options):
+        created = ensure_partitions(StockMove._meta.db_table, options['months_ahead'])
+        return {"partitions_created": len(created)}
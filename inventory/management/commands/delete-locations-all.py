@@ -1,27 +1,13 @@
-from django.core.management.base import BaseCommand
-from inventory.models import MultiLocation, Location
-from django_tenants.utils import schema_context, get_tenant_model
+from inventory.models import Location, MultiLocation
+from shared.tenant_commands import TenantTaskCommand
 
 
-class Command(BaseCommand):
-    help = 'Deletes all records of MultiLocation in all schemas except public'
+class Command(TenantTaskCommand):
+    help = 'Deletes all records of Location in the schemas that have a MultiLocation record, except public'
 
-    def handle(self, *args, **options):
-        tenant_model = get_tenant_model()
-        schemas = tenant_model.objects.values_list('schema_name', flat=True).exclude(schema_name='public')
-
-        for schema_name in schemas:
-            self.stdout.write(self.style.NOTICE(f'Processing schema: {schema_name}'))
-            try:
-                with schema_context(schema_name):
-                    multilocation = MultiLocation.objects.all().exists()
-                    deleted_location_count, _ = Location.objects.all().delete()
-                    if multilocation and deleted_location_count > 0:
-                        self.stdout.write(self.style.SUCCESS(
-                            f'Deleted {deleted_location_count} Location records in schema {schema_name}'))
-                    else:
-                        self.stdout.write(self.style.NOTICE(
-                            f'No Location records found in schema {schema_name}'))
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(
-                    f'Error processing schema {schema_name}: {e}'))
+    def handle_schema(self, schema_name, **options):
+        # Only tenants that went through the MultiLocation setup have locations to reset
+        if not MultiLocation.objects.exists():
+            return {"skipped_no_multi_location": 1}
+        deleted_count, deleted_per_model = Location.objects.all().delete()
+        return {"location": deleted_per_model.get(Location._meta.label, 0), "total_deleted": deleted_count}
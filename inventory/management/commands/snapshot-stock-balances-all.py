@@ -0,0 +1,28 @@
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_date
+
+from inventory.models import StockBalanceSnapshot
+from shared.tenant_commands import TenantTaskCommand
+
+
+class Command(TenantTaskCommand):
+    help = ('Snapshots the stock balances per location and product that changed since the last run, through '
+            'yesterday (UTC), in all schemas except public. Meant to run nightly.')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--through', help='Last day to snapshot (YYYY-MM-DD). Defaults to yesterday.')
+
+    def handle(self, *args, **options):
+        through_day = None
+        if options['through']:
+            try:
+                through_day = parse_date(options['through'])
+            except ValueError:
+                pass
+            if through_day is None:
+                raise CommandError(f"Invalid date '{options['through']}', expected YYYY-MM-DD.")
+        super().handle(*args, through_day=through_day, **options)
+
+    def handle_schema(self, schema_name, **options):
+        return {"snapshots": StockBalanceSnapshot.take_snapshots(options['through_day'])}
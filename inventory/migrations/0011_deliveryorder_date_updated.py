@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_alter_incomingproduct_destination_location_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryorder',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
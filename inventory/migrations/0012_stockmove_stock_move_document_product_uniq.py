@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-18 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_stock_moves(apps, schema_editor):
+    """Fold moves of the same document, move type and product into the oldest one, summing quantities."""
+    StockMove = apps.get_model('inventory', 'StockMove')
+    duplicates = (
+        StockMove.objects.values('source_document_id', 'move_type', 'product_id')
+        .annotate(count=Count('id'), first_id=Min('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        moves = StockMove.objects.filter(
+            source_document_id=duplicate['source_document_id'],
+            move_type=duplicate['move_type'],
+            product_id=duplicate['product_id'],
+        )
+        total = sum(move.quantity for move in moves)
+        moves.filter(id=duplicate['first_id']).update(quantity=total)
+        moves.exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_deliveryorder_date_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_stock_moves, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockmove',
+            constraint=models.UniqueConstraint(fields=('source_document_id', 'move_type', 'product'),
+                                               name='stock_move_document_product_uniq'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+from inventory.utilities.partitions import partition_table
+
+
+def create_stock_move_keys(apps, schema_editor):
+    StockMove = apps.get_model('inventory', 'StockMove')
+    StockMoveKey = apps.get_model('inventory', 'StockMoveKey')
+    # One move per key and unique references are guaranteed by the constraints this migration replaces
+    keys = StockMove.objects.values('source_document_id', 'move_type', 'product_id', 'reference')
+    StockMoveKey.objects.bulk_create([StockMoveKey(**key) for key in keys.iterator()], batch_size=1000)
+
+
+def fill_date_moved(apps, schema_editor):
+    StockMove = apps.get_model('inventory', 'StockMove')
+    StockMove.objects.filter(date_moved__isnull=True).update(date_moved=F('date_created'))
+
+
+def partition_stock_moves(apps, schema_editor):
+    partition_table(schema_editor, apps.get_model('inventory', 'StockMove'),
+                    settings.STOCK_MOVE_PARTITION_MONTHS_AHEAD)
+
+
+# Foreign keys and indexes of the partitioned ledger, which partition_stock_moves does not carry over.
+# Index names of Meta.indexes are kept, so later migrations can find them.
+STOCK_MOVE_CONSTRAINTS_SQL = [
+    'ALTER TABLE "inventory_stockmove" ADD CONSTRAINT "stock_move_product_id_fk" FOREIGN KEY ("product_id") '
+    'REFERENCES "purchase_product" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE "inventory_stockmove" ADD CONSTRAINT "stock_move_unit_of_measure_id_fk" '
+    'FOREIGN KEY ("unit_of_measure_id") REFERENCES "purchase_unitofmeasure" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE "inventory_stockmove" ADD CONSTRAINT "stock_move_source_location_id_fk" '
+    'FOREIGN KEY ("source_location_id") REFERENCES "inventory_location" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE "inventory_stockmove" ADD CONSTRAINT "stock_move_destination_location_id_fk" '
+    'FOREIGN KEY ("destination_location_id") REFERENCES "inventory_location" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE "inventory_stockmove" ADD CONSTRAINT "stock_move_moved_by_id_fk" '
+    'FOREIGN KEY ("moved_by_id") REFERENCES "users_tenantuser" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'CREATE INDEX "stock_move_product_id_idx" ON "inventory_stockmove" ("product_id")',
+    'CREATE INDEX "stock_move_unit_of_measure_id_idx" ON "inventory_stockmove" ("unit_of_measure_id")',
+    'CREATE INDEX "stock_move_source_location_id_idx" ON "inventory_stockmove" ("source_location_id")',
+    'CREATE INDEX "stock_move_destination_location_id_idx" ON "inventory_stockmove" ("destination_location_id")',
+    'CREATE INDEX "stock_move_moved_by_id_idx" ON "inventory_stockmove" ("moved_by_id")',
+    'CREATE INDEX "stock_move_reference_idx" ON "inventory_stockmove" ("reference")',
+    'CREATE INDEX "stock_move_reference_like" ON "inventory_stockmove" ("reference" varchar_pattern_ops)',
+    'CREATE INDEX "inventory_s_move_ty_0fa310_idx" ON "inventory_stockmove" ("move_type")',
+    'CREATE INDEX "inventory_s_source__af13fd_idx" ON "inventory_stockmove" ("source_document_id")',
+    'CREATE INDEX "stock_move_date_moved_brin" ON "inventory_stockmove" USING brin ("date_moved")',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stockmove_stock_move_document_product_uniq'),
+        ('purchase', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='stockmove',
+            name='stock_move_document_product_uniq',
+        ),
+        migrations.CreateModel(
+            name='StockMoveKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_document_id', models.CharField(max_length=50)),
+                ('reference', models.CharField(max_length=50, null=True, unique=True)),
+                ('move_type', models.CharField(choices=[('IN', 'Incoming'), ('OUT', 'Outgoing'), ('RETURN', 'Return'), ('INTERNAL', 'Internal Transfer'), ('ADJUSTMENT', 'Inventory Adjustment'), ('SCRAP', 'Scrap'), ('BACKORDER', 'Back Order')], max_length=10)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='purchase.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source_document_id', 'move_type', 'product'), name='stock_move_document_product_uniq')],
+            },
+        ),
+        migrations.RunPython(create_stock_move_keys, migrations.RunPython.noop),
+        migrations.RunPython(fill_date_moved, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='stockmove',
+            name='date_moved',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Actual date when the stock movement occurred'),
+        ),
+        # The table is rebuilt by partition_stock_moves and these indexes are created with
+        # STOCK_MOVE_CONSTRAINTS_SQL, so only the state changes here
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='stockmove',
+                    name='reference',
+                    field=models.CharField(db_index=True, max_length=50),
+                ),
+                migrations.RemoveIndex(
+                    model_name='stockmove',
+                    name='inventory_s_date_mo_4f1a0f_idx',
+                ),
+                migrations.AddIndex(
+                    model_name='stockmove',
+                    index=django.contrib.postgres.indexes.BrinIndex(fields=['date_moved'], name='stock_move_date_moved_brin'),
+                ),
+            ],
+        ),
+        migrations.RunPython(partition_stock_moves),
+        migrations.RunSQL(STOCK_MOVE_CONSTRAINTS_SQL),
+    ]
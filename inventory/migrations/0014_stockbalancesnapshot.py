@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_partition_stockmove'),
+        ('purchase', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='purchase.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='stock_balance_snapshot_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('location', 'product', 'day'), name='stock_balance_snapshot_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from inventory.utilities.partitions import create_archive_table
+
+
+def create_stock_move_archive(apps, schema_editor):
+    StockMove = apps.get_model('inventory', 'StockMove')
+    ArchivedStockMove = apps.get_model('inventory', 'ArchivedStockMove')
+    with schema_editor.connection.cursor() as cursor:
+        create_archive_table(cursor, StockMove._meta.db_table, ArchivedStockMove._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_stockbalancesnapshot'),
+        ('purchase', '0002_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(unique=True)),
+                ('end_date', models.DateField(unique=True)),
+                ('date_closed', models.DateTimeField(auto_now_add=True)),
+                ('archived_moves', models.PositiveIntegerField(default=0)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='closed_inventory_periods', to='users.tenantuser')),
+            ],
+            options={
+                'ordering': ['-start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryPeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opening_quantity', models.IntegerField(default=0)),
+                ('quantity_in', models.IntegerField(default=0)),
+                ('quantity_out', models.IntegerField(default=0)),
+                ('closing_quantity', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='inventory.location')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='inventory.inventoryperiod')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='purchase.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'location', 'product'), name='inventory_period_balance_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStockMove',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reference', models.CharField(max_length=50)),
+                ('quantity', models.IntegerField()),
+                ('move_type', models.CharField(choices=[('IN', 'Incoming'), ('OUT', 'Outgoing'), ('RETURN', 'Return'), ('INTERNAL', 'Internal Transfer'), ('ADJUSTMENT', 'Inventory Adjustment'), ('SCRAP', 'Scrap'), ('BACKORDER', 'Back Order')], max_length=10)),
+                ('source_document_id', models.CharField(max_length=50)),
+                ('date_moved', models.DateTimeField()),
+                ('date_created', models.DateTimeField()),
+                ('date_modified', models.DateTimeField()),
+                ('delivery_address', models.TextField(blank=True, null=True)),
+                ('source_address', models.TextField(blank=True, null=True)),
+                ('destination_location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.location')),
+                ('moved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='users.tenantuser')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='purchase.product')),
+                ('source_location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.location')),
+                ('unit_of_measure', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='purchase.unitofmeasure')),
+            ],
+            options={
+                'db_table': 'inventory_stockmove_archive',
+                'ordering': ['-date_moved'],
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_stock_move_archive),
+    ]
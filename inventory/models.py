@@ -1,7 +1,14 @@
-from django.db import models, transaction
+import datetime
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
 from django.db.models.signals import pre_save, pre_delete, post_save
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.indexes import BrinIndex
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.dispatch import receiver
@@ -9,7 +16,11 @@ from django.utils import timezone
 
 from decimal import Decimal
 
-from shared.models import GenericModel
+from shared.cache import bump_model_version
+from shared.models import GenericModel, StatusTransitionMixin
+from shared.tenant_config import clear_tenant_config, get_tenant_config
+from inventory.utilities.location_scopes import filter_by_location_scope, get_location_scope
+from inventory.utilities.partitions import ensure_partition_for
 from users.models import TenantUser
 from purchase.models import Product, UnitOfMeasure, Vendor, PurchaseOrder
 from decimal import Decimal, ROUND_HALF_UP
@@ -242,53 +253,45 @@ class Location(models.Model):
         """
         Returns locations that the user can access based on their role.
         """
-        if tenant_user.user.is_superuser:
-            return cls.objects.all()
-        elif tenant_user.user.is_staff:
-            return cls.objects.filter(is_hidden=False)
-        else:
-            # For regular users, filter by their managed locations
-            return cls.objects.filter(
-                models.Q(location_manager=tenant_user) | models.Q(store_keeper=tenant_user)
-            ).distinct()
+        # For regular users, filter by their managed locations
+        return filter_by_location_scope(cls.objects.all(), tenant_user, field='id')
 
     @classmethod
     def get_other_locations_for_user(cls, tenant_user: TenantUser):
-        if tenant_user.user.is_superuser:
+        scope = get_location_scope(tenant_user)
+        if scope.unrestricted:
             return cls.objects.all()
-        elif tenant_user.user.is_staff:
+        elif scope.visible_only:
             return cls.objects.filter(is_hidden=False)
         else:
             # For regular users, filter by locations that are not managed by them
-            return cls.objects.exclude(
-                models.Q(location_manager=tenant_user) | models.Q(store_keeper=tenant_user)
-            ).distinct()
+            return cls.objects.exclude(id__in=list(scope.location_ids))
 
     @classmethod
     def get_managed_locations_for_user(cls, tenant_user: TenantUser):
         """
         Returns locations that the user can access based on their role.
         """
-        if tenant_user.user.is_superuser:
-            return cls.objects.all()
-        elif tenant_user.user.is_staff:
-            return cls.objects.filter(is_hidden=False)
-        else:
-            # For regular users, filter by their managed locations
-            return cls.objects.filter(location_manager=tenant_user).distinct()
+        return filter_by_location_scope(cls.objects.all(), tenant_user, field='id', kind='managed')
 
     @classmethod
     def get_store_locations_for_user(cls, tenant_user: TenantUser):
         """
         Returns locations that the user can access based on their role.
         """
-        if tenant_user.user.is_superuser:
-            return cls.objects.all()
-        elif tenant_user.user.is_staff:
-            return cls.objects.filter(is_hidden=False)
-        else:
-            # For regular users, filter by their store keeper locations
-            return cls.objects.filter(store_keeper=tenant_user).distinct()
+        return filter_by_location_scope(cls.objects.all(), tenant_user, field='id', kind='stored')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that saves which change the assignments can invalidate the cached location scopes
+        instance._loaded_assignments = (instance.__dict__.get('location_manager_id'),
+                                        instance.__dict__.get('store_keeper_id'))
+        return instance
+
+    @property
+    def assignments_changed(self):
+        return getattr(self, '_loaded_assignments', None) != (self.location_manager_id, self.store_keeper_id)
 
     def get_stock_levels(self):
         return [
@@ -321,7 +324,7 @@ class Location(models.Model):
         self.id = f"{self.location_code}{self.id_number:05d}"
         # Check the maximum number of locations if MultiLocation is not activated
         if not self.pk:
-            if not MultiLocation.objects.filter(is_activated=True).exists() and Location.objects.filter(is_hidden=False).count() >= 3:
+            if not get_tenant_config().multi_location_activated and Location.objects.filter(is_hidden=False).count() >= 3:
                 raise Exception("Maximum number of locations reached")
         super().save(*args, **kwargs)
 
@@ -359,7 +362,9 @@ class MultiLocation(models.Model):
             if old.is_activated and not self.is_activated:
                 if Location.get_active_locations().filter(is_hidden=False).count() > 1:
                     raise ValidationError("Reduce number of active locations to one before deactivating MultiLocation.")
-        return super(MultiLocation, self).save(*args, **kwargs)
+        result = super(MultiLocation, self).save(*args, **kwargs)
+        clear_tenant_config()
+        return result
 
     def delete(self, *args, **kwargs):
         # Confirm deletion with the user
@@ -386,7 +391,7 @@ def prevent_multiple_instances(sender, instance, **kwargs):
         raise ValidationError('Only one instance of MultiLocation Model is allowed')
 
 
-class StockAdjustment(models.Model):
+class StockAdjustment(StatusTransitionMixin, models.Model):
     id = models.CharField(max_length=15, primary_key=True)
     id_number = models.PositiveIntegerField(auto_created=True)
     adjustment_type = models.CharField(max_length=20, default="Stock Level Update")
@@ -503,7 +508,7 @@ class StockAdjustmentItem(models.Model):
         verbose_name_plural = 'Adjustment Lines'
 
 
-class Scrap(models.Model):
+class Scrap(StatusTransitionMixin, models.Model):
     id = models.CharField(max_length=15, primary_key=True)
     id_number = models.PositiveIntegerField(auto_created=True)
     adjustment_type = models.CharField(max_length=20, choices=SCRAP_TYPES, default="damage")
@@ -610,7 +615,7 @@ class ScrapItem(models.Model):
         super().save(*args, **kwargs)
 
 
-class IncomingProduct(models.Model):
+class IncomingProduct(StatusTransitionMixin, models.Model):
     """Records incoming products from suppliers"""
     incoming_product_id = models.CharField(max_length=15, primary_key=True)
     id_number = models.PositiveIntegerField(auto_created=True)
@@ -770,6 +775,7 @@ class IncomingProductItem(models.Model):
         verbose_name='Quantity Received',
         default=0
     )
+    date_updated = models.DateTimeField(auto_now=True)
 
     objects = models.Manager()
 
@@ -793,7 +799,7 @@ class IncomingProductItem(models.Model):
         super().save(*args, **kwargs)
 
 
-class BackOrder(models.Model):
+class BackOrder(StatusTransitionMixin, models.Model):
     """Records incoming products from suppliers"""
     backorder_id = models.CharField(max_length=15, primary_key=True)
     id_number = models.PositiveIntegerField(auto_created=True)
@@ -970,7 +976,8 @@ class StockMove(models.Model):
     """Records movement of products across different inventory operations"""
     # id = models.CharField(max_length=15, primary_key=True)
     id = models.BigAutoField(primary_key=True, null=False, blank=False)
-    reference = models.CharField(max_length=50, unique=True)
+    # Unique through StockMoveKey.reference: the partitioned ledger cannot hold the constraint itself
+    reference = models.CharField(max_length=50, db_index=True)
     product = models.ForeignKey(
         Product,
         on_delete=models.PROTECT,
@@ -1000,11 +1007,11 @@ class StockMove(models.Model):
         null=True,
         blank=True
     )
+    # The ledger is partitioned by month of this field, see inventory.utilities.partitions
     date_moved = models.DateTimeField(
-        null=True,
-        blank=True,
+        default=timezone.now,
         help_text="Actual date when the stock movement occurred"
-    )    
+    )
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
     moved_by = models.ForeignKey(
@@ -1025,26 +1032,90 @@ class StockMove(models.Model):
         ordering = ['-date_created']
         indexes = [
             models.Index(fields=['move_type']),
-            models.Index(fields=['date_moved']),
+            # Rows are appended in date order, so a tiny BRIN index is enough to narrow date ranges
+            BrinIndex(fields=['date_moved'], name='stock_move_date_moved_brin'),
             models.Index(fields=['source_document_id']),
         ]
 
-    def save(self, *args, **kwargs):
-        if not self.reference:
-            prefix = f"MOV/{self.move_type}/"
-            last_move = StockMove.objects.filter(
-                reference__startswith=prefix
-            ).order_by('reference').last()
-
-            if last_move:
-                last_number = int(last_move.reference.split('/')[2])
-                new_number = last_number + 1
-            else:
-                new_number = 1
+    @classmethod
+    def reserve_references(cls, move_type, count):
+        """
+        Return `count` consecutive new references for `move_type`. Must run inside a transaction: an
+        advisory lock held until it ends keeps concurrent writers from taking the same numbers. Read from
+        StockMoveKey, which also keeps the references of archived moves.
+        """
+        prefix = f"MOV/{move_type}/"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                           [f"{connection.schema_name}:stock-move:{move_type}"])
+        last_reference = StockMoveKey.objects.filter(
+            reference__startswith=prefix
+        ).order_by('reference').values_list('reference', flat=True).last()
+        start = int(last_reference.split('/')[2]) + 1 if last_reference else 1
+        return [f"{prefix}{number:06d}" for number in range(start, start + count)]
 
-            self.reference = f"{prefix}{new_number:06d}"
+    @classmethod
+    def emit(cls, moves):
+        """
+        Insert `moves` with one bulk_create. Moves already recorded for the same source document,
+        move type and product are skipped through StockMoveKey, so emitting twice is harmless.
+        """
+        if not moves:
+            return []
+        InventoryPeriod.check_open([move.date_moved for move in moves])
+        with transaction.atomic():
+            new_keys = StockMoveKey.claim(
+                [(str(move.source_document_id), move.move_type, move.product_id) for move in moves]
+            )
+            new_moves = []
+            key_ids = []
+            for move in moves:
+                key = (str(move.source_document_id), move.move_type, move.product_id)
+                if key in new_keys:
+                    key_ids.append(new_keys.pop(key))
+                    new_moves.append(move)
+            if not new_moves:
+                return []
+
+            # References are reserved once the keys are claimed, so skipped moves leave no gaps
+            moves_by_type = {}
+            for move, key_id in zip(new_moves, key_ids):
+                moves_by_type.setdefault(move.move_type, []).append((move, key_id))
+            references = {}
+            for move_type, typed_moves in moves_by_type.items():
+                for (move, key_id), reference in zip(typed_moves,
+                                                     cls.reserve_references(move_type, len(typed_moves))):
+                    move.reference = reference
+                    references[key_id] = reference
+            StockMoveKey.set_references(references)
+            for date_moved in {move.date_moved for move in new_moves}:
+                ensure_partition_for(cls._meta.db_table, date_moved)
+            created = cls.objects.bulk_create(new_moves)
+            StockBalanceSnapshot.apply_moves(created)
+            return created
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        InventoryPeriod.check_open([self.date_moved])
+        with transaction.atomic():
+            if not self.reference:
+                self.reference = self.reserve_references(self.move_type, 1)[0]
+            try:
+                with transaction.atomic():
+                    StockMoveKey.objects.create(source_document_id=self.source_document_id, reference=self.reference,
+                                                move_type=self.move_type, product_id=self.product_id)
+            except IntegrityError:
+                if StockMoveKey.objects.filter(reference=self.reference).exists():
+                    raise ValidationError(f"A stock move with reference {self.reference} already exists.")
+                raise ValidationError(
+                    f"A {self.move_type} stock move of this product is already recorded for source document "
+                    f"{self.source_document_id}."
+                )
+            ensure_partition_for(self._meta.db_table, self.date_moved)
+            super().save(*args, **kwargs)
+            StockBalanceSnapshot.apply_moves([self])
 
     def confirm_move(self, user):
         """Confirm the stock movement"""
@@ -1054,6 +1125,311 @@ class StockMove(models.Model):
         self.save()
 
 
+class StockMoveKey(models.Model):
+    """
+    One row per source document, move type and product recorded in the ledger, so that a document
+    moves each product once per move type however often it is saved, with the reference of its move,
+    which is unique. The ledger is partitioned by date and its unique constraints would have to include
+    `date_moved`, so this table enforces both. Rows outlive the moves when they are archived.
+    """
+    source_document_id = models.CharField(max_length=50)
+    # Null only between StockMoveKey.claim and set_references, inside the same transaction
+    reference = models.CharField(max_length=50, null=True, unique=True)
+    move_type = models.CharField(max_length=10, choices=STOCK_MOVE_TYPES)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_document_id', 'move_type', 'product'],
+                                    name='stock_move_document_product_uniq'),
+        ]
+
+    @classmethod
+    def claim(cls, keys):
+        """
+        Record `keys` (source document id, move type, product id) without a reference yet. Returns
+        {key: row id} for those that were new.
+        """
+        keys = list(dict.fromkeys(keys))
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(cls._meta.db_table)} (source_document_id, move_type, product_id) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(keys))} "
+                "ON CONFLICT (source_document_id, move_type, product_id) DO NOTHING "
+                "RETURNING source_document_id, move_type, product_id, id",
+                [value for key in keys for value in key],
+            )
+            return {row[:3]: row[3] for row in cursor.fetchall()}
+
+    @classmethod
+    def set_references(cls, references):
+        """Store the references of claimed keys, given as {row id: reference}, with one UPDATE."""
+        if not references:
+            return
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(cls._meta.db_table)} AS stock_move_key SET reference = new.reference "
+                f"FROM (VALUES {', '.join(['(%s::bigint, %s)'] * len(references))}) AS new (id, reference) "
+                "WHERE stock_move_key.id = new.id",
+                [value for item in references.items() for value in item],
+            )
+
+
+def get_day_end(day):
+    """End of `day` (UTC), the instant the balance snapshot of that day is taken at."""
+    return datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(), tzinfo=datetime.timezone.utc)
+
+
+def get_utc_day(value):
+    return value.astimezone(datetime.timezone.utc).date()
+
+
+class StockBalanceSnapshot(models.Model):
+    """
+    Quantity of a product on hand at a location at the end of a day (UTC) according to the ledger:
+    moves into the location minus moves out of it. A row is only written for the days on which a
+    balance changed, so the balance on any day up to the latest snapshot day is the latest row on or
+    before it. The nightly snapshot-stock-balances-all command snapshots the days since its last run,
+    and moves posted with an earlier `date_moved` update the snapshots they fall into.
+    """
+    location = models.ForeignKey('Location', on_delete=models.CASCADE, related_name='balance_snapshots')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='balance_snapshots')
+    day = models.DateField()
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'product', 'day'], name='stock_balance_snapshot_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='stock_balance_snapshot_day_idx'),
+        ]
+
+    @classmethod
+    def _lock(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                           [f"{connection.schema_name}:stock-balance-snapshots"])
+
+    @classmethod
+    def get_last_day(cls):
+        return cls.objects.aggregate(last_day=Max('day'))['last_day']
+
+    @staticmethod
+    def get_ledger_deltas(start=None, end=None, by_day=False, location_ids=None, product_ids=None):
+        """
+        Net quantity moved into each location per product by the moves dated in [start, end), keyed by
+        (location id, product id), or by (location id, product id, day) with `by_day`.
+        """
+        moves = StockMove.objects.all()
+        if start is not None:
+            moves = moves.filter(date_moved__gte=start)
+        if end is not None:
+            moves = moves.filter(date_moved__lt=end)
+        if product_ids:
+            moves = moves.filter(product_id__in=product_ids)
+        day = {'day': TruncDate('date_moved', tzinfo=datetime.timezone.utc)} if by_day else {}
+
+        deltas = defaultdict(int)
+        for location_field, sign in (('destination_location_id', 1), ('source_location_id', -1)):
+            side = moves.filter(**{f'{location_field}__isnull': False})
+            if location_ids:
+                side = side.filter(**{f'{location_field}__in': location_ids})
+            rows = side.annotate(**day).values(location_field, 'product_id', *day).annotate(
+                total=Sum('quantity')).order_by()
+            for row in rows:
+                key = (row[location_field], row['product_id'], *([row['day']] if by_day else []))
+                deltas[key] += sign * row['total']
+        return deltas
+
+    @classmethod
+    def get_balances(cls, day, location_ids=None, product_ids=None):
+        """
+        Balances at the end of `day` as {(location id, product id): quantity}: the latest snapshot on
+        or before it, plus the moves dated after the latest snapshot day when `day` is later. Only the
+        moves since the last nightly run are read, however long the ledger.
+        """
+        last_day = cls.get_last_day()
+        base_day = min(day, last_day) if last_day is not None else None
+        balances = {}
+        if base_day is not None:
+            snapshots = cls.objects.filter(day__lte=base_day)
+            if location_ids:
+                snapshots = snapshots.filter(location_id__in=location_ids)
+            if product_ids:
+                snapshots = snapshots.filter(product_id__in=product_ids)
+            latest = snapshots.order_by('location', 'product', '-day').distinct('location', 'product')
+            balances = {
+                (location_id, product_id): quantity
+                for location_id, product_id, quantity in latest.values_list('location_id', 'product_id', 'quantity')
+            }
+        if base_day is None or base_day < day:
+            start = get_day_end(base_day) if base_day is not None else None
+            deltas = cls.get_ledger_deltas(start, get_day_end(day), location_ids=location_ids,
+                                           product_ids=product_ids)
+            for key, delta in deltas.items():
+                balances[key] = balances.get(key, 0) + delta
+        return balances
+
+    @classmethod
+    def take_snapshots(cls, through_day=None):
+        """
+        Snapshot the balances that changed on each day after the latest snapshot day through
+        `through_day` (default: yesterday, UTC), with one grouped query over those days. The first run
+        covers the whole ledger, so every day is answered from snapshots even once its moves are
+        archived by a period close. Returns the number of rows written.
+        """
+        through_day = through_day or get_utc_day(timezone.now()) - datetime.timedelta(days=1)
+        with transaction.atomic():
+            cls._lock()
+            last_day = cls.get_last_day()
+            if last_day is not None and last_day >= through_day:
+                return 0
+
+            start = get_day_end(last_day) if last_day is not None else None
+            deltas = cls.get_ledger_deltas(start, get_day_end(through_day), by_day=True)
+            balances = {}
+            if deltas and last_day is not None:
+                balances = cls.get_balances(
+                    last_day,
+                    location_ids={location_id for location_id, _, _ in deltas},
+                    product_ids={product_id for _, product_id, _ in deltas},
+                )
+            snapshots = []
+            for location_id, product_id, day in sorted(deltas, key=lambda key: key[2]):
+                key = (location_id, product_id)
+                balances[key] = balances.get(key, 0) + deltas[(location_id, product_id, day)]
+                snapshots.append(cls(location_id=location_id, product_id=product_id, day=day,
+                                     quantity=balances[key]))
+            cls.objects.bulk_create(snapshots, batch_size=1000, update_conflicts=True,
+                                    unique_fields=['location', 'product', 'day'], update_fields=['quantity'])
+        return len(snapshots)
+
+    @classmethod
+    def apply_moves(cls, moves):
+        """
+        Add `moves` dated on or before the latest snapshot day to the snapshots they fall into. Moves
+        dated today, which is nearly all of them, are left to the nightly run and cost nothing here.
+        """
+        today = get_utc_day(timezone.now())
+        backdated = [move for move in moves if get_utc_day(move.date_moved) < today]
+        if not backdated:
+            return
+        with transaction.atomic():
+            cls._lock()
+            last_day = cls.get_last_day()
+            if last_day is None:
+                return
+            deltas = defaultdict(int)
+            for move in backdated:
+                day = get_utc_day(move.date_moved)
+                if day > last_day:
+                    continue
+                if move.destination_location_id:
+                    deltas[(move.destination_location_id, move.product_id, day)] += move.quantity
+                if move.source_location_id:
+                    deltas[(move.source_location_id, move.product_id, day)] -= move.quantity
+
+            table = connection.ops.quote_name(cls._meta.db_table)
+            with connection.cursor() as cursor:
+                for (location_id, product_id, day), delta in deltas.items():
+                    # The balance of that day, based on the one before it when the day had no row yet
+                    cursor.execute(
+                        f"INSERT INTO {table} (location_id, product_id, day, quantity) "
+                        f"SELECT %s, %s, %s, COALESCE((SELECT quantity FROM {table} WHERE location_id = %s "
+                        f"AND product_id = %s AND day < %s ORDER BY day DESC LIMIT 1), 0) + %s "
+                        f"ON CONFLICT (location_id, product_id, day) DO UPDATE SET quantity = {table}.quantity + %s",
+                        [location_id, product_id, day, location_id, product_id, day, delta, delta],
+                    )
+                    cursor.execute(
+                        f"UPDATE {table} SET quantity = quantity + %s "
+                        f"WHERE location_id = %s AND product_id = %s AND day > %s",
+                        [delta, location_id, product_id, day],
+                    )
+
+
+class InventoryPeriod(models.Model):
+    """
+    A closed inventory period: whole months, following the previous period, whose opening and closing
+    balances are frozen in InventoryPeriodBalance and whose moves were moved to the archive. No move
+    can be dated in a closed period. See inventory.utilities.periods.
+    """
+    start_date = models.DateField(unique=True)
+    end_date = models.DateField(unique=True)
+    date_closed = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(TenantUser, on_delete=models.PROTECT, related_name='closed_inventory_periods',
+                                  null=True, blank=True)
+    archived_moves = models.PositiveIntegerField(default=0)
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['-start_date']
+
+    def __str__(self):
+        return f"{self.start_date} - {self.end_date}"
+
+    @classmethod
+    def check_open(cls, moments):
+        """Raise ValidationError when one of the datetimes `moments` falls in a closed period."""
+        today = get_utc_day(timezone.now())
+        past_days = [day for day in map(get_utc_day, moments) if day < today]
+        # Closed periods run from the start of the ledger, so the earliest day is enough
+        if past_days and cls.objects.filter(end_date__gte=min(past_days)).exists():
+            raise ValidationError("Stock moves cannot be dated in a closed inventory period.")
+
+
+class InventoryPeriodBalance(models.Model):
+    """Frozen opening and closing balance of a product at a location over a closed period."""
+    period = models.ForeignKey(InventoryPeriod, on_delete=models.CASCADE, related_name='balances')
+    location = models.ForeignKey('Location', on_delete=models.CASCADE, related_name='period_balances')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='period_balances')
+    opening_quantity = models.IntegerField(default=0)
+    quantity_in = models.IntegerField(default=0)
+    quantity_out = models.IntegerField(default=0)
+    closing_quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'location', 'product'], name='inventory_period_balance_uniq'),
+        ]
+
+
+class ArchivedStockMove(models.Model):
+    """
+    Moves of closed periods, read only. The table is partitioned by month like the ledger and is
+    written by period close (see inventory.utilities.partitions.archive_partition), not by Django.
+    Its columns follow StockMove.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    reference = models.CharField(max_length=50)
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, related_name='+')
+    quantity = models.IntegerField()
+    unit_of_measure = models.ForeignKey(UnitOfMeasure, on_delete=models.DO_NOTHING, related_name='+',
+                                        null=True, blank=True)
+    move_type = models.CharField(max_length=10, choices=STOCK_MOVE_TYPES)
+    source_document_id = models.CharField(max_length=50)
+    source_location = models.ForeignKey('Location', on_delete=models.DO_NOTHING, related_name='+',
+                                        null=True, blank=True)
+    destination_location = models.ForeignKey('Location', on_delete=models.DO_NOTHING, related_name='+',
+                                             null=True, blank=True)
+    date_moved = models.DateTimeField()
+    date_created = models.DateTimeField()
+    date_modified = models.DateTimeField()
+    moved_by = models.ForeignKey(TenantUser, on_delete=models.DO_NOTHING, related_name='+', null=True, blank=True)
+    delivery_address = models.TextField(null=True, blank=True)
+    source_address = models.TextField(null=True, blank=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        managed = False
+        db_table = 'inventory_stockmove_archive'
+        ordering = ['-date_moved']
+
+
 class IncomingInventoryRecordItem(models.Model):
     pass
 
@@ -1104,7 +1480,7 @@ def create_outgoing_stock_move(sender, instance, created, **kwargs):
 
 
 # START DELIVERY ORDERS
-class DeliveryOrder(models.Model):
+class DeliveryOrder(StatusTransitionMixin, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('waiting', 'Waiting'),
@@ -1117,6 +1493,7 @@ class DeliveryOrder(models.Model):
     source_location = models.ForeignKey(Location, related_name='source_orders', on_delete=models.PROTECT)
     delivery_address = models.CharField(max_length=255)  # This is the Delivery Address
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
     delivery_date = models.DateField()
     shipping_policy = models.TextField(blank=True, null=True)
     return_policy = models.TextField(blank=True, null=True)
@@ -1133,6 +1510,62 @@ class DeliveryOrder(models.Model):
             if isinstance(value, str):
                 setattr(self, field.name, value.strip())
         super().save(*args, **kwargs)
+
+    def get_stock_levels(self):
+        """
+        Quantity needed and on hand at the source location for each product of the order, with one
+        query: {product id: (needed, available, item ids)}. Lines of the same product are needed
+        together, and a product without a LocationStock row has nothing available.
+        """
+        available = LocationStock.objects.filter(
+            location_id=self.source_location_id, product_id=OuterRef('product_item_id')
+        ).values('quantity')[:1]
+        rows = (
+            DeliveryOrderItem.objects.filter(delivery_order_id=self.pk, is_hidden=False)
+            .values('product_item_id')
+            .annotate(needed=Sum('quantity_to_deliver'), item_ids=ArrayAgg('id'),
+                      available=Coalesce(Subquery(available), Value(Decimal(0)), output_field=models.DecimalField()))
+            .order_by()
+        )
+        return {row['product_item_id']: (row['needed'], row['available'], row['item_ids']) for row in rows}
+
+    def get_shortfalls(self):
+        """The products the source location cannot cover, as returned by `get_stock_levels`."""
+        return {
+            product_id: levels for product_id, levels in self.get_stock_levels().items() if levels[0] > levels[1]
+        }
+
+    def deduct_stock(self):
+        """
+        Deduct every line of the order from the stock of its source location with one conditional
+        UPDATE, applied only when all products are covered, so concurrent deliveries cannot oversell.
+        Returns the shortfalls; when there are any nothing was deducted. The UPDATE sends no signals,
+        so the LocationStock version is bumped once it is committed.
+        """
+        qn = connection.ops.quote_name
+        items = qn(DeliveryOrderItem._meta.db_table)
+        stocks = qn(LocationStock._meta.db_table)
+        with transaction.atomic():
+            savepoint = transaction.savepoint()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"WITH needed AS ("
+                    f"SELECT product_item_id AS product_id, SUM(quantity_to_deliver) AS quantity FROM {items} "
+                    f"WHERE delivery_order_id = %s AND NOT is_hidden GROUP BY product_item_id"
+                    f"), deducted AS ("
+                    f"UPDATE {stocks} AS stock SET quantity = stock.quantity - needed.quantity FROM needed "
+                    f"WHERE stock.location_id = %s AND stock.product_id = needed.product_id "
+                    f"AND stock.quantity >= needed.quantity RETURNING stock.product_id"
+                    f") SELECT (SELECT COUNT(*) FROM needed), (SELECT COUNT(*) FROM deducted)",
+                    [self.pk, self.source_location_id],
+                )
+                needed_count, deducted_count = cursor.fetchone()
+            if deducted_count == needed_count:
+                transaction.savepoint_commit(savepoint)
+                transaction.on_commit(lambda: bump_model_version(LocationStock))
+                return {}
+            transaction.savepoint_rollback(savepoint)
+            return self.get_shortfalls()
         
 
     
@@ -1144,6 +1577,7 @@ class DeliveryOrderItem(models.Model):
     is_available = models.BooleanField(default=False)
     is_hidden = models.BooleanField(default=False)
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.product_item.product_name} ({self.quantity_to_deliver} {self.product_item.unit_of_measure})"
@@ -1216,7 +1650,9 @@ class DeliveryOrderReturnItem(models.Model):
 
 
 # START RETURN OF INCOMING PRODUCTS
-class ReturnIncomingProduct(models.Model):
+class ReturnIncomingProduct(StatusTransitionMixin, models.Model):
+    transition_field = 'is_approved'
+
     unique_id = models.CharField(max_length=50, primary_key=True, unique=True, editable=False, null=False)
     source_document = models.OneToOneField(IncomingProduct, on_delete=models.CASCADE, related_name="return_incoming_product")
     reason_for_return = models.TextField()
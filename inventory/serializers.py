@@ -7,6 +7,7 @@ from inventory.signals import create_delivery_order_returns_stock_move
 from purchase.models import Product, PurchaseOrder
 from purchase.serializers import ProductSerializer, VendorSerializer, PurchaseOrderSerializer
 from shared.serializers import GenericModelSerializer
+from shared.tenant_config import get_tenant_config
 
 from users.models import TenantUser
 from users.serializers import TenantUserSerializer
@@ -16,7 +17,8 @@ from .models import (DeliveryOrder, DeliveryOrderItem, DeliveryOrderReturn, Deli
                      MultiLocation, ReturnIncomingProduct, ReturnIncomingProductItem, StockAdjustment,
                      StockAdjustmentItem, BackOrder, BackOrderItem,
                      Scrap, ScrapItem, IncomingProductItem, IncomingProduct, INCOMING_PRODUCT_RECEIPT_TYPES, StockMove,
-                     LocationStock, InternalTransfer, InternalTransferItem)
+                     LocationStock, InternalTransfer, InternalTransferItem, ArchivedStockMove, InventoryPeriod,
+                     InventoryPeriodBalance)
 
 
 class LocationSerializer(serializers.HyperlinkedModelSerializer):
@@ -37,9 +39,9 @@ class LocationSerializer(serializers.HyperlinkedModelSerializer):
         
 
     def create(self, validated_data):
-        if MultiLocation.objects.exists():
-            multilocation = MultiLocation.objects.first()  # Adjust as needed
-            if (not multilocation.is_activated
+        config = get_tenant_config()
+        if config.has_multi_location:
+            if (not config.multi_location_activated
                     and Location.get_active_locations().filter(is_hidden=False).count() >= 1):
                 raise serializers.ValidationError("max numbers of locations reached")
         else:
@@ -139,7 +141,7 @@ class StockAdjustmentSerializer(serializers.HyperlinkedModelSerializer):
         """
         Create a new Stock Adjustment with its associated items.
         """
-        if not validated_data.get('warehouse_location') and MultiLocation.objects.filter(is_activated=False).exists():
+        if not validated_data.get('warehouse_location') and get_tenant_config().single_location:
             validated_data['warehouse_location'] = Location.get_active_locations().first()
         items_data = validated_data.pop('stock_adjustment_items', [])
         stock_adjustment = StockAdjustment.objects.create(**validated_data)
@@ -310,7 +312,7 @@ class ScrapSerializer(serializers.HyperlinkedModelSerializer):
         """
         Create a new Scrap with its associated items.
         """
-        if not validated_data.get('warehouse_location') and MultiLocation.objects.filter(is_activated=False).exists():
+        if not validated_data.get('warehouse_location') and get_tenant_config().single_location:
             validated_data['warehouse_location'] = Location.get_active_locations().first()
         items_data = validated_data.pop('scrap_items')
         scrap = Scrap.objects.create(**validated_data)
@@ -1057,9 +1059,29 @@ class StockMoveSerializer(serializers.ModelSerializer):
         model = StockMove
         fields = ["id", "product", "quantity", "source_document_id",
                   "source_location", "destination_location", "date_created", "date_moved"]
+
+
+class ArchivedStockMoveSerializer(StockMoveSerializer):
+    class Meta(StockMoveSerializer.Meta):
+        model = ArchivedStockMove
 # END STOCK MOVE
 
 
+# START INVENTORY PERIOD
+class InventoryPeriodBalanceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryPeriodBalance
+        fields = ["location", "product", "opening_quantity", "quantity_in", "quantity_out", "closing_quantity"]
+
+
+class InventoryPeriodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryPeriod
+        fields = ["id", "start_date", "end_date", "date_closed", "closed_by", "archived_moves"]
+        read_only_fields = fields
+# END INVENTORY PERIOD
+
+
 class InternalTransferItemSerializer(serializers.ModelSerializer):
     internal_transfer = serializers.ReadOnlyField(source="internal_transfer.pk")
     product = serializers.PrimaryKeyRelatedField(
@@ -1129,12 +1151,12 @@ class InternalTransferSerializer(GenericModelSerializer):
                 store_keeper = None
                 location_manager = None
                 if 'source_location' in data:
-                    source_location_pk = data.get('source_location', None)
+                    # The field already resolved the Location; read the assignments without further queries
+                    source_location_obj = data.get('source_location', None)
                     try:
-                        source_location_obj = Location.objects.get(pk=source_location_pk)
-                        store_keeper = source_location_obj.store_keeper.pk if source_location_obj.store_keeper else None
-                        location_manager = source_location_obj.location_manager.pk if source_location_obj.location_manager else None
-                    except Location.DoesNotExist:
+                        store_keeper = source_location_obj.store_keeper_id
+                        location_manager = source_location_obj.location_manager_id
+                    except AttributeError:
                         raise serializers.ValidationError("Source location does not exist.")
                     except store_keeper is None:
                         raise serializers.ValidationError("Source location does not have a store keeper assigned.")
@@ -1,208 +1,232 @@
 
 
 from inventory.models import BackOrder, BackOrderItem, DeliveryOrder, DeliveryOrderItem, DeliveryOrderReturn, DeliveryOrderReturnItem, IncomingProduct, IncomingProductItem, ReturnIncomingProduct, ReturnIncomingProductItem, Scrap, ScrapItem, StockAdjustment, StockAdjustmentItem, StockMove
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from inventory.models import Location, LocationStock, MultiLocation
+from shared.cache import register_versioned_model
+from shared.fragment_cache import register_fragment_model
+from inventory.utilities.location_scopes import clear_location_scope, clear_location_scopes, clear_user_location_scopes
+from users.models import TenantUser
+
+
+register_fragment_model(IncomingProduct, children=[(IncomingProductItem, 'incoming_product_id')])
+register_fragment_model(DeliveryOrder, children=[(DeliveryOrderItem, 'delivery_order_id')])
+# Read by cached fragments and conditional GETs of other models
+register_versioned_model(BackOrder, DeliveryOrderReturn, IncomingProduct, Location, LocationStock, MultiLocation)
+
+
+@receiver(post_save, sender=Location)
+def clear_location_scopes_on_assignment(sender, instance, created, **kwargs):
+    if created or instance.assignments_changed:
+        clear_location_scopes()
+    instance._loaded_assignments = (instance.location_manager_id, instance.store_keeper_id)
+
+
+@receiver(post_delete, sender=Location)
+def clear_location_scopes_on_delete(sender, instance, **kwargs):
+    clear_location_scopes()
+
+
+@receiver(post_save, sender=TenantUser)
+def clear_tenant_user_location_scope(sender, instance, **kwargs):
+    # Role or visibility changes alter what the user may see
+    clear_location_scope(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def clear_user_location_scopes_on_save(sender, instance, update_fields=None, **kwargs):
+    # is_staff and is_superuser decide the scope; logins only save last_login
+    if update_fields is not None and not {'is_staff', 'is_superuser'} & set(update_fields):
+        return
+    clear_user_location_scopes(instance.pk)
+
+
+def _merge_by_product(moves):
+    """One move per product: a document listing a product on several lines moves the total quantity."""
+    merged = {}
+    for move in moves:
+        if move.product_id in merged:
+            merged[move.product_id].quantity += move.quantity
+        else:
+            merged[move.product_id] = move
+    return list(merged.values())
+
+
+def _emit_on_commit(build_moves):
+    # Built once the transaction commits, so items saved after the status change are included
+    transaction.on_commit(lambda: StockMove.emit(_merge_by_product(build_moves())))
+
 
 @receiver(post_save, sender=IncomingProduct)
 def create_incoming_product_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.incoming_product_id,
-            destination_location=instance.destination_location,
-            move_type='IN'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.incoming_product_id} and move type of IN already exists")
-            return  
-
-    """Create stock move when an incoming inventory record item is validated"""
-    if instance.status == "validated":
-        items = IncomingProductItem.objects.filter(incoming_product_id=instance.incoming_product_id)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when an incoming product becomes validated"""
+    if not instance.transitioned_to("validated"):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        items = IncomingProductItem.objects.filter(incoming_product=instance).select_related('product')
+        return [
+            StockMove(
                 product=item.product,
-                unit_of_measure=item.product.unit_of_measure,
+                unit_of_measure_id=item.product.unit_of_measure_id,
                 quantity=item.quantity_received,
                 move_type='IN',
-                source_document_id=item.incoming_product_id, 
-                source_location=instance.source_location,
-                destination_location=instance.destination_location,
-                date_created=timezone.now(),
-                date_moved=timezone.now(),
+                source_document_id=instance.incoming_product_id,
+                source_location_id=instance.source_location_id,
+                destination_location_id=instance.destination_location_id,
+                date_moved=now,
             )
-            stock_move.save()
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
 
 
 @receiver(post_save, sender=DeliveryOrder)
 def create_delivery_order_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.order_unique_id,
-            delivery_address=instance.delivery_address,
-            move_type='OUT'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.order_unique_id} and move type of OUT already exists")
-            return  
-
-    """Create stock move when a delivery order record item is done"""
-    if instance.status == "done":
-        items = DeliveryOrderItem.objects.filter(delivery_order_id=instance.id)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when a delivery order is done"""
+    if not instance.transitioned_to("done"):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        items = DeliveryOrderItem.objects.filter(delivery_order=instance).select_related('product_item')
+        return [
+            StockMove(
                 product=item.product_item,
-                unit_of_measure=item.product_item.unit_of_measure,
+                unit_of_measure_id=item.product_item.unit_of_measure_id,
                 quantity=item.quantity_to_deliver,
                 move_type='OUT',
-                source_document_id=instance.order_unique_id, 
-                source_location=instance.source_location,
+                source_document_id=instance.order_unique_id,
+                source_location_id=instance.source_location_id,
                 delivery_address=instance.delivery_address,
-                date_created=timezone.now(),
-                date_moved=timezone.now(),
+                date_moved=now,
             )
-            stock_move.save()
-
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
 
 
 """This is a different scenario of the signals. It had to be explicitly called in the serializers where it needed to be triggered"""
 def create_delivery_order_returns_stock_move(instance):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.unique_record_id,
-            destination_location=instance.return_warehouse_location,
-            move_type='RETURN'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.unique_record_id} and move type of RETURN already exists")
-            return  
-
-    """Create stock move when a delivery order returns record item is done"""
-    items = DeliveryOrderReturnItem.objects.filter(delivery_order_return_id=instance.id)
-    for item in items:
-        stock_move = StockMove(
+    """Create stock moves when a delivery order return is done"""
+    now = timezone.now()
+    items = DeliveryOrderReturnItem.objects.filter(delivery_order_return=instance).select_related(
+        'returned_product_item')
+    StockMove.emit(_merge_by_product([
+        StockMove(
             product=item.returned_product_item,
-            unit_of_measure=item.returned_product_item.unit_of_measure,
+            unit_of_measure_id=item.returned_product_item.unit_of_measure_id,
             quantity=item.returned_quantity,
             move_type='RETURN',
-            source_document_id=instance.unique_record_id, 
+            source_document_id=instance.unique_record_id,
             source_address=instance.source_location,  # Here, instance.source_location is a text field, so we mapped it to source_Address which is a text field too
-            destination_location=instance.return_warehouse_location,
-            date_created=timezone.now(),
-            date_moved=timezone.now(),
+            destination_location_id=instance.return_warehouse_location_id,
+            date_moved=now,
         )
-        stock_move.save()
-
+        for item in items
+    ]))
 
 
 @receiver(post_save, sender=ReturnIncomingProduct)
 def return_incoming_product_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.unique_id,
-            destination_location=instance.source_document.source_location,  #For the Return, the destination location of the return becomes the source location of the source document
-            move_type='RETURN'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.unique_id} and move type of RETURN already exists")
-            return  
-
-    """Create stock move when a return on incoming product record item is done"""
-    if instance.is_approved == True:
-        items = ReturnIncomingProductItem.objects.filter(return_incoming_product=instance)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when a return of incoming products is approved"""
+    if not instance.transitioned_to(True):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        source_document = instance.source_document
+        items = ReturnIncomingProductItem.objects.filter(return_incoming_product=instance).select_related('product')
+        return [
+            StockMove(
                 product=item.product,
-                unit_of_measure=item.product.unit_of_measure,
+                unit_of_measure_id=item.product.unit_of_measure_id,
                 quantity=item.quantity_to_be_returned,
                 move_type='RETURN',
-                source_document_id=instance.unique_id, 
-                source_location=instance.source_document.destination_location, #The inversion in SOURCE AND DESTINATION was because the source location for the Return has to be the destination location of the soirce document
-                destination_location=instance.source_document.source_location,
-                date_created=timezone.now(),
-                date_moved=timezone.now(),
+                source_document_id=instance.unique_id,
+                source_location_id=source_document.destination_location_id, #The inversion in SOURCE AND DESTINATION was because the source location for the Return has to be the destination location of the soirce document
+                destination_location_id=source_document.source_location_id,
+                date_moved=now,
             )
-            stock_move.save()
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
 
 
 @receiver(post_save, sender=Scrap)
 def scrap_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.id,
-            source_location=instance.warehouse_location,  #For the Return, the destination location of the return becomes the source location of the source document
-            move_type='SCRAP'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.id} and move type of SCRAP already exists")
-            return  
-
-    """Create stock move when a Scrap is done"""
-    if instance.status == "done":
-        items = ScrapItem.objects.filter(scrap=instance)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when a scrap is done"""
+    if not instance.transitioned_to("done"):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        items = ScrapItem.objects.filter(scrap=instance).select_related('product')
+        return [
+            StockMove(
                 product=item.product,
-                unit_of_measure=item.product.unit_of_measure,
+                unit_of_measure_id=item.product.unit_of_measure_id,
                 quantity=item.scrap_quantity,
                 move_type='SCRAP',
-                source_document_id=instance.id, 
-                source_location=instance.warehouse_location, 
-                date_moved=timezone.now(),
+                source_document_id=instance.id,
+                source_location_id=instance.warehouse_location_id,
+                date_moved=now,
             )
-            stock_move.save()
-
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
 
 
 @receiver(post_save, sender=StockAdjustment)
 def stock_adjustment_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.id,
-            source_location=instance.warehouse_location,  #For the Return, the destination location of the return becomes the source location of the source document
-            move_type='SCRAP'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.id} and move type of SCRAP already exists")
-            return  
-
-    """Create stock move when a Stock Adjustment is done"""
-    if instance.status == "done":
-        items = StockAdjustmentItem.objects.filter(stock_adjustment=instance)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when a stock adjustment is done"""
+    if not instance.transitioned_to("done"):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        items = StockAdjustmentItem.objects.filter(stock_adjustment=instance).select_related('product')
+        return [
+            StockMove(
                 product=item.product,
-                unit_of_measure=item.product.unit_of_measure,
+                unit_of_measure_id=item.product.unit_of_measure_id,
                 quantity=item.adjusted_quantity,
                 move_type='ADJUSTMENT',
-                source_document_id=instance.id, 
-                source_location=instance.warehouse_location, 
-                date_created=timezone.now(),
-                date_moved=timezone.now(),
+                source_document_id=instance.id,
+                source_location_id=instance.warehouse_location_id,
+                date_moved=now,
             )
-            stock_move.save()
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
 
 
 @receiver(post_save, sender=BackOrder)
 def back_order_stock_move(sender, instance, created, **kwargs):
-    """First make a check to know if this record does not exists so as to prevent unnecessary duplications"""
-    if StockMove.objects.filter(
-            source_document_id=instance.id,
-            source_location=instance.source_location,  #For the Return, the destination location of the return becomes the source location of the source document
-            move_type='BACKORDER'
-        ).exists():
-            print(f"The Stock Move of this source document {instance.id} and move type of BACKORDER already exists")
-            return  
-
-    """Create stock move when a Back Order is done"""
-    if instance.status == "done":
-        items = BackOrderItem.objects.filter(back_order=instance)
-        for item in items:
-            stock_move = StockMove(
+    """Create stock moves when a back order is done"""
+    if not instance.transitioned_to("done"):
+        return
+
+    def build_moves():
+        now = timezone.now()
+        items = BackOrderItem.objects.filter(backorder=instance).select_related('product')
+        return [
+            StockMove(
                 product=item.product,
-                unit_of_measure=item.product.unit_of_measure,
+                unit_of_measure_id=item.product.unit_of_measure_id,
                 quantity=item.expected_quantity - item.quantity_received,
                 move_type='BACKORDER',
-                source_document_id=instance.id, 
-                source_location=instance.destination_location, 
-                destination_location=instance.source_location, 
-                date_created=timezone.now(),
-                date_moved=timezone.now(),
+                source_document_id=instance.backorder_id,
+                source_location_id=instance.destination_location_id,
+                destination_location_id=instance.source_location_id,
+                date_moved=now,
             )
-            stock_move.save()
\ No newline at end of file
+            for item in items
+        ]
+    _emit_on_commit(build_moves)
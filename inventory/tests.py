@@ -1,3 +1,639 @@
-from django.test import TestCase
+import datetime
+import re
+import tempfile
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from companies.models import CompanyProfile
+from inventory.models import (ArchivedStockMove, DeliveryOrder, DeliveryOrderItem, InventoryPeriodBalance, Location,
+                              LocationStock, MultiLocation, StockBalanceSnapshot, StockMove, StockMoveKey, get_utc_day)
+from inventory.utilities import partitions
+from inventory.utilities.defaults import create_default_config
+from inventory.utilities.location_scopes import _get_user_version, get_location_scope
+from inventory.utilities.partitions import (add_months, ensure_partition_for, ensure_partitions,
+                                            get_default_partition_name, get_partition_name, month_start)
+from inventory.utilities.periods import close_period
+from inventory.views import DeliveryOrderViewSet
+from jobs.models import Job
+from purchase.models import Currency, Product, UnitOfMeasure
+from shared.cache import check_shared_cache_backend, get_model_version
+from shared.documents import RENDER_TASK, get_document_name, render_document, render_document_task
+from shared.tenant_config import clear_tenant_config, get_tenant_config
+from users.models import TenantUser
+
+
+class InventoryTestCase(TenantTestCase):
+    """Two products and two locations in the test tenant's schema."""
+
+    def setUp(self):
+        super().setUp()
+        # Partitions created by earlier tests were rolled back with them
+        partitions._existing_partitions.clear()
+        # So is the cached config of the MultiLocation rows they created
+        clear_tenant_config()
+        self.unit = UnitOfMeasure.objects.create(unit_name='Piece', unit_category='Unit')
+        self.product = Product.objects.create(product_name='Bolt', product_category='stockable',
+                                              unit_of_measure=self.unit)
+        self.other_product = Product.objects.create(product_name='Nut', product_category='stockable',
+                                                    unit_of_measure=self.unit)
+        self.source = Location.objects.create(id='LOC-A', id_number=1, location_code='LOCA',
+                                              location_name='Warehouse A')
+        self.destination = Location.objects.create(id='LOC-B', id_number=2, location_code='LOCB',
+                                                   location_name='Warehouse B')
+
+    def make_move(self, product=None, quantity=5, move_type='IN', document='IN-1', date_moved=None):
+        return StockMove(
+            product=product or self.product, unit_of_measure=self.unit, quantity=quantity, move_type=move_type,
+            source_document_id=document, source_location=self.source, destination_location=self.destination,
+            date_moved=date_moved or timezone.now(),
+        )
+
+    def make_delivery_order(self, quantity=3, status='ready'):
+        delivery_order = DeliveryOrder.objects.create(
+            order_unique_id='DO-0001', customer_name='Acme', source_location=self.source,
+            delivery_address='1 Main Street', delivery_date=datetime.date.today(), assigned_to='Driver',
+            status=status,
+        )
+        DeliveryOrderItem.objects.create(delivery_order=delivery_order, product_item=self.product,
+                                         quantity_to_deliver=quantity)
+        return delivery_order
+
+
+class StockMoveEmitTests(InventoryTestCase):
+
+    def test_emit_twice_records_each_move_once(self):
+        created = StockMove.emit([self.make_move(), self.make_move(product=self.other_product)])
+        self.assertEqual(len(created), 2)
+
+        again = StockMove.emit([self.make_move(), self.make_move(product=self.other_product)])
+
+        self.assertEqual(again, [])
+        self.assertEqual(StockMove.objects.count(), 2)
+        self.assertEqual(StockMoveKey.objects.count(), 2)
+
+    def test_emit_skips_only_the_moves_already_recorded(self):
+        StockMove.emit([self.make_move()])
+
+        created = StockMove.emit([self.make_move(), self.make_move(product=self.other_product)])
+
+        self.assertEqual([move.product_id for move in created], [self.other_product.pk])
+        self.assertEqual(StockMove.objects.count(), 2)
+
+    def test_emit_gives_consecutive_references_per_move_type(self):
+        StockMove.emit([self.make_move()])
+        StockMove.emit([self.make_move()])
+        StockMove.emit([self.make_move(product=self.other_product)])
+
+        self.assertEqual(
+            sorted(StockMove.objects.values_list('reference', flat=True)),
+            ['MOV/IN/000001', 'MOV/IN/000002'],
+        )
+
+    def test_saves_and_status_transitions_emit_one_move(self):
+        delivery_order = self.make_delivery_order()
+
+        for status in ('done', 'done', 'ready', 'done'):
+            delivery_order.status = status
+            with self.captureOnCommitCallbacks(execute=True):
+                delivery_order.save()
+
+        moves = StockMove.objects.filter(source_document_id=delivery_order.order_unique_id)
+        self.assertEqual(moves.count(), 1)
+        self.assertEqual(moves.get().move_type, 'OUT')
+        self.assertEqual(moves.get().quantity, 3)
+
+    def test_save_of_a_duplicate_move_raises_validation_error(self):
+        self.make_move().save()
+
+        with self.assertRaises(ValidationError):
+            self.make_move(quantity=7).save()
+        self.assertEqual(StockMove.objects.count(), 1)
+
+
+class StockMovePartitionTests(InventoryTestCase):
+    table = StockMove._meta.db_table
+
+    def fetch_one(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def get_relkind(self, name):
+        row = self.fetch_one("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [name])
+        return row[0] if row else None
+
+    def get_partition_of(self, move):
+        return self.fetch_one(f"SELECT tableoid::regclass::text FROM {self.table} WHERE id = %s", [move.pk])[0]
+
+    def test_migration_partitions_the_ledger(self):
+        self.assertEqual(self.get_relkind(self.table), 'p')
+        self.assertEqual(self.get_relkind(get_default_partition_name(self.table)), 'r')
+        self.assertEqual(self.get_relkind(get_partition_name(self.table, month_start(timezone.now()))), 'r')
+
+    def test_migration_creates_keys_and_indexes(self):
+        primary_key = self.fetch_one(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [self.table],
+        )[0]
+        self.assertEqual(primary_key, 'PRIMARY KEY (id, date_moved)')
+        foreign_keys = self.fetch_one(
+            "SELECT COUNT(*) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [self.table]
+        )[0]
+        self.assertEqual(foreign_keys, 5)
+        for index in ('stock_move_date_moved_brin', 'inventory_s_move_ty_0fa310_idx', 'stock_move_reference_idx'):
+            self.assertEqual(self.get_relkind(index), 'I')
+
+    def test_ensure_partition_for_creates_the_partition_of_a_new_month(self):
+        moment = timezone.now() + datetime.timedelta(days=365 * 5)
+        name = get_partition_name(self.table, month_start(moment))
+        self.assertIsNone(self.get_relkind(name))
+
+        ensure_partition_for(self.table, moment)
+
+        self.assertEqual(self.get_relkind(name), 'r')
+        move = self.make_move(date_moved=moment)
+        move.save()
+        self.assertEqual(self.get_partition_of(move), name)
+
+    def test_new_partition_takes_its_rows_from_the_default_partition(self):
+        month = add_months(month_start(timezone.now()), 72)
+        # bulk_create skips ensure_partition_for, so the row lands in the default partition
+        move, = StockMove.objects.bulk_create([self.make_move(date_moved=month, document='IN-LATE')])
+        self.assertEqual(self.get_partition_of(move), get_default_partition_name(self.table))
+
+        created = ensure_partitions(self.table, 0, start=month)
+
+        self.assertIn(get_partition_name(self.table, month), created)
+        self.assertEqual(self.get_partition_of(move), get_partition_name(self.table, month))
+
+    def test_save_of_a_move_with_a_taken_reference_raises_validation_error(self):
+        move = self.make_move()
+        move.save()
+
+        duplicate = self.make_move(product=self.other_product, document='IN-2')
+        duplicate.reference = move.reference
+        with self.assertRaises(ValidationError):
+            duplicate.save()
+        self.assertEqual(StockMove.objects.count(), 1)
+
+
+class StockBalanceSnapshotTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.today = get_utc_day(timezone.now())
+        self.make_move(quantity=5, document='IN-1', date_moved=self.days_ago(2)).save()
+        self.make_move(quantity=3, document='IN-2').save()
+
+    def days_ago(self, days):
+        day = self.today - datetime.timedelta(days=days)
+        return datetime.datetime.combine(day, datetime.time(12), tzinfo=datetime.timezone.utc)
+
+    def get_balance(self, days, location=None):
+        day = self.today - datetime.timedelta(days=days)
+        balances = StockBalanceSnapshot.get_balances(day, product_ids=[self.product.pk])
+        return balances.get(((location or self.destination).pk, self.product.pk), 0)
+
+    def test_balances_without_snapshots_come_from_the_ledger(self):
+        self.assertFalse(StockBalanceSnapshot.objects.exists())
+
+        self.assertEqual(self.get_balance(0), 8)
+        self.assertEqual(self.get_balance(0, location=self.source), -8)
+        self.assertEqual(self.get_balance(1), 5)
+        self.assertEqual(self.get_balance(3), 0)
+
+    def test_balances_with_snapshots_add_the_moves_since_the_last_snapshot_day(self):
+        self.assertEqual(StockBalanceSnapshot.take_snapshots(), 2)
+        self.assertEqual(StockBalanceSnapshot.get_last_day(), self.today - datetime.timedelta(days=2))
+
+        self.assertEqual(self.get_balance(0), 8)
+        self.assertEqual(self.get_balance(1), 5)
+        self.assertEqual(self.get_balance(3), 0)
+
+    def test_balances_up_to_the_last_snapshot_day_do_not_need_the_ledger(self):
+        StockBalanceSnapshot.take_snapshots()
+        # As after a period close archived them
+        StockMove.objects.filter(date_moved__lt=self.days_ago(1)).delete()
+
+        self.assertEqual(self.get_balance(2), 5)
+        self.assertEqual(self.get_balance(0), 8)
+
+    def test_backdated_move_updates_the_snapshots_it_falls_into(self):
+        StockBalanceSnapshot.take_snapshots()
+
+        self.make_move(quantity=2, document='IN-3', date_moved=self.days_ago(3)).save()
+
+        self.assertEqual(self.get_balance(3), 2)
+        self.assertEqual(self.get_balance(2), 7)
+        self.assertEqual(self.get_balance(0), 10)
+        self.assertEqual(
+            StockBalanceSnapshot.objects.get(location=self.destination, product=self.product,
+                                             day=self.today - datetime.timedelta(days=2)).quantity,
+            7,
+        )
+
+
+class ClosePeriodTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # A day of last month, which is over and can be closed
+        self.last_month = month_start(timezone.now()) - datetime.timedelta(days=10)
+        self.make_move(quantity=5, document='IN-1', date_moved=self.last_month).save()
+        self.make_move(quantity=3, document='IN-2').save()
+
+    def test_close_period_archives_the_moves_of_the_period(self):
+        period = close_period(self.last_month.date())
+
+        self.assertEqual(period.archived_moves, 1)
+        self.assertEqual(list(StockMove.objects.values_list('source_document_id', flat=True)), ['IN-2'])
+        self.assertEqual(list(ArchivedStockMove.objects.values_list('source_document_id', flat=True)), ['IN-1'])
+        balance = InventoryPeriodBalance.objects.get(period=period, location=self.destination, product=self.product)
+        self.assertEqual((balance.opening_quantity, balance.closing_quantity), (0, 5))
+
+    def test_closed_period_refuses_backdated_moves(self):
+        close_period(self.last_month.date())
+
+        with self.assertRaises(ValidationError):
+            self.make_move(document='IN-3', date_moved=self.last_month).save()
+        with self.assertRaises(ValidationError):
+            StockMove.emit([self.make_move(document='IN-4', date_moved=self.last_month)])
+        self.assertFalse(StockMove.objects.filter(source_document_id__in=['IN-3', 'IN-4']).exists())
+
+    def test_closed_period_still_allows_moves_dated_today(self):
+        close_period(self.last_month.date())
+
+        created = StockMove.emit([self.make_move(document='IN-3')])
+
+        # References of archived moves stay taken
+        self.assertEqual([move.reference for move in created], ['MOV/IN/000003'])
+
+    def test_close_period_refuses_the_current_month_and_closed_months(self):
+        with self.assertRaises(ValidationError):
+            close_period(timezone.now().date())
+
+        close_period(self.last_month.date())
+        with self.assertRaises(ValidationError):
+            close_period(self.last_month.date())
+
+
+class DeliveryStockTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        LocationStock.objects.create(location=self.source, product=self.product, quantity=10)
+        LocationStock.objects.create(location=self.source, product=self.other_product, quantity=1)
+        self.delivery_order = self.make_delivery_order(quantity=3)
+        self.other_item = DeliveryOrderItem.objects.create(delivery_order=self.delivery_order,
+                                                           product_item=self.other_product, quantity_to_deliver=2)
+
+    def get_stock(self, product):
+        return LocationStock.objects.get(location=self.source, product=product).quantity
+
+    def confirm_delivery(self):
+        user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        request = APIRequestFactory().get(f'/inventory/delivery-order/confirm-delivery/{self.delivery_order.pk}/')
+        force_authenticate(request, user=user)
+        view = DeliveryOrderViewSet.as_view({'get': 'confirm_delivery'})
+        return view(request, pk=self.delivery_order.pk)
+
+    def test_deduct_stock_deducts_nothing_when_one_product_is_short(self):
+        version = get_model_version(LocationStock)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shortfalls = self.delivery_order.deduct_stock()
+
+        self.assertEqual(shortfalls, {self.other_product.pk: (2, Decimal(1), [self.other_item.pk])})
+        self.assertEqual(self.get_stock(self.product), 10)
+        self.assertEqual(self.get_stock(self.other_product), 1)
+        self.assertEqual(get_model_version(LocationStock), version)
+
+    def test_deduct_stock_deducts_every_product_when_all_are_covered(self):
+        LocationStock.objects.filter(product=self.other_product).update(quantity=2)
+        # Lines of the same product are deducted together
+        DeliveryOrderItem.objects.create(delivery_order=self.delivery_order, product_item=self.product,
+                                         quantity_to_deliver=4)
+        version = get_model_version(LocationStock)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.delivery_order.deduct_stock(), {})
+
+        # Product ETags read the stock quantities
+        self.assertNotEqual(get_model_version(LocationStock), version)
+        self.assertEqual(self.get_stock(self.product), 3)
+        self.assertEqual(self.get_stock(self.other_product), 0)
+
+    def test_confirm_delivery_with_a_shortfall_returns_409(self):
+        response = self.confirm_delivery()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([shortfall['product'] for shortfall in response.data['shortfalls']],
+                         [self.other_product.pk])
+        self.delivery_order.refresh_from_db()
+        self.assertEqual(self.delivery_order.status, 'ready')
+        self.assertEqual(self.get_stock(self.product), 10)
+
+    def test_confirm_delivery_deducts_the_stock_and_completes_the_order(self):
+        LocationStock.objects.filter(product=self.other_product).update(quantity=5)
+
+        response = self.confirm_delivery()
+
+        self.assertEqual(response.status_code, 200)
+        self.delivery_order.refresh_from_db()
+        self.assertEqual(self.delivery_order.status, 'done')
+        self.assertEqual(self.get_stock(self.product), 7)
+        self.assertEqual(self.get_stock(self.other_product), 3)
+
+
+class CacheInvalidationTests(InventoryTestCase):
+
+    def test_saving_a_registered_model_bumps_its_version(self):
+        version = get_model_version(Location)
+
+        self.source.location_name = 'Main Warehouse'
+        self.source.save()
+
+        self.assertNotEqual(get_model_version(Location), version)
+
+    def test_unregistered_model_has_no_version(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_model_version(StockMove)
+
+    def test_per_process_cache_backend_fails_the_check_outside_debug(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                             'LOCATION': 'redis://localhost:6379/1'}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache_backend(None)], ['shared.E001'])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache_backend(None), [])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache_backend(None), [])
+
+    def test_saving_a_child_item_touches_the_parent_stamp(self):
+        delivery_order = self.make_delivery_order()
+        stamp = DeliveryOrder.objects.get(pk=delivery_order.pk).date_updated
+
+        item = delivery_order.delivery_order_items.get()
+        item.quantity_to_deliver = 4
+        item.save()
+
+        self.assertGreater(DeliveryOrder.objects.get(pk=delivery_order.pk).date_updated, stamp)
+
+    def test_saving_the_public_user_invalidates_their_location_scope(self):
+        user = User.objects.create_user('keeper', password='secret')
+        tenant_user = TenantUser.objects.create(user_id=user.pk, tenant=self.tenant)
+        self.assertFalse(get_location_scope(tenant_user).unrestricted)
+
+        user.is_staff = user.is_superuser = True
+        user.save()
+
+        self.assertTrue(get_location_scope(tenant_user).unrestricted)
+
+    def test_login_does_not_invalidate_the_location_scope(self):
+        user = User.objects.create_user('keeper', password='secret')
+        version = _get_user_version(user.pk)
+
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+
+        self.assertEqual(_get_user_version(user.pk), version)
+
+
+class DefaultConfigTests(InventoryTestCase):
+
+    def test_create_default_config_inserts_only_the_missing_rows(self):
+        Currency.objects.create(currency_name='Euro', currency_code='EUR', currency_symbol='€')
+
+        created = create_default_config()
+
+        self.assertEqual(created, {'multi_location': 1, 'location': 2, 'unit_of_measure': 2, 'currency': 2})
+        self.assertEqual(create_default_config(),
+                         {'multi_location': 0, 'location': 0, 'unit_of_measure': 0, 'currency': 0})
+        self.assertEqual(Currency.objects.filter(currency_code='EUR').count(), 1)
+        self.assertTrue(Location.objects.filter(id='SUPP00001', location_code='SUPP').exists())
+
+    def test_create_default_config_bumps_the_versions_of_the_seeded_models(self):
+        versions = {model: get_model_version(model) for model in (MultiLocation, Location, UnitOfMeasure, Currency)}
+
+        create_default_config()
+
+        for model, version in versions.items():
+            self.assertNotEqual(get_model_version(model), version, model)
+
+    def test_delete_locations_skips_a_schema_without_multi_location(self):
+        command = import_module('inventory.management.commands.delete-locations-all').Command()
+
+        self.assertEqual(command.handle_schema(self.tenant.schema_name), {'skipped_no_multi_location': 1})
+        self.assertEqual(Location.objects.count(), 2)
+
+        MultiLocation.objects.create(is_activated=True)
+        self.assertEqual(command.handle_schema(self.tenant.schema_name), {'location': 2, 'total_deleted': 2})
+        self.assertFalse(Location.objects.exists())
+
+
+class TenantConfigTests(InventoryTestCase):
+
+    def test_config_is_loaded_once(self):
+        self.assertFalse(get_tenant_config().has_multi_location)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(get_tenant_config().has_multi_location)
+
+    def test_saving_multi_location_clears_the_config(self):
+        get_tenant_config()
+
+        MultiLocation.objects.create(is_activated=False)
+
+        config = get_tenant_config()
+        self.assertTrue(config.has_multi_location)
+        self.assertTrue(config.single_location)
+
+    def test_saving_the_company_profile_clears_the_config(self):
+        get_tenant_config()
+
+        CompanyProfile.objects.create(tenant=self.tenant, currency='USD', language='fr')
+
+        self.assertEqual(get_tenant_config().company['currency'], 'USD')
+        self.assertEqual(get_tenant_config().company['language'], 'fr')
+
+
+class FragmentCacheTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        delivery_order = self.make_delivery_order()
+        # Finished without the stock moves of a real delivery
+        DeliveryOrder.objects.filter(pk=delivery_order.pk).update(status='done')
+        # Loaded again, so later saves are not taken for the transition to done
+        self.delivery_order = DeliveryOrder.objects.get(pk=delivery_order.pk)
+
+    def retrieve(self):
+        request = APIRequestFactory().get(f'/inventory/delivery-orders/{self.delivery_order.pk}/')
+        force_authenticate(request, user=self.user)
+        response = DeliveryOrderViewSet.as_view({'get': 'retrieve'})(request, pk=self.delivery_order.pk)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def rename_customer(self, customer_name):
+        # update() leaves date_updated as it was, so only a cache miss shows the new name
+        DeliveryOrder.objects.filter(pk=self.delivery_order.pk).update(customer_name=customer_name)
+
+    def test_finished_document_is_served_from_the_cache(self):
+        self.assertEqual(self.retrieve()['customer_name'], 'Acme')
+
+        self.rename_customer('Globex')
+
+        self.assertEqual(self.retrieve()['customer_name'], 'Acme')
+
+    def test_document_in_progress_is_not_cached(self):
+        DeliveryOrder.objects.filter(pk=self.delivery_order.pk).update(status='ready')
+        self.retrieve()
+
+        self.rename_customer('Globex')
+
+        self.assertEqual(self.retrieve()['customer_name'], 'Globex')
+
+    def test_saving_a_child_item_invalidates_the_fragment(self):
+        self.retrieve()
+        self.rename_customer('Globex')
+
+        item = self.delivery_order.delivery_order_items.get()
+        item.quantity_to_deliver = 4
+        item.save()
+
+        self.assertEqual(self.retrieve()['customer_name'], 'Globex')
+
+    def test_saving_the_document_invalidates_the_fragment(self):
+        self.retrieve()
+
+        self.delivery_order.customer_name = 'Globex'
+        self.delivery_order.save()
+
+        self.assertEqual(self.retrieve()['customer_name'], 'Globex')
+
+    def test_saving_a_model_the_fragment_reads_invalidates_it(self):
+        self.retrieve()
+        self.rename_customer('Globex')
+
+        self.source.location_name = 'Main Warehouse'
+        self.source.save()
+
+        self.assertEqual(self.retrieve()['customer_name'], 'Globex')
+
+
+class DocumentPDFTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        self.delivery_order = self.make_delivery_order()
+
+    def get_pdf(self):
+        request = APIRequestFactory().get(f'/inventory/delivery-orders/{self.delivery_order.pk}/pdf/')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        return DeliveryOrderViewSet.as_view({'get': 'pdf'})(request, pk=self.delivery_order.pk)
+
+    def test_render_document_writes_the_pdf_once_per_version(self):
+        name = render_document(self.delivery_order)
+
+        with default_storage.open(name) as document:
+            self.assertTrue(document.read().startswith(b'%PDF'))
+        with mock.patch('shared.documents.DocumentWriter') as writer:
+            self.assertEqual(render_document(self.delivery_order), name)
+        writer.assert_not_called()
+
+    def test_saving_an_item_renders_a_new_version_and_drops_the_old_one(self):
+        name = render_document(self.delivery_order)
+
+        item = self.delivery_order.delivery_order_items.get()
+        item.quantity_to_deliver = 4
+        item.save()
+        self.delivery_order.refresh_from_db()
+        new_name = render_document(self.delivery_order)
+
+        self.assertNotEqual(new_name, name)
+        self.assertTrue(default_storage.exists(new_name))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_pdf_is_queued_once_then_served_from_disk(self):
+        response = self.get_pdf()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.get_pdf().data['job_id'], response.data['job_id'])
+
+        job = Job.objects.get(pk=response.data['job_id'])
+        self.assertEqual((job.task, job.kwargs), (RENDER_TASK, {'label': 'inventory.deliveryorder',
+                                                                'pk': str(self.delivery_order.pk)}))
+        result = render_document_task(**job.kwargs)
+        self.assertEqual(result['name'], get_document_name(self.delivery_order))
+
+        response = self.get_pdf()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+
+class BulkPrintTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        self.delivery_orders = [self.make_delivery_order()]
+        for number in (2, 3):
+            delivery_order = DeliveryOrder.objects.create(
+                order_unique_id=f'DO-000{number}', customer_name='Acme', source_location=self.source,
+                delivery_address='1 Main Street', delivery_date=datetime.date.today(), assigned_to='Driver',
+                status='ready',
+            )
+            DeliveryOrderItem.objects.create(delivery_order=delivery_order, product_item=self.other_product,
+                                             quantity_to_deliver=number)
+            self.delivery_orders.append(delivery_order)
+
+    def bulk_print(self, ids):
+        request = APIRequestFactory().get('/inventory/delivery-orders/bulk-print/',
+                                          {'ids': ','.join(str(pk) for pk in ids)})
+        force_authenticate(request, user=self.user)
+        return DeliveryOrderViewSet.as_view({'get': 'bulk_print'})(request)
+
+    def test_documents_are_printed_as_one_pdf(self):
+        response = self.bulk_print([delivery_order.pk for delivery_order in self.delivery_orders])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(len(re.findall(rb'/Type /Page\b(?!s)', content)), 3)
+
+    def test_queries_do_not_grow_with_the_number_of_documents(self):
+        # Fills the per-process caches the first request reads
+        self.bulk_print([self.delivery_orders[0].pk])
+        with CaptureQueriesContext(connection) as one:
+            self.bulk_print([self.delivery_orders[0].pk])
+        with CaptureQueriesContext(connection) as three:
+            self.bulk_print([delivery_order.pk for delivery_order in self.delivery_orders])
+
+        self.assertEqual(len(three), len(one))
+
+    def test_unknown_ids_return_404(self):
+        self.assertEqual(self.bulk_print([0]).status_code, 404)
+
+    def test_too_many_documents_return_400(self):
+        with override_settings(BULK_PRINT_MAX_DOCUMENTS=2):
+            response = self.bulk_print([delivery_order.pk for delivery_order in self.delivery_orders])
+
+        self.assertEqual(response.status_code, 400)
@@ -19,7 +19,8 @@ from rest_framework import routers
 
 from .views import (DeliveryOrderReturnViewSet, DeliveryOrderViewSet, LocationViewSet, MultiLocationViewSet,
                     ReturnIncomingProductViewSet, StockAdjustmentViewSet, ScrapViewSet, StockMoveViewSet,
-                    IncomingProductViewSet, BackOrderViewSet, ConfirmCreateBackOrderViewSet, InternalTransferViewSet)
+                    IncomingProductViewSet, BackOrderViewSet, ConfirmCreateBackOrderViewSet, InternalTransferViewSet,
+                    ArchivedStockMoveViewSet, InventoryPeriodViewSet)
 
 router = routers.DefaultRouter()
 
@@ -40,6 +41,8 @@ router.register(r'incoming-product', IncomingProductViewSet, basename='incoming-
 router.register(r'return-incoming-product', ReturnIncomingProductViewSet, basename='return-incoming-product')
 
 router.register(r'stock-move', StockMoveViewSet, basename='stock-move')
+router.register(r'stock-move-archive', ArchivedStockMoveViewSet, basename='stock-move-archive')
+router.register(r'inventory-period', InventoryPeriodViewSet, basename='inventory-period')
 # router.register(r'incoming-product/incoming-product-item', IncomingProductItemViewSet,
 # basename='incoming-product-item')
 
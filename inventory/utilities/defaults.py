@@ -0,0 +1,69 @@
+from inventory.models import Location, MultiLocation
+from purchase.models import Currency, UnitOfMeasure
+from shared.cache import bump_model_version
+from shared.tenant_config import clear_tenant_config
+
+
+DEFAULT_LOCATIONS = (
+    {"location_code": "SUPP", "location_name": "Supplier Location"},
+    {"location_code": "CUST", "location_name": "Customer Location"},
+)
+
+DEFAULT_UNITS_OF_MEASURE = (
+    {"unit_name": "Kilogram", "unit_symbol": "kg", "unit_category": "Weight"},
+    {"unit_name": "Meter", "unit_symbol": "m", "unit_category": "Length"},
+)
+
+DEFAULT_CURRENCIES = (
+    {"currency_name": "US Dollar", "currency_code": "USD", "currency_symbol": "$"},
+    {"currency_name": "Euro", "currency_code": "EUR", "currency_symbol": "€"},
+    {"currency_name": "Naira", "currency_code": "NGN", "currency_symbol": "₦"},
+)
+
+
+def create_default_config():
+    """
+    Seed the current schema with the MultiLocation option, the partner locations,
+    and the default units of measure and currencies.
+    Safe to run repeatedly: rows that already exist are left untouched.
+    Returns the number of rows inserted per model.
+    """
+    created = {}
+
+    if MultiLocation.objects.exists():
+        created['multi_location'] = 0
+    else:
+        MultiLocation.objects.bulk_create([MultiLocation(is_activated=False)])
+        created['multi_location'] = 1
+        # bulk_create skips MultiLocation.save and its signals, which clear the cached config and
+        # bump the model version
+        clear_tenant_config()
+        bump_model_version(MultiLocation)
+
+    # bulk_create skips Location.save, so the ids it would generate are set here
+    locations = [
+        Location(id=f"{location['location_code']}00001", id_number=1, location_type="partner",
+                 address="NullAddress", contact_information="", **location)
+        for location in DEFAULT_LOCATIONS
+    ]
+    created['location'] = _insert_missing(Location, locations, 'location_code')
+    created['unit_of_measure'] = _insert_missing(
+        UnitOfMeasure, [UnitOfMeasure(**unit) for unit in DEFAULT_UNITS_OF_MEASURE], 'unit_name'
+    )
+    created['currency'] = _insert_missing(
+        Currency, [Currency(**currency) for currency in DEFAULT_CURRENCIES], 'currency_code'
+    )
+    return created
+
+
+def _insert_missing(model, objs, key):
+    existing = set(model.objects.filter(
+        **{f"{key}__in": [getattr(obj, key) for obj in objs]}
+    ).values_list(key, flat=True))
+    missing = [obj for obj in objs if getattr(obj, key) not in existing]
+    if missing:
+        # ignore_conflicts covers rows inserted concurrently or clashing on another unique column
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        # Sends no post_save: cached lists and ETags read the model version
+        bump_model_version(model)
+    return len(missing)
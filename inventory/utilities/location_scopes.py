@@ -0,0 +1,107 @@
+import time
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+from shared.cache import cache, get_global_cache, get_or_compute
+
+LOCATION_SCOPE_CACHE_TIMEOUT = 300
+LOCATION_SCOPE_VERSION_KEY = 'location-scope-version'
+# In the global cache: a public User is saved outside of the schemas of its tenant users
+LOCATION_SCOPE_USER_VERSION_KEY = 'location-scope-user-version:{}'
+
+
+@dataclass(frozen=True)
+class LocationScope:
+    """
+    The locations a tenant user may work with, precomputed from their role and the
+    locations they manage or keep the store of.
+    """
+    unrestricted: bool = False
+    visible_only: bool = False
+    managed_ids: frozenset = frozenset()
+    stored_ids: frozenset = frozenset()
+
+    @property
+    def location_ids(self):
+        return self.managed_ids | self.stored_ids
+
+
+def _get_scope_version():
+    return cache.get_or_set(LOCATION_SCOPE_VERSION_KEY, 1, None)
+
+
+def _get_user_version(user_id):
+    return get_global_cache().get_or_set(LOCATION_SCOPE_USER_VERSION_KEY.format(user_id), 1, None)
+
+
+def _get_scope_key(tenant_user):
+    return f'location-scope:{_get_scope_version()}:{tenant_user.pk}:{_get_user_version(tenant_user.user_id)}'
+
+
+def load_location_scope(tenant_user):
+    from inventory.models import Location
+
+    user = tenant_user.user
+    if user.is_superuser:
+        return LocationScope(unrestricted=True)
+    if user.is_staff:
+        return LocationScope(visible_only=True)
+    managed_ids = set()
+    stored_ids = set()
+    rows = Location.objects.filter(
+        Q(location_manager=tenant_user) | Q(store_keeper=tenant_user)
+    ).values_list('id', 'location_manager_id', 'store_keeper_id')
+    for location_id, manager_id, store_keeper_id in rows:
+        if manager_id == tenant_user.pk:
+            managed_ids.add(location_id)
+        if store_keeper_id == tenant_user.pk:
+            stored_ids.add(location_id)
+    return LocationScope(managed_ids=frozenset(managed_ids), stored_ids=frozenset(stored_ids))
+
+
+def get_location_scope(tenant_user):
+    """Return the cached LocationScope of `tenant_user`, computing it on the first call."""
+    return get_or_compute(
+        _get_scope_key(tenant_user), lambda: load_location_scope(tenant_user), LOCATION_SCOPE_CACHE_TIMEOUT
+    )
+
+
+def clear_location_scope(tenant_user):
+    cache.delete(_get_scope_key(tenant_user))
+
+
+def clear_user_location_scopes(user_id):
+    """Invalidate the scopes of the tenant users of public user `user_id`, in every schema."""
+    key = LOCATION_SCOPE_USER_VERSION_KEY.format(user_id)
+    try:
+        get_global_cache().incr(key)
+    except ValueError:
+        # Not cached yet or evicted; scopes cached against the old value are unreachable after this
+        get_global_cache().set(key, int(time.time()), None)
+
+
+def clear_location_scopes():
+    """Invalidate the scopes of every user in the current schema."""
+    try:
+        cache.incr(LOCATION_SCOPE_VERSION_KEY)
+    except ValueError:
+        cache.set(LOCATION_SCOPE_VERSION_KEY, 2, None)
+
+
+def filter_by_location_scope(queryset, tenant_user, field='location_id', kind='all'):
+    """
+    Restrict `queryset` to the rows whose `field` is a location in the user's scope,
+    as a plain `field IN (...)` filter.
+    `kind` is 'all' (managed or store keeper), 'managed' or 'stored'.
+    """
+    scope = get_location_scope(tenant_user)
+    if scope.unrestricted:
+        return queryset
+    if scope.visible_only:
+        if field in ('id', 'pk'):
+            return queryset.filter(is_hidden=False)
+        location_field = field[:-3] if field.endswith('_id') else field
+        return queryset.filter(**{f'{location_field}__is_hidden': False})
+    ids = {'all': scope.location_ids, 'managed': scope.managed_ids, 'stored': scope.stored_ids}[kind]
+    return queryset.filter(**{f'{field}__in': list(ids)})
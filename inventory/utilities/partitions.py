@@ -0,0 +1,263 @@
+"""
+Monthly range partitioning of the stock move ledger.
+
+The ledger table is partitioned on `date_moved`: one partition per calendar month (UTC) named
+`<table>_pYYYYMM`, and a default partition catching rows of months that have no partition yet.
+Queries bounded on `date_moved` only scan the partitions of the months they cover.
+"""
+import datetime
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+PARTITION_COLUMN = 'date_moved'
+
+# (schema, table, month) whose partition is known to exist in this process
+_existing_partitions = set()
+
+
+def month_start(value):
+    """First instant (UTC) of the month of `value`."""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def get_partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def get_default_partition_name(table):
+    return f'{table}_default'
+
+
+def _get_relkind(cursor, name):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [name])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _get_bounds_sql(month):
+    # Bounds are built from datetimes computed here, never from user input
+    return f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def create_partition(cursor, table, month):
+    """
+    Create the partition of `table` for `month` unless it exists. Rows of that month sitting in the
+    default partition are moved into it. Returns True when the partition was created.
+    """
+    qn = connection.ops.quote_name
+    name = get_partition_name(table, month)
+    default = get_default_partition_name(table)
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"{connection.schema_name}:{table}:partitions"])
+    if _get_relkind(cursor, name) is not None:
+        return False
+
+    bounds = [month, add_months(month, 1)]
+    column = qn(PARTITION_COLUMN)
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE {column} >= %s AND {column} < %s)", bounds)
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES {_get_bounds_sql(month)}")
+        return True
+
+    # A new partition cannot overlap rows of the default partition, so they are moved out first
+    cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {qn(default)} WHERE {column} >= %s AND {column} < %s RETURNING *) "
+        f"INSERT INTO {qn(name)} SELECT * FROM moved",
+        bounds,
+    )
+    cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES {_get_bounds_sql(month)}")
+    return True
+
+
+def ensure_partitions(table, months_ahead, start=None):
+    """
+    Create the partitions of `table` from the month of `start` (default: now) to `months_ahead` months
+    later, and of every month that has rows in the default partition. Returns the names created.
+    """
+    qn = connection.ops.quote_name
+    first = month_start(start or timezone.now())
+    months = {add_months(first, offset) for offset in range(months_ahead + 1)}
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {qn(PARTITION_COLUMN)} AT TIME ZONE 'UTC') "
+            f"FROM {qn(get_default_partition_name(table))}"
+        )
+        months.update(month_start(row[0]) for row in cursor.fetchall())
+        for month in sorted(months):
+            if create_partition(cursor, table, month):
+                created.append(get_partition_name(table, month))
+    return created
+
+
+def ensure_partition_for(table, value):
+    """
+    Make sure the partition receiving rows dated `value` exists. Checked once per process and month,
+    so writes normally cost nothing; the nightly command creates partitions ahead of time anyway.
+    """
+    month = month_start(value)
+    key = (connection.schema_name, table, month)
+    if key in _existing_partitions:
+        return
+    with connection.cursor() as cursor:
+        if _get_relkind(cursor, get_partition_name(table, month)) is not None:
+            _existing_partitions.add(key)
+            return
+        with transaction.atomic():
+            create_partition(cursor, table, month)
+    # Remembered only once the partition is committed
+    transaction.on_commit(lambda: _existing_partitions.add(key))
+
+
+def partition_table(schema_editor, model, months_ahead):
+    """
+    Convert the table of `model` into a table partitioned by month of `date_moved`, in place. Rows and
+    the id sequence are carried over. The primary key becomes (id, date_moved): unique constraints of a
+    partitioned table must include the partition key. Foreign keys and indexes are not carried over;
+    the caller creates them on the new table (migration 0013 spells them out). Does nothing when the
+    table is already partitioned. Returns True when converted.
+
+    Also repairs schemas copied by clone_schema, which copies a partitioned table as a plain table and
+    its partitions as unrelated tables (see `copy_foreign_keys_and_indexes`).
+    """
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    default = get_default_partition_name(table)
+    old_table = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+    pk_column = model._meta.pk.column
+    column = qn(PARTITION_COLUMN)
+
+    with schema_editor.connection.cursor() as cursor:
+        if _get_relkind(cursor, table) == 'p':
+            return False
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+
+        # Copies of partitions made by clone_schema; their rows are already in the copied parent table
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relnamespace = current_schema()::regnamespace "
+            "AND relkind = 'r' AND NOT relispartition AND (relname = %s OR relname ~ %s)",
+            [default, f'^{table}_p[0-9]{{6}}$'],
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"DROP TABLE {qn(name)}")
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+        # Identity columns are not supported on partitioned tables before PostgreSQL 17
+        cursor.execute(f"ALTER TABLE {qn(old_table)} ALTER COLUMN {qn(pk_column)} DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {qn(old_table)} ALTER COLUMN {qn(pk_column)} DROP DEFAULT")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {qn(sequence)}")
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} AS bigint")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({column})"
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk_column)} SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f"ALTER SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn(pk_column)}")
+        cursor.execute(f"CREATE TABLE {qn(default)} PARTITION OF {qn(table)} DEFAULT")
+
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', {column} AT TIME ZONE 'UTC') FROM {qn(old_table)}")
+        months = {month_start(row[0]) for row in cursor.fetchall() if row[0] is not None}
+        first = month_start(timezone.now())
+        months.update(add_months(first, offset) for offset in range(months_ahead + 1))
+        for month in sorted(months):
+            create_partition(cursor, table, month)
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+        cursor.execute(f"SELECT setval('{sequence}', COALESCE(MAX({qn(pk_column)}), 0) + 1, false) FROM {qn(table)}")
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_pkey')} PRIMARY KEY ({qn(pk_column)}, {column})"
+        )
+    return True
+
+
+def copy_foreign_keys_and_indexes(cursor, source_schema, table):
+    """
+    Create on `table` of the current schema the foreign keys and indexes (other than the primary key)
+    that `table` has in `source_schema`, under the same names. Used on a schema cloned from the tenant
+    template once `partition_table` has rebuilt its ledger. Returns the number created.
+    """
+    qn = connection.ops.quote_name
+    source = f'{qn(source_schema)}.{qn(table)}'
+    # References to the source schema's tables become references to the current schema's
+    source_prefix = re.compile(rf'REFERENCES (?:{re.escape(qn(source_schema))}|{re.escape(source_schema)})\.')
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f' AND conparentid = 0 ORDER BY conname",
+        [source],
+    )
+    statements = [
+        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {source_prefix.sub('REFERENCES ', definition)}"
+        for name, definition in cursor.fetchall()
+    ]
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary "
+        "ORDER BY indexrelid",
+        [source],
+    )
+    # pg_get_indexdef qualifies the table and marks indexes of a partitioned table ON ONLY
+    statements += [
+        re.sub(r' ON (?:ONLY )?\S+ USING ', f' ON {qn(table)} USING ', definition, count=1)
+        for (definition,) in cursor.fetchall()
+    ]
+    for statement in statements:
+        cursor.execute(statement)
+    return len(statements)
+
+
+def create_archive_table(cursor, table, archive_table):
+    """
+    Create `archive_table`, partitioned by month like `table` and with its columns, indexed only by a
+    BRIN index on `date_moved` and by product. A plain copy left by clone_schema is replaced.
+    Returns True when the table was created.
+    """
+    qn = connection.ops.quote_name
+    relkind = _get_relkind(cursor, archive_table)
+    if relkind == 'p':
+        return False
+    if relkind is not None:
+        cursor.execute(f"DROP TABLE {qn(archive_table)}")
+    column = qn(PARTITION_COLUMN)
+    cursor.execute(f"CREATE TABLE {qn(archive_table)} (LIKE {qn(table)}) PARTITION BY RANGE ({column})")
+    cursor.execute(f"CREATE INDEX {qn(f'{archive_table}_date_moved_brin')} ON {qn(archive_table)} USING brin ({column})")
+    cursor.execute(f"CREATE INDEX {qn(f'{archive_table}_product_idx')} ON {qn(archive_table)} (product_id, {column})")
+    return True
+
+
+def archive_partition(table, archive_table, columns, month):
+    """
+    Move the rows of `month` from `table` into the month partition of `archive_table` and drop the
+    ledger partition. The archive partition is written once, packed (fillfactor 100) and with TOAST
+    compression applied to every row wider than 128 bytes. Returns the number of rows moved.
+    """
+    qn = connection.ops.quote_name
+    name = get_partition_name(table, month)
+    archive_name = get_partition_name(archive_table, month)
+    column_list = ', '.join(qn(column) for column in columns)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Also sweeps rows of that month out of the default partition
+        create_partition(cursor, table, month)
+        if _get_relkind(cursor, archive_name) is None:
+            cursor.execute(
+                f"CREATE TABLE {qn(archive_name)} PARTITION OF {qn(archive_table)} FOR VALUES {_get_bounds_sql(month)} "
+                f"WITH (fillfactor = 100, toast_tuple_target = 128)"
+            )
+        cursor.execute(
+            f"INSERT INTO {qn(archive_name)} ({column_list}) SELECT {column_list} FROM {qn(name)} "
+            f"ORDER BY product_id, {qn(PARTITION_COLUMN)}"
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {qn(name)}")
+    _existing_partitions.discard((connection.schema_name, table, month))
+    return moved
@@ -0,0 +1,94 @@
+"""
+Inventory period close.
+
+Closing a period freezes the opening and closing balance of every (location, product) in
+InventoryPeriodBalance and moves the period's stock moves from the ledger into the archive table
+(ArchivedStockMove), one monthly partition at a time. Periods are whole months, closed in order from
+the start of the ledger, so day-to-day ledger queries only ever read open months.
+"""
+import datetime
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from inventory.models import (ArchivedStockMove, InventoryPeriod, InventoryPeriodBalance, StockBalanceSnapshot,
+                              StockMove, get_utc_day)
+from inventory.utilities.partitions import add_months, archive_partition, month_start
+
+
+def get_ledger_flows(start, end):
+    """Quantities moved into and out of each (location id, product id) by moves dated in [start, end)."""
+    moves = StockMove.objects.filter(date_moved__gte=start, date_moved__lt=end)
+    flows = defaultdict(lambda: [0, 0])
+    for location_field, index in (('destination_location_id', 0), ('source_location_id', 1)):
+        rows = moves.filter(**{f'{location_field}__isnull': False}).values(location_field, 'product_id').annotate(
+            total=Sum('quantity')).order_by()
+        for row in rows:
+            flows[(row[location_field], row['product_id'])][index] += row['total']
+    return flows
+
+
+def get_next_period_start():
+    """First day of the next period to close, or None when there is nothing to close."""
+    last_period = InventoryPeriod.objects.order_by('-end_date').first()
+    if last_period is not None:
+        return last_period.end_date + datetime.timedelta(days=1)
+    first_move = StockMove.objects.aggregate(first_move=Min('date_moved'))['first_move']
+    return month_start(first_move).date() if first_move is not None else None
+
+
+def close_period(through_month, user=None):
+    """
+    Close every open month up to and including the month of `through_month` as one period. The
+    balance snapshots are brought up to date first, so as-of balances keep covering archived days.
+    Raises ValidationError when that month is not over yet or is already closed.
+    """
+    end_month = month_start(datetime.datetime.combine(through_month, datetime.time()))
+    end = add_months(end_month, 1)
+    end_date = end.date() - datetime.timedelta(days=1)
+    if end_date >= get_utc_day(timezone.now()):
+        raise ValidationError("Only months that are over can be closed.")
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                           [f"{connection.schema_name}:inventory-period-close"])
+        start_date = get_next_period_start() or end_month.date()
+        if start_date > end_date:
+            raise ValidationError(f"The inventory is already closed through {end_date}.")
+        StockBalanceSnapshot.take_snapshots()
+
+        previous = InventoryPeriod.objects.filter(end_date=start_date - datetime.timedelta(days=1)).first()
+        opening = {}
+        if previous is not None:
+            opening = {
+                (location_id, product_id): quantity
+                for location_id, product_id, quantity in previous.balances.values_list(
+                    'location_id', 'product_id', 'closing_quantity')
+            }
+        start = month_start(datetime.datetime.combine(start_date, datetime.time()))
+        flows = get_ledger_flows(start, end)
+
+        period = InventoryPeriod.objects.create(start_date=start_date, end_date=end_date, closed_by=user)
+        balances = []
+        for location_id, product_id in opening.keys() | flows.keys():
+            opening_quantity = opening.get((location_id, product_id), 0)
+            quantity_in, quantity_out = flows.get((location_id, product_id), (0, 0))
+            balances.append(InventoryPeriodBalance(
+                period=period, location_id=location_id, product_id=product_id,
+                opening_quantity=opening_quantity, quantity_in=quantity_in, quantity_out=quantity_out,
+                closing_quantity=opening_quantity + quantity_in - quantity_out,
+            ))
+        InventoryPeriodBalance.objects.bulk_create(balances, batch_size=1000)
+
+        columns = [field.column for field in StockMove._meta.concrete_fields]
+        month = start
+        while month < end:
+            period.archived_moves += archive_partition(StockMove._meta.db_table, ArchivedStockMove._meta.db_table,
+                                                       columns, month)
+            month = add_months(month, 1)
+        period.save(update_fields=['archived_moves'])
+    return period
@@ -1,6 +1,3 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from django.http import HttpResponse
 from django.db.models import Max, F, Value
 from django.db.models.functions import Substr, Cast
 from django.db import models
@@ -4,6 +4,7 @@ import json
 
 from django.db import models
 from django.db.utils import IntegrityError
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
@@ -16,6 +17,9 @@ from inventory.signals import create_delivery_order_returns_stock_move
 from purchase.models import Product
 from shared.viewsets.soft_delete_search_viewset import (
     SoftDeleteWithModelViewSet, SearchDeleteViewSet, NoCreateSearchViewSet)
+from shared.documents import BulkPrintMixin, DocumentPDFMixin
+from shared.fragment_cache import FragmentCacheMixin
+from shared.tenant_config import get_tenant_config
 from shared.utils import extract_error_message
 from users.models import TenantUser
 from users.module_permissions import HasModulePermission
@@ -23,19 +27,22 @@ from users.module_permissions import HasModulePermission
 from .models import (DeliveryOrder, DeliveryOrderItem, DeliveryOrderReturn, DeliveryOrderReturnItem, Location,
                      LocationStock,
                      MultiLocation, ReturnIncomingProduct, ScrapItem, StockAdjustment, Scrap, IncomingProduct,
-                     IncomingProductItem, StockMove, BackOrder, BackOrderItem, InternalTransfer)
+                     IncomingProductItem, StockMove, BackOrder, BackOrderItem, InternalTransfer, StockBalanceSnapshot,
+                     ArchivedStockMove, InventoryPeriod)
 from .serializers import (DeliveryOrderReturnItemSerializer, DeliveryOrderReturnSerializer,
                           DeliveryOrderSerializer, LocationSerializer, MultiLocationSerializer,
                           ReturnIncomingProductSerializer, StockAdjustmentSerializer, BackOrderNotCreateSerializer,
                           ScrapSerializer, IncomingProductSerializer, StockMoveSerializer,
-                          BackOrderCreateSerializer, InternalTransferSerializer)
+                          BackOrderCreateSerializer, InternalTransferSerializer, ArchivedStockMoveSerializer,
+                          InventoryPeriodSerializer, InventoryPeriodBalanceSerializer)
 
+from .utilities.periods import close_period
 from .utilities.utils import generate_delivery_order_unique_id, generate_returned_record_unique_id, generate_returned_incoming_product_unique_id
 from django.db import transaction
 from rest_framework import mixins, viewsets
-from .filters import StockMoveFilter
+from .filters import ArchivedStockMoveFilter, StockMoveFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
 from users.config import basic_action_permission_map
 
 
@@ -134,7 +141,7 @@ class LocationViewSet(SearchDeleteViewSet):
 
     def create(self, request, *args, **kwargs):
         try:
-            if not MultiLocation.objects.filter(is_activated=True).exists() and len(Location.get_active_locations()) >= 1:
+            if not get_tenant_config().multi_location_activated and Location.get_active_locations().exists():
                 return Response(
                     {'error': 'Max number of Locations reached.'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -357,7 +364,7 @@ class ScrapViewSet(SearchDeleteViewSet):
     #     return Response({'status': 'done'})
 
 
-class IncomingProductViewSet(SearchDeleteViewSet):
+class IncomingProductViewSet(DocumentPDFMixin, FragmentCacheMixin, SearchDeleteViewSet):
     queryset = IncomingProduct.objects.all()
     serializer_class = IncomingProductSerializer
     app_label = "inventory"
@@ -370,7 +377,10 @@ class IncomingProductViewSet(SearchDeleteViewSet):
     action_permission_map = {
         **basic_action_permission_map,
         "check_editable": "view",
+        "pdf": "view",
     }
+    fragment_cache_statuses = ('validated', 'canceled')
+    fragment_cache_models = (BackOrder, Location, Product)
 
     def get_permissions(self):
         if self.action == 'get_backorder':
@@ -431,15 +441,15 @@ class IncomingProductViewSet(SearchDeleteViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         # add backorder information to the incoming product
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        backorder = BackOrder.objects.filter(backorder_of__incoming_product_id=data['incoming_product_id']).first()
-        if backorder:
-            data['backorder'] = BackOrderNotCreateSerializer(backorder, context={'request': request}).data
-        else:
-            data['backorder'] = None
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build(instance):
+            data = dict(self.get_serializer(instance).data)
+            backorder = BackOrder.objects.filter(backorder_of__incoming_product_id=data['incoming_product_id']).first()
+            if backorder:
+                data['backorder'] = BackOrderNotCreateSerializer(backorder, context={'request': request}).data
+            else:
+                data['backorder'] = None
+            return data
+        return Response(self.get_cached_representation(build), status=status.HTTP_200_OK)
 
     @action(methods=['get'], detail=True)
     def get_backorder(self, request, incoming_product_id=None):
@@ -901,7 +911,7 @@ class MultiLocationViewSet(viewsets.GenericViewSet):
 
 
 # START FOR THE DELIVERY ORDER
-class DeliveryOrderViewSet(SoftDeleteWithModelViewSet):
+class DeliveryOrderViewSet(BulkPrintMixin, DocumentPDFMixin, FragmentCacheMixin, SoftDeleteWithModelViewSet):
     queryset = DeliveryOrder.objects.filter(is_hidden=False)
     serializer_class = DeliveryOrderSerializer
     app_label = "inventory"
@@ -910,8 +920,12 @@ class DeliveryOrderViewSet(SoftDeleteWithModelViewSet):
     action_permission_map = {
         **basic_action_permission_map,
         "check_availability": "edit",
-        "confirm_delivery": "approve"
+        "confirm_delivery": "approve",
+        "pdf": "view",
+        "bulk_print": "view",
     }
+    fragment_cache_statuses = ('done',)
+    fragment_cache_models = (DeliveryOrderReturn, Location, Product)
 
     def get_permissions(self):
         if self.action == 'get_backorder':
@@ -957,85 +971,80 @@ class DeliveryOrderViewSet(SoftDeleteWithModelViewSet):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+    @staticmethod
+    def _format_shortfalls(shortfalls):
+        return [
+            {"product": product_id, "items": item_ids, "needed": needed, "available": available}
+            for product_id, (needed, available, item_ids) in shortfalls.items()
+        ]
+
     def check_availability(self, request, *args, **kwargs):
         """This is to check for the availability of the Product Items in a Delievery Order. Append the delievery order id(pk) to the request"""
-        id = kwargs.get('pk')
-        all_confirmed = True
         instance = self.get_object()
-
-
-        if not DeliveryOrderItem.objects.filter(is_hidden=False, delivery_order_id=id).exists():
+        items = list(DeliveryOrderItem.objects.filter(is_hidden=False, delivery_order_id=instance.id))
+        if not items:
             return Response({"detail": "This delivery order does not exist"},
                             status=status.HTTP_400_BAD_REQUEST)
-        delivery_order_items = DeliveryOrderItem.objects.filter(is_hidden=False, delivery_order_id=id)
-        for item in delivery_order_items:
-            location_stock_item = LocationStock.objects.filter(
-                    location=instance.source_location, product=item.product_item,
-                ).first()
-            if location_stock_item.quantity < item.quantity_to_deliver:          
-                item.is_available = False
-                all_confirmed = False
-                item.save()
-
-        # delivery_order = DeliveryOrder.objects.filter(is_hidden=False, id=id).first()
+
+        # One query for the stock of every product, one for the flags of every line
+        shortfalls = instance.get_shortfalls()
+        for item in items:
+            item.is_available = item.product_item_id not in shortfalls
+        DeliveryOrderItem.objects.bulk_update(items, ['is_available'])
+
         try:
-            instance.status = "ready" if all_confirmed else "waiting"
+            instance.status = "waiting" if shortfalls else "ready"
             instance.save()
             serialized_order = DeliveryOrderSerializer(instance, context={'request': request})
-            return Response(serialized_order.data, status=status.HTTP_200_OK)
+            return Response({**serialized_order.data, "shortfalls": self._format_shortfalls(shortfalls)},
+                            status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"detail": "An error occurred while updating the delivery order status: " + str(e)},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+
     @transaction.atomic
     def confirm_delivery(self, request, *args, **kwargs):
-        serializer = self.get_serializer
         """This is to confirm the delivery order. Append the delievery order id(pk) to the request"""
         id = kwargs.get('pk')
 
-        delivery_order = DeliveryOrder.objects.filter(is_hidden=False, id=id).first()
+        # Locked, so the same order cannot be confirmed twice concurrently
+        delivery_order = DeliveryOrder.objects.select_for_update().filter(is_hidden=False, id=id).first()
+        if delivery_order is None:
+            return Response({"detail": "This delivery order does not exist"}, status=status.HTTP_404_NOT_FOUND)
         if delivery_order.status.lower().strip() == "done":
             return Response({"detail": "You cannot confirm a delivery order that already have the status of DONE!!!"},
                             status=status.HTTP_400_BAD_REQUEST)
         elif delivery_order.status.lower().strip() != "ready":
             return Response({"detail": "A Delivery Order cannot be Confirmed if the Status is not set to Ready"},
                             status=status.HTTP_400_BAD_REQUEST)
+
+        """This is to update by deducting the Quantity to deliver from the available quantity of the Product"""
+        shortfalls = delivery_order.deduct_stock()
+        if shortfalls:
+            return Response({"detail": "Not enough stock at the source location for some products.",
+                             "shortfalls": self._format_shortfalls(shortfalls)},
+                            status=status.HTTP_409_CONFLICT)
         try:
             delivery_order.status = "done"
             delivery_order.save()
-
-            """This is to update by deducting the Quantity to deliver from the available quantity of the Product"""
-            delivery_order_items = DeliveryOrderItem.objects.filter(is_hidden=False, delivery_order_id=id)
-            for item in delivery_order_items:
-                # Update product quantity if done
-                location_stock = LocationStock.objects.filter(
-                    location=delivery_order.source_location, product_id=item.product_item,
-                ).first()
-                if location_stock:
-                    location_stock.quantity -= item.quantity_to_deliver
-                    location_stock.save()
-                else:
-                    raise serializers.ValidationError(
-                        "Product does not exist in the specified warehouse location."
-                    )
-
             serialized_order = DeliveryOrderSerializer(delivery_order, context={'request': request})
             return Response(serialized_order.data, status=status.HTTP_200_OK)
         except Exception as e:
+            transaction.set_rollback(True)
             return Response({"detail": "An error occurred while updating the delivery order status: " + str(e)},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def retrieve(self, request, *args, **kwargs):
-        # add backorder information to the incoming product
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        delivery_order_return = DeliveryOrderReturn.objects.filter(source_document__order_unique_id=data['order_unique_id']).first()
-        if delivery_order_return:
-            data['delivery_order_return'] = DeliveryOrderReturnSerializer(delivery_order_return, context={'request': request}).data
-        else:
-            data['delivery_order_return'] = None
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # add the delivery order return information to the delivery order
+        def build(instance):
+            data = dict(self.get_serializer(instance).data)
+            delivery_order_return = DeliveryOrderReturn.objects.filter(source_document__order_unique_id=data['order_unique_id']).first()
+            if delivery_order_return:
+                data['delivery_order_return'] = DeliveryOrderReturnSerializer(delivery_order_return, context={'request': request}).data
+            else:
+                data['delivery_order_return'] = None
+            return data
+        return Response(self.get_cached_representation(build), status=status.HTTP_200_OK)
 
 
 
@@ -1263,12 +1272,95 @@ class StockMoveViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, HasModulePermission]
     filter_backends = [DjangoFilterBackend]
     filterset_class = StockMoveFilter
+    action_permission_map = {
+        **basic_action_permission_map,
+        "balance": "view",
+    }
+
+    @action(detail=False, methods=['get'], url_path='balance')
+    def balance(self, request):
+        """
+        Quantities on hand per location and product at the end of `date` (YYYY-MM-DD, UTC), optionally
+        for one `location` and/or `product`. Read from the daily balance snapshots plus the moves
+        posted since the last one, so it never replays the whole ledger.
+        """
+        try:
+            day = parse_date(request.query_params.get('date', ''))
+        except ValueError:
+            day = None
+        if day is None:
+            return Response({"error": "A valid 'date' (YYYY-MM-DD) is required."}, status=status.HTTP_400_BAD_REQUEST)
+        location = request.query_params.get('location')
+        product = request.query_params.get('product')
+        if product and not product.isdigit():
+            return Response({"error": "'product' must be a product id."}, status=status.HTTP_400_BAD_REQUEST)
+        balances = StockBalanceSnapshot.get_balances(
+            day, location_ids=[location] if location else None, product_ids=[product] if product else None
+        )
+        return Response([
+            {"location": location_id, "product": product_id, "quantity": quantity}
+            for (location_id, product_id), quantity in sorted(balances.items())
+        ], status=status.HTTP_200_OK)
+
+
+
+class ArchivedStockMoveViewSet(viewsets.ReadOnlyModelViewSet):
+    """Moves of closed inventory periods, kept out of the ledger. Bound queries with date_from/date_to."""
+    queryset = ArchivedStockMove.objects.select_related('product')
+    serializer_class = ArchivedStockMoveSerializer
+    app_label = "inventory"
+    model_name = "stockmove"
+    permission_classes = [permissions.IsAuthenticated, HasModulePermission]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ArchivedStockMoveFilter
     action_permission_map = basic_action_permission_map
 
 # END STOCK MOVES
 
 
-class InternalTransferViewSet(SearchDeleteViewSet):
+# START INVENTORY PERIODS
+class InventoryPeriodViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = InventoryPeriod.objects.all()
+    serializer_class = InventoryPeriodSerializer
+    app_label = "inventory"
+    model_name = "stockmove"
+    permission_classes = [permissions.IsAuthenticated, HasModulePermission]
+    action_permission_map = {
+        **basic_action_permission_map,
+        "close": "approve",
+        "balances": "view",
+    }
+
+    @action(detail=False, methods=['post'], url_path='close')
+    def close(self, request):
+        """
+        Close every open month through `through` (YYYY-MM): freeze the opening and closing balances per
+        location and product, and move the period's stock moves to the archive.
+        """
+        try:
+            through_month = parse_date(f"{request.data.get('through', '')}-01")
+        except ValueError:
+            through_month = None
+        if through_month is None:
+            return Response({"error": "A valid 'through' month (YYYY-MM) is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            period = close_period(through_month,
+                                  user=TenantUser.objects.filter(user_id=request.user.id, is_hidden=False).first())
+        except DjangoValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(period).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='balances')
+    def balances(self, request, pk=None):
+        period = self.get_object()
+        serializer = InventoryPeriodBalanceSerializer(period.balances.order_by('location_id', 'product_id'), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+# END INVENTORY PERIODS
+
+
+class InternalTransferViewSet(BulkPrintMixin, SearchDeleteViewSet):
     queryset = InternalTransfer.objects.all()
     serializer_class = InternalTransferSerializer
     app_label = "inventory"
@@ -1278,6 +1370,7 @@ class InternalTransferViewSet(SearchDeleteViewSet):
     permission_classes = [permissions.IsAuthenticated, HasModulePermission]
     action_permission_map = {
         **basic_action_permission_map,
+        "bulk_print": "view",
     }
 
     def create(self, request, *args, **kwargs):
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'tenant', 'status', 'attempts', 'date_created', 'date_finished')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'tenant__schema_name')
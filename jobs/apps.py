@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Register the tasks declared in every installed app's tasks.py, and the PDF renderers in documents.py
+        autodiscover_modules('tasks', 'documents')
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim_next_job, requeue_stale_jobs, run_job
+
+
+def work(worker_name, poll_interval, once, stop_event):
+    # Ctrl+C reaches the whole process group; let the parent coordinate the shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Each process opens its own database connection on first use
+    connections.close_all()
+    while not stop_event.is_set():
+        job = claim_next_job(worker_name)
+        if job is None:
+            if once:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs background job workers that pull queued jobs with SELECT ... FOR UPDATE SKIP LOCKED.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of concurrent worker processes.')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait before polling again when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever.')
+        parser.add_argument('--requeue-after', type=int, default=3600,
+                            help='Seconds after which a running job is considered abandoned and requeued, or failed '
+                                 'when out of attempts.')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        requeued, failed = requeue_stale_jobs(timedelta(seconds=options['requeue_after']))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} abandoned job(s).'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'Failed {failed} abandoned job(s) out of attempts.'))
+
+        # Connections must not be shared with forked children
+        connections.close_all()
+        stop_event = multiprocessing.Event()
+        host = socket.gethostname()
+        processes = []
+        for index in range(workers):
+            name = f'{host}:{os.getpid()}:{index}'
+            process = multiprocessing.Process(
+                target=work, args=(name, options['poll_interval'], options['once'], stop_event), name=name
+            )
+            process.start()
+            processes.append(process)
+        self.stdout.write(self.style.SUCCESS(f'Started {workers} worker process(es).'))
+
+        def shutdown(signum, frame):
+            self.stdout.write(self.style.NOTICE('Stopping workers after their current job...'))
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        while any(process.is_alive() for process in processes):
+            time.sleep(0.5)
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                self.stdout.write(self.style.ERROR(f'Worker {process.name} exited with code {process.exitcode}.'))
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
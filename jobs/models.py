@@ -0,0 +1,55 @@
+from django.db import models
+from django.utils import timezone
+
+
+JOB_STATUS = (
+    ('queued', 'Queued'),
+    ('running', 'Running'),
+    ('succeeded', 'Succeeded'),
+    ('failed', 'Failed'),
+)
+
+
+class QueuedJobManager(models.Manager):
+    def get_queryset(self):
+        return super(QueuedJobManager, self).get_queryset().filter(status='queued', run_after__lte=timezone.now())
+
+
+class Job(models.Model):
+    """
+    A unit of background work stored in the public schema.
+    `tenant` is the tenant whose schema the task runs in (null for public-schema tasks).
+    """
+    tenant = models.ForeignKey('registration.Tenant', on_delete=models.CASCADE, null=True, blank=True,
+                               related_name='jobs')
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    priority = models.SmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, null=True, blank=True)
+    created_by = models.IntegerField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    objects = models.Manager()
+    queued = QueuedJobManager()
+
+    class Meta:
+        ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_after'], name='job_queue_idx'),
+            models.Index(fields=['tenant', 'status'], name='job_tenant_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk}: {self.task} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
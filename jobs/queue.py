@@ -0,0 +1,127 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django_tenants.utils import tenant_context
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name):
+    """
+    Register a function as a background task under `name`.
+    Tasks receive the job's kwargs and run inside the job's tenant schema. Their return
+    value must be JSON serializable; it is stored on the job as its result.
+    """
+    def decorator(func):
+        if name in _registry and _registry[name] is not func:
+            raise ValueError(f"A task named '{name}' is already registered.")
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No task registered under '{name}'.")
+
+
+def enqueue(name, tenant=None, created_by=None, priority=0, max_attempts=1, run_after=None, **kwargs):
+    """
+    Queue a registered task for a worker to pick up and return the Job.
+    When `tenant` is omitted the tenant currently set on the connection is used.
+    """
+    get_task(name)
+    if tenant is None:
+        tenant = getattr(connection, 'tenant', None)
+    if tenant is not None and tenant.schema_name == 'public':
+        tenant = None
+    return Job.objects.create(
+        task=name,
+        tenant=tenant,
+        kwargs=kwargs,
+        created_by=created_by,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def claim_next_job(worker_name):
+    """
+    Lock the next runnable job with SELECT ... FOR UPDATE SKIP LOCKED and mark it running.
+    Concurrent workers never block on, or claim, the same row.
+    """
+    connection.set_schema_to_public()
+    with transaction.atomic():
+        job = (
+            Job.queued.select_for_update(skip_locked=True)
+            .order_by('-priority', 'run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.worker = worker_name
+        job.attempts += 1
+        job.date_started = timezone.now()
+        job.save(update_fields=['status', 'worker', 'attempts', 'date_started'])
+    return job
+
+
+def run_job(job):
+    """Execute a claimed job in its tenant's schema and record the outcome."""
+    try:
+        func = get_task(job.task)
+        if job.tenant_id:
+            with tenant_context(job.tenant):
+                result = func(**job.kwargs)
+        else:
+            result = func(**job.kwargs)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.pk, job.task)
+        connection.set_schema_to_public()
+        job.error = f"{e}\n{traceback.format_exc()}"
+        if job.attempts < job.max_attempts:
+            # Back off a little more on every retry
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(seconds=30 * job.attempts)
+        else:
+            job.status = 'failed'
+            job.date_finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'run_after', 'date_finished'])
+        return job
+
+    connection.set_schema_to_public()
+    job.status = 'succeeded'
+    job.result = result
+    job.error = None
+    job.date_finished = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'date_finished'])
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put jobs left 'running' by a worker that died back on the queue. Jobs that used up their
+    attempts are failed instead, so a job that kills its worker (e.g. out of memory) is not
+    retried forever. Returns (number requeued, number failed).
+    """
+    connection.set_schema_to_public()
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', date_started__lt=now - older_than)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', worker=None, date_finished=now,
+        error=f"Abandoned by its worker after running for more than {older_than}.",
+    )
+    requeued = stale.update(status='queued', worker=None)
+    return requeued, failed
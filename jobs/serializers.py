@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='job-detail')
+
+    class Meta:
+        model = Job
+        fields = ['url', 'id', 'task', 'status', 'result', 'error', 'attempts', 'max_attempts',
+                  'date_created', 'date_started', 'date_finished', 'is_finished']
+        read_only_fields = fields
@@ -0,0 +1,103 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim_next_job, enqueue, requeue_stale_jobs, task
+
+TEST_TASK = 'jobs.tests.noop'
+
+
+@task(TEST_TASK)
+def noop(**kwargs):
+    return kwargs
+
+
+class JobQueueTests(TestCase):
+
+    def test_claim_marks_the_job_running(self):
+        job = enqueue(TEST_TASK, value=1)
+
+        claimed = claim_next_job('worker-1')
+
+        self.assertEqual(claimed.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), ('running', 'worker-1', 1))
+        self.assertIsNotNone(job.date_started)
+        self.assertIsNone(claim_next_job('worker-2'))
+
+    def test_claim_takes_the_due_job_of_highest_priority_first(self):
+        low = enqueue(TEST_TASK)
+        high = enqueue(TEST_TASK, priority=5)
+        enqueue(TEST_TASK, priority=10, run_after=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(claim_next_job('worker-1').pk, high.pk)
+        self.assertEqual(claim_next_job('worker-1').pk, low.pk)
+        self.assertIsNone(claim_next_job('worker-1'))
+
+    def test_requeue_stale_jobs_requeues_only_jobs_running_too_long(self):
+        stale = enqueue(TEST_TASK)
+        recent = enqueue(TEST_TASK)
+        Job.objects.filter(pk=stale.pk).update(status='running', worker='worker-1',
+                                               date_started=timezone.now() - timedelta(hours=2))
+        Job.objects.filter(pk=recent.pk).update(status='running', worker='worker-2', date_started=timezone.now())
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), (1, 0))
+
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((stale.status, stale.worker), ('queued', None))
+        self.assertEqual((recent.status, recent.worker), ('running', 'worker-2'))
+        self.assertEqual(claim_next_job('worker-3').pk, stale.pk)
+
+    def test_requeue_stale_jobs_fails_jobs_out_of_attempts(self):
+        retried = enqueue(TEST_TASK, max_attempts=3)
+        exhausted = enqueue(TEST_TASK, max_attempts=2)
+        started = timezone.now() - timedelta(hours=2)
+        Job.objects.filter(pk=retried.pk).update(status='running', attempts=2, date_started=started)
+        # Killed its worker on every attempt
+        Job.objects.filter(pk=exhausted.pk).update(status='running', attempts=2, date_started=started)
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), (1, 1))
+
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retried.status, 'queued')
+        self.assertEqual((exhausted.status, exhausted.worker), ('failed', None))
+        self.assertIsNotNone(exhausted.date_finished)
+        self.assertIn('Abandoned', exhausted.error)
+
+
+class SkipLockedClaimTests(TransactionTestCase):
+
+    def test_claim_skips_a_job_locked_by_another_worker(self):
+        first = enqueue(TEST_TASK, priority=5)
+        second = enqueue(TEST_TASK)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            # Another worker's transaction, on its own connection
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(pk=first.pk)
+                    locked.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(timeout=10))
+            claimed = claim_next_job('worker-1')
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual(claimed.pk, second.pk)
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'queued')
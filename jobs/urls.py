@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework import routers
+
+from .views import JobViewSet
+
+router = routers.DefaultRouter()
+router.register(r'', JobViewSet, basename='job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,33 @@
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import permissions, status, viewsets
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+def accepted_response(request, job, message=None):
+    """Return a 202 response pointing the client at the status endpoint of a queued job."""
+    return Response({
+        "message": message or "Request accepted and queued for processing.",
+        "job_id": job.pk,
+        "status": job.status,
+        "status_url": reverse('job-detail', kwargs={'pk': job.pk}, request=request),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema_view(
+    list=extend_schema(tags=['Jobs']),
+    retrieve=extend_schema(tags=['Jobs']),
+)
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['status', 'task']
+
+    def get_queryset(self):
+        queryset = Job.objects.filter(tenant=self.request.tenant)
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user.id)
+        return queryset
@@ -0,0 +1,50 @@
+from django.db.models import Prefetch
+
+from shared.documents import register_document
+
+from .models import PurchaseOrder, PurchaseOrderItem, RequestForQuotation, RequestForQuotationItem
+
+
+def _format_date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+@register_document(
+    RequestForQuotation,
+    select_related=('vendor', 'currency'),
+    prefetch_related=(Prefetch('items', queryset=RequestForQuotationItem.objects.select_related('product')),),
+)
+def render_request_for_quotation(rfq, writer):
+    writer.heading(f"{rfq._meta.verbose_name}: {rfq.id}")
+    writer.field("Date Created", _format_date(rfq.date_created))
+    writer.field("Deadline Date", _format_date(rfq.expiry_date))
+    writer.field("Vendor", rfq.vendor.company_name)
+    writer.field("Currency", rfq.currency.currency_name if rfq.currency else None)
+    writer.field("Status", rfq.status)
+    writer.line()
+    writer.line("Products:", bold=True)
+    for item in rfq.items.all():
+        writer.line(f"- {item.product.product_name}, Qty: {item.qty}, "
+                    f"Estimated Unit Price: {item.estimated_unit_price}", indent=10)
+
+
+@register_document(
+    PurchaseOrder,
+    select_related=('vendor', 'currency', 'destination_location'),
+    prefetch_related=(Prefetch('items', queryset=PurchaseOrderItem.objects.select_related('product')),),
+)
+def render_purchase_order(purchase_order, writer):
+    writer.heading(f"{purchase_order._meta.verbose_name}: {purchase_order.id}")
+    writer.field("Date Created", _format_date(purchase_order.date_created))
+    writer.field("Vendor", purchase_order.vendor.company_name)
+    writer.field("Currency", purchase_order.currency.currency_name if purchase_order.currency else None)
+    writer.field("Destination", purchase_order.destination_location.location_name
+                 if purchase_order.destination_location else None)
+    writer.field("Payment Terms", purchase_order.payment_terms)
+    writer.field("Delivery Terms", purchase_order.delivery_terms)
+    writer.field("Status", purchase_order.status)
+    writer.line()
+    writer.line("Products:", bold=True)
+    for item in purchase_order.items.all():
+        writer.line(f"- {item.product.product_name}, Qty: {item.qty}, "
+                    f"Unit Price: {item.estimated_unit_price}, Total: {item.total_price}", indent=10)
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0005_remove_purchaseorderitem_description_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMailing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_recipients', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_completed', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-date_created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VendorMailingRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=100)),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], max_length=20)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('date_sent', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mailing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='purchase.vendormailing')),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mailings', to='purchase.vendor')),
+            ],
+            options={
+                'ordering': ['mailing', 'id'],
+                'indexes': [models.Index(fields=['mailing', 'status'], name='vendor_mailing_status_idx')],
+            },
+        ),
+    ]
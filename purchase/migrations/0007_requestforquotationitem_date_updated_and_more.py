@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0006_vendormailing_vendormailingrecipient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestforquotationitem',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='purchaseorderitem',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0007_requestforquotationitem_date_updated_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vendormailingrecipient',
+            index=models.Index(fields=['date_sent'], name='vendor_mailing_sent_idx'),
+        ),
+    ]
@@ -10,6 +10,9 @@ from django_ckeditor_5.fields import CKEditor5Field
 
 import json
 
+from shared.cache import register_versioned_model
+from shared.fragment_cache import register_fragment_model
+from shared.tenant_config import get_tenant_config
 from users.models import TenantUser
 
 
@@ -215,8 +218,8 @@ class Product(models.Model):
 
     @property
     def available_product_quantity(self):
-        from inventory.models import Location, LocationStock, MultiLocation
-        if MultiLocation.objects.filter(is_activated=True).exists():
+        from inventory.models import Location, LocationStock
+        if get_tenant_config().multi_location_activated:
             return LocationStock.objects.filter(
                 location__in=Location.get_active_locations(),
                 product=self
@@ -338,20 +341,71 @@ class Vendor(models.Model):
         email.send()
 
     @classmethod
-    def send_mass_email(cls, subject, message, **kwargs):
+    def send_mass_email(cls, subject, message, vendor_ids=None):
         """
-        Sends an email to multiple Vendors.
+        Sends a personalised email to every visible Vendor, or to `vendor_ids` only.
+        `$company_name`, `$email`, `$address` and `$phone_number` in the subject and message are
+        filled in per vendor. Sending runs in background batches paced to the tenant's rate limit;
+        every recipient's outcome is recorded on the returned VendorMailing.
         """
-        vendors = cls.objects.all()
-        vendor_emails = [vendor.email for vendor in vendors]
-        email = EmailMessage(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            bcc=vendor_emails,
-        )
-        email.content_subtype = "html"  # This is necessary to ensure the email is sent as HTML
-        email.send()
+        from .utils import start_vendor_mass_mail
+
+        return start_vendor_mass_mail(subject, message, vendor_ids=vendor_ids)
+
+
+MAILING_STATUS = (
+    ('pending', 'Pending'),
+    ('sending', 'Sending'),
+    ('completed', 'Completed'),
+    ('failed', 'Failed'),
+)
+
+MAILING_RECIPIENT_STATUS = (
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+)
+
+
+class VendorMailing(models.Model):
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=MAILING_STATUS, default='pending')
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_completed = models.DateTimeField(null=True, blank=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['-date_created']
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class VendorMailingRecipient(models.Model):
+    mailing = models.ForeignKey(VendorMailing, on_delete=models.CASCADE, related_name='recipients')
+    vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='mailings')
+    email = models.EmailField(max_length=100)
+    status = models.CharField(max_length=20, choices=MAILING_RECIPIENT_STATUS)
+    error = models.TextField(blank=True, null=True)
+    date_sent = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['mailing', 'id']
+        indexes = [
+            models.Index(fields=['mailing', 'status'], name='vendor_mailing_status_idx'),
+            # Sends of the last minute, counted against the tenant's rate limit
+            models.Index(fields=['date_sent'], name='vendor_mailing_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.status}"
 
 
 class PurchaseRequest(models.Model):
@@ -557,6 +611,7 @@ class RequestForQuotationItem(models.Model):
     estimated_unit_price = models.DecimalField(max_digits=20, decimal_places=2, null=True)
 
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
 
     objects = models.Manager()
 
@@ -679,6 +734,7 @@ class PurchaseOrder(models.Model):
 
 class PurchaseOrderItem(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
     purchase_order = models.ForeignKey("PurchaseOrder", on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     qty = models.PositiveIntegerField(default=1, verbose_name="QTY")
@@ -700,3 +756,9 @@ class PurchaseOrderItem(models.Model):
 
     def save(self, *args, **kwargs):
         super(PurchaseOrderItem, self).save(*args, **kwargs)
+
+
+register_fragment_model(RequestForQuotation, children=[(RequestForQuotationItem, 'request_for_quotation_id')])
+register_fragment_model(PurchaseOrder, children=[(PurchaseOrderItem, 'purchase_order_id')])
+# Read by cached fragments and conditional GETs of other models
+register_versioned_model(Currency, Product, PurchaseOrder, PurchaseOrderItem, UnitOfMeasure, Vendor)
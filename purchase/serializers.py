@@ -5,7 +5,8 @@ from rest_framework import serializers
 
 from shared.serializers import LocationSerializer
 from users.models import TenantUser
-from inventory.models import Location, MultiLocation
+from inventory.models import Location
+from shared.tenant_config import get_tenant_config
 from users.serializers import TenantUserSerializer
 from .models import (PurchaseRequest, PurchaseRequestItem, Department, Vendor,
                      Product, RequestForQuotation, RequestForQuotationItem, UnitOfMeasure,
@@ -200,7 +201,7 @@ class PurchaseRequestSerializer(serializers.HyperlinkedModelSerializer):
         for field in required_fields:
             if not data.get(field):
                 raise serializers.ValidationError(f"{field.replace('_', ' ').capitalize()} is required to create a purchase request.")
-        if data.get('requesting_location') is None and not MultiLocation.objects.filter(is_activated=False).exists():
+        if data.get('requesting_location') is None and not get_tenant_config().single_location:
             raise serializers.ValidationError("Requesting location is required when multi-location is activated.")
         if PurchaseRequest.objects.filter(
                 requester=data.get('requester'),
@@ -253,7 +254,7 @@ class PurchaseRequestSerializer(serializers.HyperlinkedModelSerializer):
         for field in required_fields:
             if field in data and data[field] is None:
                 raise serializers.ValidationError(f"{field.replace('_', ' ').capitalize()} is required.")
-        if 'requesting_location' in data and data['requesting_location'] is None and not MultiLocation.objects.filter(is_activated=False).exists():
+        if 'requesting_location' in data and data['requesting_location'] is None and not get_tenant_config().single_location:
             raise serializers.ValidationError("Requesting location is required when multi-location is activated.")
         return data
 
@@ -265,7 +266,7 @@ class PurchaseRequestSerializer(serializers.HyperlinkedModelSerializer):
         return data
 
     def create(self, validated_data):
-        if not validated_data.get('requesting_location') and MultiLocation.objects.filter(is_activated=False).exists():
+        if not validated_data.get('requesting_location') and get_tenant_config().single_location:
             validated_data['requesting_location'] = Location.get_active_locations().first()
         items_data = validated_data.pop('items', [])
         purchase_request = PurchaseRequest.objects.create(**validated_data)
@@ -594,7 +595,7 @@ class PurchaseOrderSerializer(serializers.HyperlinkedModelSerializer):
                 raise serializers.ValidationError(
                     f"{field.replace('_', ' ').capitalize()} is required to create a purchase request."
                 )
-        if (not data.get('destination_location') or data.get('destination_location') is None) and not MultiLocation.objects.filter(is_activated=False).exists():
+        if (not data.get('destination_location') or data.get('destination_location') is None) and not get_tenant_config().single_location:
             raise serializers.ValidationError("Destination location is required when multi-location is activated.")
         if PurchaseOrder.objects.filter(
             created_by=data.get('created_by'),
@@ -648,7 +649,7 @@ class PurchaseOrderSerializer(serializers.HyperlinkedModelSerializer):
         for field in required_fields:
             if field in data and data[field] is None:
                 raise serializers.ValidationError(f"{field.replace('_', ' ').capitalize()} is required.")
-        if 'destination_location' in data and data['destination_location'] is None and not MultiLocation.objects.filter(is_activated=False).exists():
+        if 'destination_location' in data and data['destination_location'] is None and not get_tenant_config().single_location:
             raise serializers.ValidationError("Destination location is required when multi-location is activated.")
 
         return data
@@ -665,7 +666,7 @@ class PurchaseOrderSerializer(serializers.HyperlinkedModelSerializer):
         if not items_data:
             raise serializers.ValidationError("At least one item is required to create a purchase order.")
 
-        if not validated_data.get('destination_location') and MultiLocation.objects.filter(is_activated=False).exists():
+        if not validated_data.get('destination_location') and get_tenant_config().single_location:
             validated_data['destination_location'] = Location.get_active_locations().first()
 
         po = PurchaseOrder.objects.create(**validated_data)
@@ -0,0 +1,21 @@
+from jobs.queue import task
+from . import utils
+from .models import Product, Vendor
+from .utils import MAILING_BATCH_TASK
+
+
+@task('purchase.delete_all_products')
+def delete_all_products():
+    deleted_count, _ = Product.objects.all().delete()
+    return {"deleted": deleted_count}
+
+
+@task('purchase.send_vendor_mass_mail')
+def send_vendor_mass_mail(subject, message, vendor_ids=None):
+    mailing = Vendor.send_mass_email(subject, message, vendor_ids=vendor_ids)
+    return {"mailing_id": mailing.pk}
+
+
+@task(MAILING_BATCH_TASK)
+def send_vendor_mailing_batch(mailing_id, vendor_ids=None, after_id=0):
+    return utils.send_vendor_mailing_batch(mailing_id, vendor_ids=vendor_ids, after_id=after_id)
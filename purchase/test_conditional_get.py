@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Product, UnitOfMeasure
+from .views import ProductViewSet, UnitOfMeasureViewSet, VendorViewSet
+
+
+class ConditionalGetTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        self.unit = UnitOfMeasure.objects.create(unit_name='Piece', unit_category='Unit')
+        self.product = Product.objects.create(product_name='Bolt', product_category='stockable',
+                                              unit_of_measure=self.unit)
+
+    def get(self, viewset, path, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = APIRequestFactory().get(path, **headers)
+        force_authenticate(request, user=self.user)
+        return viewset.as_view({'get': 'list'})(request)
+
+    def test_unchanged_list_returns_304(self):
+        etag = self.get(ProductViewSet, '/purchase/products/')['ETag']
+
+        response = self.get(ProductViewSet, '/purchase/products/', etag=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_related_model_save_changes_the_etag(self):
+        etag = self.get(ProductViewSet, '/purchase/products/')['ETag']
+
+        # Shown on products as unit_of_measure_details
+        self.unit.unit_name = 'Box'
+        self.unit.save()
+        response = self.get(ProductViewSet, '/purchase/products/', etag=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_model_without_update_timestamp_is_versioned(self):
+        etag = self.get(UnitOfMeasureViewSet, '/purchase/unit-of-measure/')['ETag']
+
+        UnitOfMeasure.objects.create(unit_name='Litre', unit_category='Volume')
+        response = self.get(UnitOfMeasureViewSet, '/purchase/unit-of-measure/', etag=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_viewset_that_does_not_opt_in_sends_no_etag(self):
+        response = self.get(VendorViewSet, '/purchase/vendors/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Product, UnitOfMeasure
+from .views import ProductViewSet
+
+
+class FastReadTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        self.unit = UnitOfMeasure.objects.create(unit_name='Piece', unit_category='Unit')
+        self.product = Product.objects.create(product_name='Bolt', product_category='stockable',
+                                              unit_of_measure=self.unit)
+        Product.objects.create(product_name='Nut', product_category='stockable', unit_of_measure=self.unit,
+                               is_hidden=True)
+
+    def get(self, path, action='list', **headers):
+        request = APIRequestFactory().get(path, **headers)
+        force_authenticate(request, user=self.user)
+        response = ProductViewSet.as_view({'get': action})(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_fast_rows_match_the_serializer_columns(self):
+        default = {item['id']: item for item in self.get('/purchase/products/')}
+
+        fast = self.get('/purchase/products/?fast=true')
+
+        self.assertEqual(len(fast), len(default))
+        for item in fast:
+            expected = default[item['id']]
+            self.assertEqual(item, {name: expected[name] for name in item})
+        row = next(item for item in fast if item['id'] == self.product.pk)
+        self.assertEqual(row['unit_of_measure'], self.unit.pk)
+        self.assertIn('url', row)
+        # Nested serializers, properties and write-only fields need the instance
+        self.assertNotIn('unit_of_measure_details', row)
+        self.assertNotIn('available_product_quantity', row)
+        self.assertNotIn('check_for_duplicates', row)
+
+    def test_accept_profile_enables_fast_rows(self):
+        data = self.get('/purchase/products/', HTTP_ACCEPT='application/json; profile=fast')
+
+        self.assertTrue(data)
+        self.assertNotIn('unit_of_measure_details', data[0])
+
+    def test_fast_search_leaves_out_hidden_rows(self):
+        data = self.get('/purchase/products/search/?fast=true', action='search')
+
+        self.assertEqual([item['product_name'] for item in data], ['Bolt'])
+        self.assertNotIn('unit_of_measure_details', data[0])
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import override_settings
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+
+from jobs.models import Job
+from .models import Vendor, VendorMailing, VendorMailingRecipient
+from .utils import MAILING_BATCH_TASK, get_mass_mail_budget, render_vendor_mail, send_vendor_mailing_batch
+
+
+class RenderVendorMailTests(TenantTestCase):
+
+    def test_only_vendor_mail_fields_are_filled_in(self):
+        vendor = Vendor(company_name='Acme <Ltd>', email='sales@acme.test')
+
+        subject, message = render_vendor_mail('Hello $company_name', 'Dear $company_name, pay $100 to $secret',
+                                              vendor)
+
+        self.assertEqual(subject, 'Hello Acme <Ltd>')
+        # Escaped in the html message; unknown placeholders and $ amounts are left as they are
+        self.assertEqual(message, 'Dear Acme &lt;Ltd&gt;, pay $100 to $secret')
+
+
+class MassMailBudgetTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.mailing = VendorMailing.objects.create(subject='News', message='Hello')
+
+    def record_sends(self, count, seconds_ago):
+        VendorMailingRecipient.objects.bulk_create(
+            VendorMailingRecipient(mailing=self.mailing, email=f'{index}@vendor.test', status='sent',
+                                   date_sent=timezone.now() - timedelta(seconds=seconds_ago))
+            for index in range(count)
+        )
+
+    def test_budget_is_what_is_left_of_the_last_minute(self):
+        self.record_sends(2, seconds_ago=10)
+        # Older than the window
+        self.record_sends(5, seconds_ago=120)
+
+        self.assertEqual(get_mass_mail_budget(3), (1, None))
+
+    def test_spent_budget_frees_up_a_minute_after_the_oldest_send(self):
+        self.record_sends(1, seconds_ago=40)
+        self.record_sends(2, seconds_ago=10)
+        oldest = VendorMailingRecipient.objects.order_by('date_sent').first().date_sent
+
+        self.assertEqual(get_mass_mail_budget(3), (0, oldest + timedelta(minutes=1)))
+
+
+@override_settings(VENDOR_MASS_MAIL_RATE_LIMIT=2, VENDOR_MASS_MAIL_CHUNK_SIZE=100,
+                   EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SendVendorMailingBatchTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.vendors = [Vendor.objects.create(company_name=f'Vendor {index}', email=f'{index}@vendor.test')
+                        for index in range(3)]
+        self.mailing = VendorMailing.objects.create(subject='News for $company_name', message='Hello')
+
+    def get_next_batches(self):
+        return Job.objects.filter(task=MAILING_BATCH_TASK, kwargs__mailing_id=self.mailing.pk)
+
+    def test_batch_sends_what_the_rate_limit_allows_and_queues_the_rest(self):
+        result = send_vendor_mailing_batch(self.mailing.pk)
+
+        self.assertEqual(result, {"mailing_id": self.mailing.pk, "sent": 2, "failed": 0})
+        self.assertEqual([message.subject for message in mail.outbox], ['News for Vendor 0', 'News for Vendor 1'])
+        self.mailing.refresh_from_db()
+        self.assertEqual((self.mailing.status, self.mailing.sent_count), ('sending', 2))
+        next_batch = self.get_next_batches().get()
+        self.assertEqual(next_batch.kwargs['after_id'], self.vendors[1].pk)
+
+    def test_batch_over_the_rate_limit_is_rescheduled(self):
+        send_vendor_mailing_batch(self.mailing.pk)
+        self.get_next_batches().delete()
+
+        result = send_vendor_mailing_batch(self.mailing.pk, after_id=self.vendors[1].pk)
+
+        self.assertTrue(result["rescheduled"])
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertGreater(self.get_next_batches().get().run_after, timezone.now())
+
+    @override_settings(VENDOR_MASS_MAIL_RATE_LIMIT=0)
+    def test_last_batch_completes_the_mailing(self):
+        send_vendor_mailing_batch(self.mailing.pk, vendor_ids=[self.vendors[0].pk, self.vendors[2].pk])
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.mailing.refresh_from_db()
+        self.assertEqual((self.mailing.status, self.mailing.total_recipients), ('completed', 2))
+        self.assertIsNotNone(self.mailing.date_completed)
+        self.assertFalse(self.get_next_batches().exists())
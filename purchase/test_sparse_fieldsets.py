@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Product, UnitOfMeasure
+from .views import ProductViewSet
+
+
+class SparseFieldsetTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('manager', password='secret', is_staff=True, is_superuser=True)
+        self.unit = UnitOfMeasure.objects.create(unit_name='Piece', unit_category='Unit')
+        self.product = Product.objects.create(product_name='Bolt', product_category='stockable',
+                                              product_description='<p>Steel</p>', unit_of_measure=self.unit)
+
+    def get_row(self, path):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=self.user)
+        response = ProductViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]
+
+    def get_queryset(self, path):
+        view = ProductViewSet(action='list', format_kwarg=None)
+        view.request = Request(APIRequestFactory().get(path))
+        return view.get_queryset()
+
+    def test_fields_returns_only_the_listed_fields(self):
+        row = self.get_row('/purchase/products/?fields=id,product_name')
+
+        self.assertEqual(set(row), {'id', 'product_name'})
+        self.assertEqual(row['product_name'], 'Bolt')
+
+    def test_nested_block_is_returned_when_listed_in_fields(self):
+        row = self.get_row('/purchase/products/?fields=id,unit_of_measure_details')
+
+        self.assertEqual(set(row), {'id', 'unit_of_measure_details'})
+        self.assertEqual(row['unit_of_measure_details']['unit_name'], 'Piece')
+
+    def test_expand_adds_a_nested_block_to_the_plain_fields(self):
+        plain = self.get_row('/purchase/products/?expand=')
+        expanded = self.get_row('/purchase/products/?expand=unit_of_measure_details')
+
+        self.assertNotIn('unit_of_measure_details', plain)
+        self.assertIn('product_name', plain)
+        self.assertEqual(set(expanded), set(plain) | {'unit_of_measure_details'})
+
+    def test_response_without_params_is_unchanged(self):
+        row = self.get_row('/purchase/products/')
+
+        self.assertIn('unit_of_measure_details', row)
+        self.assertEqual(row['product_description'], '<p>Steel</p>')
+
+    def test_queryset_follows_the_returned_fields(self):
+        sparse = self.get_queryset('/purchase/products/?fields=id,product_name')
+        expanded = self.get_queryset('/purchase/products/?expand=unit_of_measure_details')
+
+        self.assertIn('product_description', sparse.query.deferred_loading[0])
+        self.assertEqual(expanded.query.select_related, {'unit_of_measure': {}})
+        self.assertEqual(self.get_queryset('/purchase/products/').query.deferred_loading[0], frozenset())
+
+    def test_fast_read_rows_take_the_listed_fields(self):
+        row = self.get_row('/purchase/products/?fast=true&fields=id,product_name')
+
+        self.assertEqual(row, {'id': self.product.pk, 'product_name': 'Bolt'})
@@ -1,34 +1,151 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from django.http import HttpResponse
-
-
-def generate_model_pdf(model):
-    # Create the HttpResponse object with PDF headers
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{model._meta.verbose_name}_{model.id}.pdf"'
-
-    # Create the PDF object, using the response object as the "file."
-    p = canvas.Canvas(response, pagesize=letter)
-
-    # Write content to the PDF
-    p.drawString(100, 750, f"{model._meta.verbose_name}: {model.id}")
-    p.drawString(100, 725, f"Date Created: {model.date_created.strftime('%Y-%m-%d')}")
-    if model.expiry_date:
-        p.drawString(100, 700,
-                     f"Deadline Date: {model.expiry_date.strftime('%Y-%m-%d') if model.expiry_date else 'None'}")
-    p.drawString(100, 675, f"Vendor: {model.vendor.company_name}")
-    p.drawString(100, 650, f"Status: {model.status}")
-
-    # List RFQ items
-    y_position = 600
-    p.drawString(100, y_position, "Products:")
-    for item in model.items.all():
-        y_position -= 25
-        p.drawString(100, y_position, f"- {item.product.product_name}, Qty: {item.qty}")
-
-    # Close the PDF object and finish
-    p.showPage()
-    p.save()
-
-    return response
+import logging
+from datetime import timedelta
+from string import Template
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.html import escape
+
+from jobs.queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+MAILING_BATCH_TASK = 'purchase.send_vendor_mailing_batch'
+# The only vendor fields a mass mail can show, as $company_name, $email, $address and $phone_number
+VENDOR_MAIL_FIELDS = ('company_name', 'email', 'address', 'phone_number')
+# How long a batch waits when another batch of the same tenant is sending
+MAILING_BUSY_DELAY = timedelta(seconds=5)
+
+
+def get_mass_mail_rate_limit(schema_name=None):
+    """Return the number of vendor emails a tenant may send per minute."""
+    schema_name = schema_name or connection.schema_name
+    overrides = getattr(settings, 'VENDOR_MASS_MAIL_TENANT_RATE_LIMITS', {})
+    return overrides.get(schema_name, getattr(settings, 'VENDOR_MASS_MAIL_RATE_LIMIT', 120))
+
+
+def render_vendor_mail(subject, message, vendor):
+    """
+    Fill the $placeholders of `subject` and `message` with the vendor's VENDOR_MAIL_FIELDS. Anything
+    else, including `$` signs in the text, is left as it is. Values are html-escaped in the message.
+    """
+    values = {field: getattr(vendor, field) or '' for field in VENDOR_MAIL_FIELDS}
+    return (
+        Template(subject).safe_substitute(values).strip(),
+        Template(message).safe_substitute({field: escape(value) for field, value in values.items()}),
+    )
+
+
+def start_vendor_mass_mail(subject, message, vendor_ids=None):
+    """
+    Create the VendorMailing of `subject` and `message` to the visible vendors (only `vendor_ids`
+    when given) and queue its first batch. Returns the mailing; the batches record its progress.
+    """
+    from .models import VendorMailing
+
+    mailing = VendorMailing.objects.create(subject=subject, message=message, status='pending')
+    enqueue(MAILING_BATCH_TASK, mailing_id=mailing.pk, vendor_ids=vendor_ids)
+    return mailing
+
+
+def get_mass_mail_budget(rate_limit):
+    """
+    Return (number of emails the tenant may send now, when to try again if none). Counts the
+    recipients of all the tenant's mailings sent in the last minute.
+    """
+    from .models import VendorMailingRecipient
+
+    window_start = timezone.now() - timedelta(minutes=1)
+    recent = VendorMailingRecipient.objects.filter(date_sent__gt=window_start)
+    budget = rate_limit - recent.count()
+    if budget > 0:
+        return budget, None
+    # Room frees up once the oldest send of the window is a minute old
+    oldest = recent.order_by('date_sent').values_list('date_sent', flat=True)[-budget]
+    return 0, oldest + timedelta(minutes=1)
+
+
+def send_vendor_mailing_batch(mailing_id, vendor_ids=None, after_id=0):
+    """
+    Send the next batch of a VendorMailing: as many vendors, in id order after `after_id`, as the
+    tenant's per-minute rate limit still allows, over a single SMTP connection. Each recipient's
+    outcome is stored as a VendorMailingRecipient row. The next batch is queued to run when the
+    limit allows it, so sending never sleeps in the worker.
+
+    Batches of one tenant run one at a time, each in one transaction holding an advisory lock, so
+    the limit holds across all the tenant's mailings and workers. The lock is transaction-level,
+    which pgbouncer transaction pooling supports.
+    """
+    from .models import Vendor, VendorMailing, VendorMailingRecipient
+
+    with transaction.atomic():
+        mailing = VendorMailing.objects.get(pk=mailing_id)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))",
+                           [f'{connection.schema_name}:vendor-mass-mail'])
+            locked = cursor.fetchone()[0]
+        if not locked:
+            enqueue(MAILING_BATCH_TASK, mailing_id=mailing_id, vendor_ids=vendor_ids, after_id=after_id,
+                    run_after=timezone.now() + MAILING_BUSY_DELAY)
+            return {"mailing_id": mailing_id, "sent": 0, "rescheduled": True}
+
+        chunk_size = getattr(settings, 'VENDOR_MASS_MAIL_CHUNK_SIZE', 100)
+        rate_limit = get_mass_mail_rate_limit()
+        # A limit of 0 means unlimited
+        budget, retry_at = get_mass_mail_budget(rate_limit) if rate_limit else (chunk_size, None)
+        if not budget:
+            enqueue(MAILING_BATCH_TASK, mailing_id=mailing_id, vendor_ids=vendor_ids, after_id=after_id,
+                    run_after=retry_at)
+            return {"mailing_id": mailing_id, "sent": 0, "rescheduled": True}
+
+        vendors = Vendor.objects.filter(is_hidden=False, id__gt=after_id)
+        if vendor_ids:
+            vendors = vendors.filter(id__in=vendor_ids)
+        size = min(budget, chunk_size)
+        batch = list(vendors.order_by('id').only('id', *VENDOR_MAIL_FIELDS)[:size + 1])
+        has_more = len(batch) > size
+        batch = batch[:size]
+
+        mailing.status = 'sending'
+        outcomes = []
+        mail_connection = get_connection(fail_silently=False)
+        try:
+            mail_connection.open()
+            for vendor in batch:
+                subject, message = render_vendor_mail(mailing.subject, mailing.message, vendor)
+                email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, to=[vendor.email],
+                                     connection=mail_connection)
+                email.content_subtype = "html"
+                outcome = VendorMailingRecipient(mailing=mailing, vendor=vendor, email=vendor.email,
+                                                 date_sent=timezone.now())
+                try:
+                    email.send(fail_silently=False)
+                    outcome.status = 'sent'
+                except Exception as e:
+                    outcome.status = 'failed'
+                    outcome.error = str(e)
+                    logger.warning("Mass mail to vendor %s failed: %s", vendor.email, e)
+                outcomes.append(outcome)
+        except Exception:
+            # The SMTP connection itself failed; the rest of the mailing is abandoned
+            logger.exception("Mass mail %s aborted", mailing.pk)
+            mailing.status = 'failed'
+            has_more = False
+        finally:
+            mail_connection.close()
+
+        VendorMailingRecipient.objects.bulk_create(outcomes)
+        sent = sum(1 for outcome in outcomes if outcome.status == 'sent')
+        mailing.sent_count += sent
+        mailing.failed_count += len(outcomes) - sent
+        mailing.total_recipients += len(outcomes)
+        if has_more:
+            enqueue(MAILING_BATCH_TASK, mailing_id=mailing_id, vendor_ids=vendor_ids, after_id=batch[-1].id)
+        else:
+            if mailing.status != 'failed':
+                mailing.status = 'completed'
+            mailing.date_completed = timezone.now()
+        mailing.save(update_fields=['status', 'sent_count', 'failed_count', 'total_recipients', 'date_completed'])
+        return {"mailing_id": mailing_id, "sent": sent, "failed": len(outcomes) - sent}
@@ -5,8 +5,6 @@ import io
 
 from django.conf import settings
 from django.core.mail import EmailMessage
-from openpyxl import load_workbook, Workbook
-from openpyxl.worksheet.datavalidation import DataValidation
 from smtplib import SMTPServerDisconnected
 from urllib.parse import quote
 
@@ -32,10 +30,15 @@ from drf_spectacular.utils import extend_schema, extend_schema_view
 
 from companies.permissions import HasTenantAccess
 from core.utils import enforce_tenant_schema
-from inventory.models import IncomingProduct, Location, IncomingProductItem
+from inventory.models import IncomingProduct, Location, IncomingProductItem, LocationStock, MultiLocation
+from jobs.queue import enqueue
+from jobs.views import accepted_response
 from users.models import TenantUser
 from users.module_permissions import HasModulePermission
 from users.utils import convert_to_base64
+from shared.documents import DocumentPDFMixin
+from shared.fragment_cache import FragmentCacheMixin
+from shared.viewsets.conditional_get import CONDITIONAL_GET_ACTIONS
 from shared.viewsets.soft_delete_search_viewset import SearchDeleteViewSet, SearchViewSet
 from .models import (PurchaseRequest, PurchaseRequestItem, Department, Vendor,
                      Product, RequestForQuotation, RequestForQuotationItem, UnitOfMeasure, PurchaseOrder, PurchaseOrderItem, PRODUCT_CATEGORY, Currency)
@@ -44,7 +47,6 @@ from .serializers import (PurchaseRequestSerializer, VendorSerializer, ProductSe
                           UnitOfMeasureSerializer, PurchaseRequestItemSerializer,
                           PurchaseOrderSerializer, PurchaseOrderItemSerializer,
                           ExcelUploadSerializer, CurrencySerializer, SendMailSerializer)
-from .utils import generate_model_pdf
 from users.config import basic_action_permission_map
 
 
@@ -60,6 +62,9 @@ class CurrencyViewSet(SearchDeleteViewSet):
     serializer_class = CurrencySerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Currency.objects.all()
+    conditional_get_actions = CONDITIONAL_GET_ACTIONS
+    # No update timestamp: the version of the model stands in for it
+    conditional_get_models = [Currency]
 
 @extend_schema_view(
     list=extend_schema(tags=['Unit Of Measure']),
@@ -77,6 +82,9 @@ class UnitOfMeasureViewSet(SearchDeleteViewSet):
     permission_classes = [permissions.IsAuthenticated, HasModulePermission]
     search_fields = ['unit_name', 'unit_category']    
     action_permission_map = basic_action_permission_map
+    conditional_get_actions = CONDITIONAL_GET_ACTIONS
+    # No update timestamp: the version of the model stands in for it
+    conditional_get_models = [UnitOfMeasure]
 
 
 @extend_schema_view(
@@ -146,7 +154,9 @@ class VendorViewSet(SearchDeleteViewSet):
         - A 'Vendors' sheet for data entry (and import).
         - Data validation for email and phone number columns.
         """
-
+        # openpyxl is only needed by the Excel endpoints, so workers do not import it at boot
+        from openpyxl import Workbook
+        from openpyxl.worksheet.datavalidation import DataValidation
 
         wb = Workbook()
         ws_instructions = wb.active
@@ -203,6 +213,8 @@ class VendorViewSet(SearchDeleteViewSet):
 
     @action(detail=False, methods=['POST'], serializer_class=ExcelUploadSerializer)
     def upload_excel(self, request):
+        from openpyxl import load_workbook
+
         serializer = ExcelUploadSerializer(data=request.data)
         if serializer.is_valid():
             excel_file = serializer.validated_data.get('file')
@@ -360,6 +372,9 @@ class ProductViewSet(SearchDeleteViewSet):
     permission_classes = [permissions.IsAuthenticated, HasModulePermission]
     search_fields = ['product_name', 'product_category', "unit_of_measure__unit_name", ]
     filterset_fields = ["unit_of_measure__unit_name",]
+    conditional_get_actions = CONDITIONAL_GET_ACTIONS
+    # Quantities and unit details are read from these
+    conditional_get_models = [UnitOfMeasure, LocationStock, Location, MultiLocation, PurchaseOrder, PurchaseOrderItem]
     action_permission_map = {
         **basic_action_permission_map,
         "upload_excel": "create",
@@ -369,6 +384,8 @@ class ProductViewSet(SearchDeleteViewSet):
 
     @action(detail=False, methods=['POST'], serializer_class=ExcelUploadSerializer)
     def upload_excel(self, request):
+        from openpyxl import load_workbook
+
         serializer = ExcelUploadSerializer(data=request.data)
         if serializer.is_valid():
             excel_file = serializer.validated_data['file']
@@ -514,6 +531,9 @@ class ProductViewSet(SearchDeleteViewSet):
         - A list of all available unit_of_measure names at the time of download.
         - Data validation for each column.
         """
+        from openpyxl import Workbook
+        from openpyxl.worksheet.datavalidation import DataValidation
+
         wb = Workbook()
         ws_instructions = wb.active
         ws_instructions.title = "Instructions"
@@ -616,12 +636,8 @@ class ProductViewSet(SearchDeleteViewSet):
     @action(detail=False, methods=['DELETE'], permission_classes=[IsAdminUser], url_path='delete-all',
             url_name='delete_all_products')
     def delete_all_products(self, request):
-        deleted_count, _ = Product.objects.all().delete()
-
-        return Response(
-            {"message": f"Successfully deleted {deleted_count} products."},
-            status=status.HTTP_200_OK
-        )
+        job = enqueue('purchase.delete_all_products', tenant=request.tenant, created_by=request.user.id)
+        return accepted_response(request, job, "Product deletion has been queued.")
 
 
 @extend_schema_view(
@@ -795,7 +811,7 @@ class PurchaseRequestItemViewSet(SearchViewSet):
     partial_update=extend_schema(tags=['Request For Quotation']),
     destroy=extend_schema(tags=['Request For Quotation']),
 )
-class RequestForQuotationViewSet(SearchDeleteViewSet):
+class RequestForQuotationViewSet(DocumentPDFMixin, SearchDeleteViewSet):
     queryset = RequestForQuotation.objects.all()
     serializer_class = RequestForQuotationSerializer
     app_label = "purchase"
@@ -817,6 +833,7 @@ class RequestForQuotationViewSet(SearchDeleteViewSet):
         "rejected_list": "view",
         "convert_to_po": "create",
         "send_email": "edit",
+        "pdf": "view",
     }
 
 
@@ -1022,7 +1039,7 @@ class RequestForQuotationItemViewSet(SearchViewSet):
     partial_update=extend_schema(tags=['Purchase Orders']),
     destroy=extend_schema(tags=['Purchase Orders']),
 )
-class PurchaseOrderViewSet(SearchDeleteViewSet):
+class PurchaseOrderViewSet(DocumentPDFMixin, FragmentCacheMixin, SearchDeleteViewSet):
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
     app_label = "purchase"
@@ -1042,8 +1059,11 @@ class PurchaseOrderViewSet(SearchDeleteViewSet):
         "awaiting_list": "view",
         "cancelled_list": "view",
         "completed_list": "view",
-        "get_unrelated_po": "view"
+        "get_unrelated_po": "view",
+        "pdf": "view",
     }
+    fragment_cache_statuses = ('completed', 'cancelled')
+    fragment_cache_models = (Vendor, Currency, Location, Product, IncomingProduct)
 
     def perform_create(self, serializer):
         # Ensure the user is a TenantUser
@@ -1059,6 +1079,17 @@ class PurchaseOrderViewSet(SearchDeleteViewSet):
 
         serializer.save(created_by=tenant_user)
 
+    def retrieve(self, request, *args, **kwargs):
+        data = dict(self.get_cached_representation(lambda instance: self.get_serializer(instance).data))
+        # Navigation changes with every new order, so it is never cached
+        current_id = self.kwargs[self.lookup_url_kwarg]
+        queryset = self.get_queryset()
+        next_instance = queryset.filter(pk__gt=current_id).order_by('pk').values_list('pk', flat=True).first()
+        prev_instance = queryset.filter(pk__lt=current_id).order_by('-pk').values_list('pk', flat=True).first()
+        data['next_id'] = next_instance
+        data['prev_id'] = prev_instance
+        data['total_records'] = queryset.count()
+        return Response(data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'])
     def check_po_editable(self, po):
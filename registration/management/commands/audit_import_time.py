@@ -0,0 +1,70 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker imports before it serves its first request
+BOOT_SCRIPT = (
+    'from django.core.wsgi import get_wsgi_application; '
+    'get_wsgi_application(); '
+    'import {urlconfs}'
+)
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+
+def parse_import_time(output):
+    """Parse `python -X importtime` output into {module: (self us, cumulative us)}."""
+    modules = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            modules[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Measures the import cost of a worker boot with `python -X importtime` (settings, apps and both '
+            'URLconfs) and lists the most expensive modules and top-level packages.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=30, help='Number of modules to list.')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative',
+                            help='Order modules by cumulative or self import time.')
+        parser.add_argument('--module', action='append', default=[],
+                            help='Only list modules under this package. Can be given more than once.')
+
+    def handle(self, *args, **options):
+        urlconfs = ', '.join([settings.ROOT_URLCONF, settings.PUBLIC_SCHEMA_URLCONF])
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT.format(urlconfs=urlconfs)],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Worker boot failed:\n{result.stderr[-2000:]}')
+
+        modules = parse_import_time(result.stderr)
+        total = sum(self_time for self_time, _ in modules.values())
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(modules)} modules in {total / 1000:.1f} ms'))
+
+        packages = defaultdict(int)
+        for name, (self_time, _) in modules.items():
+            packages[name.split('.')[0]] += self_time
+        self.stdout.write(self.style.NOTICE('Top-level packages by self import time:'))
+        for name, self_time in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]:
+            self.stdout.write(f'{self_time / 1000:10.1f} ms  {name}')
+
+        if options['module']:
+            modules = {
+                name: times for name, times in modules.items()
+                if any(name == prefix or name.startswith(f'{prefix}.') for prefix in options['module'])
+            }
+        index = 1 if options['sort'] == 'cumulative' else 0
+        self.stdout.write(self.style.NOTICE(f'Modules by {options["sort"]} import time:'))
+        for name, times in sorted(modules.items(), key=lambda item: -item[1][index])[:options['limit']]:
+            self.stdout.write(f'{times[1] / 1000:10.1f} ms  {times[0] / 1000:10.1f} ms self  {name}')
@@ -0,0 +1,107 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.commands.migrate import Command as MigrateCommand
+from django.db import connection, connections
+from django_tenants.migration_executors.base import run_migrations
+from django_tenants.utils import get_tenant_model
+
+from registration.models import TenantMigrationState
+from registration.utils import get_tenant_migration_version
+
+
+def close_connections():
+    # Forked workers must open their own database connections
+    connections.close_all()
+
+
+def migrate_schema(schema_name, options):
+    started = time.monotonic()
+    try:
+        run_migrations([], options, 'parallel', schema_name, allow_atomic=False)
+    except Exception:
+        return schema_name, traceback.format_exc(), time.monotonic() - started
+    return schema_name, None, time.monotonic() - started
+
+
+class Command(BaseCommand):
+    help = ('Applies tenant migrations to every tenant schema with a pool of worker processes. '
+            'Schemas already at the current migration state are skipped, so an interrupted run '
+            'resumes where it stopped. Run `migrate_schemas --shared` for the public schema first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Number of worker processes.')
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only migrate this schema. Can be given multiple times.')
+        parser.add_argument('--force', action='store_true',
+                            help='Ignore the cached migration state and migrate every schema.')
+
+    def handle(self, *args, **options):
+        connection.set_schema_to_public()
+        version = get_tenant_migration_version()
+
+        schemas = get_tenant_model().objects.exclude(schema_name='public').values_list('schema_name', flat=True)
+        if options['schemas']:
+            schemas = schemas.filter(schema_name__in=options['schemas'])
+        schemas = list(schemas)
+
+        if not options['force']:
+            up_to_date = set(TenantMigrationState.objects.filter(
+                schema_name__in=schemas, migration_version=version, status='done'
+            ).values_list('schema_name', flat=True))
+            pending = [schema for schema in schemas if schema not in up_to_date]
+        else:
+            pending = schemas
+
+        skipped = len(schemas) - len(pending)
+        self.stdout.write(self.style.NOTICE(
+            f'{len(pending)} schema(s) to migrate, {skipped} already up to date (version {version[:12]}).'
+        ))
+        if not pending:
+            return
+
+        for schema_name in pending:
+            TenantMigrationState.objects.update_or_create(
+                schema_name=schema_name, defaults={'status': 'running', 'error': None}
+            )
+
+        # Build the migrate options once and hand the same plan to every worker
+        migrate_options = vars(MigrateCommand().create_parser('manage.py', 'migrate').parse_args([]))
+        migrate_options.update({
+            'verbosity': max(options['verbosity'] - 1, 0),
+            'interactive': False,
+            'skip_checks': True,
+        })
+
+        failures = []
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max(options['processes'], 1), initializer=close_connections) as pool:
+            futures = [pool.submit(migrate_schema, schema_name, migrate_options) for schema_name in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                schema_name, error, duration = future.result()
+                connection.set_schema_to_public()
+                if error:
+                    failures.append(schema_name)
+                    TenantMigrationState.objects.filter(schema_name=schema_name).update(
+                        status='failed', error=error, duration=duration
+                    )
+                    self.stdout.write(self.style.ERROR(
+                        f'[{done}/{len(pending)}] {schema_name} failed after {duration:.1f}s'
+                    ))
+                    self.stdout.write(error)
+                else:
+                    TenantMigrationState.objects.filter(schema_name=schema_name).update(
+                        status='done', error=None, duration=duration, migration_version=version
+                    )
+                    self.stdout.write(self.style.SUCCESS(
+                        f'[{done}/{len(pending)}] {schema_name} migrated in {duration:.1f}s'
+                    ))
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} schema(s) failed to migrate: {", ".join(failures)}. '
+                f'Re-run the command to retry them.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Migrated {len(pending)} schema(s).'))
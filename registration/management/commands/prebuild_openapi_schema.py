@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.openapi import get_schema_urlconfs, write_schema_artifact
+
+
+class Command(BaseCommand):
+    help = ('Generates the OpenAPI schema of the tenant and public URLconfs and writes them to '
+            'OPENAPI_SCHEMA_DIR, so workers serve /schema/ without introspecting the API. Run on every deploy.')
+
+    def handle(self, *args, **options):
+        for urlconf in get_schema_urlconfs():
+            artifact_path = write_schema_artifact(urlconf)
+            self.stdout.write(self.style.SUCCESS(f'Wrote OpenAPI schema of {urlconf} to {artifact_path}'))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django_tenants.utils import schema_context, schema_exists
+
+from inventory.utilities.defaults import create_default_config
+from registration.models import SpareSchema
+from registration.utils import create_spare_schema, drop_spare_schema, get_schema_migration_version
+
+
+class Command(BaseCommand):
+    help = ('Migrates and seeds the tenant template schema that new tenants are cloned from, '
+            'then refills the pool of spare schemas. Run after every deploy that adds tenant migrations.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop and recreate the template schema from scratch.')
+        parser.add_argument('--spares', type=int, default=settings.TENANT_SPARE_SCHEMAS,
+                            help='Number of spare schemas to keep in the pool.')
+
+    def handle(self, *args, **options):
+        template = settings.TENANT_TEMPLATE_SCHEMA
+        connection.set_schema_to_public()
+
+        if options['rebuild'] and schema_exists(template):
+            self.stdout.write(self.style.NOTICE(f'Dropping template schema: {template}'))
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP SCHEMA "{template}" CASCADE')
+
+        if not schema_exists(template):
+            self.stdout.write(self.style.NOTICE(f'Creating template schema: {template}'))
+            with connection.cursor() as cursor:
+                cursor.execute(f'CREATE SCHEMA "{template}"')
+
+        self.stdout.write(self.style.NOTICE(f'Migrating template schema: {template}'))
+        call_command('migrate_schemas', tenant=True, schema_name=template, interactive=False,
+                     verbosity=options['verbosity'])
+
+        with schema_context(template):
+            created = create_default_config()
+        self.stdout.write(self.style.SUCCESS(f'Seeded template schema {template}: {created}'))
+
+        connection.set_schema_to_public()
+        version = get_schema_migration_version(template)
+        stale = SpareSchema.objects.exclude(template_version=version)
+        for spare in stale:
+            drop_spare_schema(spare)
+            self.stdout.write(self.style.WARNING(f'Dropped stale spare schema: {spare.schema_name}'))
+
+        while SpareSchema.objects.count() < options['spares']:
+            spare = create_spare_schema()
+            self.stdout.write(self.style.SUCCESS(f'Created spare schema: {spare.schema_name}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Template {template} is ready with {SpareSchema.objects.count()} spare schema(s).'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpareSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('template_version', models.CharField(max_length=64)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_on'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0002_spareschema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantMigrationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('migration_version', models.CharField(blank=True, default='', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
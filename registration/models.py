@@ -6,6 +6,9 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 import random
 from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 
 class Tenant(TenantMixin):
@@ -35,6 +38,47 @@ class Domain(DomainMixin):
     pass
 
 
+class SpareSchema(models.Model):
+    """
+    A pre-provisioned schema cloned from the tenant template, waiting to be
+    renamed and handed to a newly registered tenant.
+    """
+    schema_name = models.CharField(max_length=63, unique=True)
+    template_version = models.CharField(max_length=64)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_on']
+
+    def __str__(self):
+        return self.schema_name
+
+
+
+
+MIGRATION_STATE_STATUS = (
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+)
+
+
+class TenantMigrationState(models.Model):
+    """
+    Last migration run per tenant schema. `migration_version` is the fingerprint of the
+    tenant migration graph a schema was brought up to, so schemas already at the
+    current fingerprint can be skipped and interrupted runs resumed.
+    """
+    schema_name = models.CharField(max_length=63, unique=True)
+    migration_version = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=20, choices=MIGRATION_STATE_STATUS, default='pending')
+    error = models.TextField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.schema_name}: {self.status}"
 
 
 class UserProfile(models.Model):
@@ -81,3 +125,16 @@ class AccessRight(models.Model):
     
 
 
+
+
+@receiver([post_save, post_delete], sender=Domain)
+def clear_domain_cache(sender, instance, **kwargs):
+    from .utils import get_domain_cache_key
+    caches['global'].delete(get_domain_cache_key(instance.domain))
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def clear_tenant_domain_cache(sender, instance, **kwargs):
+    from .utils import get_domain_cache_key
+    domains = Domain.objects.filter(tenant_id=instance.pk).values_list('domain', flat=True)
+    caches['global'].delete_many([get_domain_cache_key(domain) for domain in domains])
@@ -14,7 +14,7 @@ from django.utils.text import slugify
 from django_tenants.utils import schema_context
 from django_tenants.utils import tenant_context
 
-from .utils import generate_otp
+from .utils import generate_otp, provision_tenant_schema, schedule_spare_schema_refill
 from django.contrib.auth.models import Group
 
 
@@ -116,15 +116,20 @@ class TenantRegistrationSerializer(serializers.ModelSerializer):
             user = user_serializer.save()
 
         schema_name = slugify(validated_data['company_name'])
-        tenant = Tenant.objects.create(
-            schema_name=schema_name,
-            company_name=validated_data['company_name'],
-            otp=hashed_otp,
-            otp_requested_at=timezone.now(),
-            created_by=user,
-            is_verified=False
-        )
-        tenant.save()
+        with transaction.atomic():
+            # Clone the template (or take a spare) so Tenant.save finds the schema ready
+            provisioned_from = provision_tenant_schema(schema_name)
+            tenant = Tenant.objects.create(
+                schema_name=schema_name,
+                company_name=validated_data['company_name'],
+                otp=hashed_otp,
+                otp_requested_at=timezone.now(),
+                created_by=user,
+                is_verified=False
+            )
+        if provisioned_from is not None:
+            # Also after a clone: the pool was empty then
+            schedule_spare_schema_refill()
         with tenant_context(tenant):
             admin_group, created = Group.objects.get_or_create(name='Admin')
             tenant_user = TenantUser.objects.create(
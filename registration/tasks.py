@@ -0,0 +1,15 @@
+from django.conf import settings
+
+from jobs.queue import task
+from .utils import REFILL_SPARE_SCHEMAS_TASK, count_spare_schemas, create_spare_schema
+
+
+@task(REFILL_SPARE_SCHEMAS_TASK)
+def refill_spare_schemas(size=None):
+    size = settings.TENANT_SPARE_SCHEMAS if size is None else size
+    created = 0
+    # Stale spares are not counted: signups cannot take them
+    while count_spare_schemas() < size:
+        create_spare_schema()
+        created += 1
+    return {"created": created}
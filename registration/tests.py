@@ -1,3 +1,142 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.commands.migrate import Command as MigrateCommand
+from django.db import connection
+from django.test import SimpleTestCase
+from django_tenants.test.cases import TenantTestCase
+from django_tenants.utils import schema_exists
+
+from jobs.models import Job
+from .management.commands.audit_import_time import BOOT_SCRIPT, parse_import_time
+from .management.commands.migrate_tenants import migrate_schema
+from .models import SpareSchema, TenantMigrationState
+from .utils import (REFILL_SPARE_SCHEMAS_TASK, create_spare_schema, get_cached_tenant_for_domain,
+                    get_domain_cache_key, get_tenant_migration_version, provision_tenant_schema,
+                    schedule_spare_schema_refill)
+
+
+class ProvisionTenantSchemaTests(TenantTestCase):
+    """The migrated schema of the test tenant serves as the tenant template."""
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(self.settings(TENANT_TEMPLATE_SCHEMA=self.tenant.schema_name, TENANT_SPARE_SCHEMAS=1))
+        self.addCleanup(connection.set_tenant, self.tenant)
+
+    def test_template_is_cloned_when_no_spare_is_available(self):
+        self.assertEqual(provision_tenant_schema('signup_clone'), 'clone')
+
+        self.assertTrue(schema_exists('signup_clone'))
+
+    def test_spare_matching_the_template_is_renamed(self):
+        spare = create_spare_schema()
+
+        self.assertEqual(provision_tenant_schema('signup_spare'), 'spare')
+
+        self.assertTrue(schema_exists('signup_spare'))
+        self.assertFalse(schema_exists(spare.schema_name))
+        self.assertFalse(SpareSchema.objects.exists())
+
+    def test_stale_spare_is_not_used(self):
+        SpareSchema.objects.create(schema_name='spare_stale', template_version='stale')
+
+        self.assertEqual(provision_tenant_schema('signup_stale'), 'clone')
+        self.assertTrue(SpareSchema.objects.filter(schema_name='spare_stale').exists())
+
+    def test_refill_is_scheduled_once_when_the_pool_is_short(self):
+        # Also after a clone, when the pool is empty
+        provision_tenant_schema('signup_refill')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(schedule_spare_schema_refill())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(schedule_spare_schema_refill())
+
+        self.assertEqual(Job.objects.filter(task=REFILL_SPARE_SCHEMAS_TASK, status='queued').count(), 1)
+
+    def test_no_refill_is_scheduled_when_the_pool_is_full(self):
+        create_spare_schema()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(schedule_spare_schema_refill())
+
+        self.assertFalse(Job.objects.filter(task=REFILL_SPARE_SCHEMAS_TASK).exists())
+
+
+class MigrateTenantsTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(connection.set_tenant, self.tenant)
+
+    def test_migration_version_is_a_stable_fingerprint(self):
+        self.assertEqual(get_tenant_migration_version(), get_tenant_migration_version())
+        self.assertEqual(len(get_tenant_migration_version()), 40)
+
+    def test_schema_at_the_current_version_is_skipped(self):
+        TenantMigrationState.objects.create(schema_name=self.tenant.schema_name, status='done',
+                                            migration_version=get_tenant_migration_version())
+        out = StringIO()
+
+        call_command('migrate_tenants', schemas=[self.tenant.schema_name], stdout=out)
+
+        self.assertIn('0 schema(s) to migrate, 1 already up to date', out.getvalue())
+
+    def test_migrate_schema_reports_success_of_a_migrated_schema(self):
+        options = vars(MigrateCommand().create_parser('manage.py', 'migrate').parse_args([]))
+        options.update({'verbosity': 0, 'interactive': False, 'skip_checks': True})
+
+        schema_name, error, duration = migrate_schema(self.tenant.schema_name, options)
+
+        self.assertEqual((schema_name, error), (self.tenant.schema_name, None))
+        self.assertGreaterEqual(duration, 0)
+
+
+class DomainCacheTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['global'].delete(get_domain_cache_key(self.domain.domain))
+
+    def test_domain_lookup_is_cached(self):
+        self.assertEqual(get_cached_tenant_for_domain(self.domain.domain).pk, self.tenant.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_tenant_for_domain(self.domain.domain).pk, self.tenant.pk)
+
+    def test_saving_the_domain_clears_its_cached_lookup(self):
+        get_cached_tenant_for_domain(self.domain.domain)
+
+        self.domain.save()
+
+        with self.assertNumQueries(1):
+            get_cached_tenant_for_domain(self.domain.domain)
+
+
+class ImportTimeTests(SimpleTestCase):
+
+    def test_import_time_output_is_parsed(self):
+        output = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       120 |        120 |   pytz.lazy\n'
+                  'import time:      1500 |       1620 | pytz\n')
+
+        self.assertEqual(parse_import_time(output), {'pytz.lazy': (120, 120), 'pytz': (1500, 1620)})
+
+    def test_worker_boot_leaves_out_the_packages_loaded_on_first_use(self):
+        urlconfs = ', '.join([settings.ROOT_URLCONF, settings.PUBLIC_SCHEMA_URLCONF])
+        script = BOOT_SCRIPT.format(urlconfs=urlconfs) + "; import sys; print(','.join(sorted(sys.modules)))"
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                                cwd=settings.BASE_DIR)
+
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        modules = set(result.stdout.strip().rsplit('\n', 1)[-1].split(','))
+        for package in ('openpyxl', 'reportlab'):
+            self.assertNotIn(package, modules)
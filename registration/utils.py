@@ -1,19 +1,28 @@
+import hashlib
 import random
+import uuid
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.mail import EmailMessage
 from django.utils import timezone
 from django.utils.timezone import is_aware, make_aware
-from django.db import connection
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
 from contextlib import contextmanager
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from jobs.models import Job
+from jobs.queue import enqueue
 from registration.config import RIGHTS
-from registration.models import AccessRight, Tenant
+from registration.models import AccessRight, Domain, SpareSchema, Tenant
+from shared.cache import get_global_cache
 from users.models import TenantUser
-from django_tenants.utils import schema_context
+from django_tenants.clone import CloneSchema
+from django_tenants.postgresql_backend.base import is_valid_schema_name
+from django_tenants.utils import schema_context, schema_exists
 import logging
 
 
@@ -85,11 +94,13 @@ def make_authentication(userid, all_user_details=False):
         for tenant in all_tenants:
             try:
                 with schema_context(tenant.schema_name):
-                    if TenantUser.objects.filter(user_id=userid).exists():
-                        tenant_user = TenantUser.objects.get(user_id=userid)
-                        if all_user_details:
-                            return tenant_user
-                        return tenant_user.id, tenant.schema_name, tenant.company_name, tenant_user.user_image
+                    if all_user_details:
+                        if TenantUser.objects.filter(user_id=userid).exists():
+                            return TenantUser.objects.get(user_id=userid)
+                        continue
+                    tenant_user = TenantUser.objects.filter(user_id=userid).values_list('id', 'user_image').first()
+                    if tenant_user is not None:
+                        return tenant_user[0], tenant.schema_name, tenant.company_name, tenant_user[1]
             except TenantUser.DoesNotExist:
                 logger.warning(f"User {userid} not found in schema {tenant.schema_name}")
                 continue
@@ -105,4 +116,143 @@ def conditional_rights_population():
         rights_obj_list = [AccessRight(name=right) for right in RIGHTS]
         created_rights = AccessRight.objects.bulk_create(rights_obj_list)
         return created_rights
-    return None
\ No newline at end of file
+    return None
+
+def get_schema_migration_version(schema_name):
+    """Fingerprint of the migrations applied to a schema, used to spot stale spares."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT app, name FROM "{schema_name}".django_migrations ORDER BY app, name')
+        applied = ",".join(f"{app}.{name}" for app, name in cursor.fetchall())
+    return hashlib.sha1(applied.encode()).hexdigest()
+
+
+def partition_cloned_schema(schema_name, template):
+    """
+    clone_schema copies partitioned tables as plain ones, without their foreign keys; convert the
+    stock move ledger and its archive in a cloned schema back into partitioned tables, with the
+    foreign keys and indexes of the ledger in `template`.
+    """
+    from inventory.models import ArchivedStockMove, StockMove
+    from inventory.utilities.partitions import copy_foreign_keys_and_indexes, create_archive_table, partition_table
+
+    with schema_context(schema_name):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            converted = partition_table(schema_editor, StockMove, settings.STOCK_MOVE_PARTITION_MONTHS_AHEAD)
+            with schema_editor.connection.cursor() as cursor:
+                if converted:
+                    copy_foreign_keys_and_indexes(cursor, template, StockMove._meta.db_table)
+                create_archive_table(cursor, StockMove._meta.db_table, ArchivedStockMove._meta.db_table)
+
+
+def create_spare_schema():
+    """Clone the tenant template into a new spare schema and register it in the pool."""
+    template = settings.TENANT_TEMPLATE_SCHEMA
+    schema_name = f"spare_{uuid.uuid4().hex[:16]}"
+    connection.set_schema_to_public()
+    with transaction.atomic():
+        CloneSchema().clone_schema(template, schema_name, set_connection=False)
+        partition_cloned_schema(schema_name, template)
+        return SpareSchema.objects.create(
+            schema_name=schema_name,
+            template_version=get_schema_migration_version(template),
+        )
+
+
+REFILL_SPARE_SCHEMAS_TASK = 'registration.refill_spare_schemas'
+
+
+def count_spare_schemas(template=None):
+    """Number of spare schemas matching the current tenant template, the ones signups can take."""
+    template = template or settings.TENANT_TEMPLATE_SCHEMA
+    return SpareSchema.objects.filter(template_version=get_schema_migration_version(template)).count()
+
+
+def schedule_spare_schema_refill():
+    """
+    Queue a refill of the spare schema pool, once the current transaction commits, when it holds
+    fewer than TENANT_SPARE_SCHEMAS spares and no refill is queued or running yet.
+    """
+    if count_spare_schemas() >= settings.TENANT_SPARE_SCHEMAS:
+        return False
+    if Job.objects.filter(task=REFILL_SPARE_SCHEMAS_TASK, status__in=['queued', 'running']).exists():
+        return False
+    transaction.on_commit(lambda: enqueue(REFILL_SPARE_SCHEMAS_TASK, tenant=None))
+    return True
+
+
+def drop_spare_schema(spare):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{spare.schema_name}" CASCADE')
+        spare.delete()
+
+
+def provision_tenant_schema(schema_name):
+    """
+    Create `schema_name` from the pre-migrated, pre-seeded tenant template so that
+    saving the Tenant afterwards finds the schema already in place and skips migrations.
+
+    A spare schema from the pool is renamed when one matching the template is available,
+    otherwise the template is cloned with the server-side clone_schema function.
+    Must run inside the same transaction that creates the Tenant so a failed signup
+    rolls the schema back. Returns 'spare', 'clone' or None when no template exists,
+    in which case the Tenant falls back to running its migrations.
+    """
+    if not is_valid_schema_name(schema_name):
+        raise ValueError(f"Invalid schema name: '{schema_name}'")
+    template = settings.TENANT_TEMPLATE_SCHEMA
+    if not schema_exists(template):
+        logger.warning("Tenant template schema '%s' does not exist; migrating '%s' from scratch.",
+                       template, schema_name)
+        return None
+
+    spare = (
+        SpareSchema.objects.select_for_update(skip_locked=True)
+        .filter(template_version=get_schema_migration_version(template))
+        .first()
+    )
+    if spare is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER SCHEMA "{spare.schema_name}" RENAME TO "{schema_name}"')
+        spare.delete()
+        return 'spare'
+
+    CloneSchema().clone_schema(template, schema_name, set_connection=False)
+    partition_cloned_schema(schema_name, template)
+    return 'clone'
+
+
+def get_tenant_app_labels():
+    labels = set()
+    for app_config in apps.get_app_configs():
+        for entry in settings.TENANT_APPS:
+            if entry == app_config.name or entry.startswith(f"{app_config.name}.apps."):
+                labels.add(app_config.label)
+    return labels
+
+
+def get_tenant_migration_version():
+    """Fingerprint of the latest tenant-app migrations on disk (no database access)."""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    tenant_labels = get_tenant_app_labels()
+    leaves = sorted(
+        f"{app_label}.{name}" for app_label, name in loader.graph.leaf_nodes() if app_label in tenant_labels
+    )
+    return hashlib.sha1(",".join(leaves).encode()).hexdigest()
+
+
+TENANT_DOMAIN_CACHE_TIMEOUT = 300
+
+
+def get_domain_cache_key(hostname):
+    return f"tenant-domain:{hostname}"
+
+
+def get_cached_tenant_for_domain(hostname):
+    """Resolve a hostname to its Tenant, caching the lookup. Raises Domain.DoesNotExist."""
+    key = get_domain_cache_key(hostname)
+    tenant = get_global_cache().get(key)
+    if tenant is None:
+        tenant = Domain.objects.select_related('tenant').get(domain=hostname).tenant
+        get_global_cache().set(key, tenant, TENANT_DOMAIN_CACHE_TIMEOUT)
+    return tenant
@@ -24,6 +24,7 @@ from django_tenants.utils import schema_context, tenant_context
 from rest_framework.permissions import AllowAny
 from rest_framework import permissions
 from django.contrib.auth.models import Group
+from shared.images import get_image_url
 from shared.viewsets.soft_delete_search_viewset import SoftDeleteWithModelViewSet
 from .models import AccessRight
 from django.contrib.contenttypes.models import ContentType
@@ -200,7 +201,7 @@ class LoginView(APIView):
                 'id': user.id,
                 'username': user.username,
                 'email': user.email,
-                'user_image': tenant_user_image,
+                'user_image': get_image_url(tenant_user_image, request),
             },
             "tenant_id": tenant_id,
             "tenant_schema_name": tenant_schema_name,
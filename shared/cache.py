@@ -0,0 +1,208 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_key(key, key_prefix, version):
+    """
+    Cache key function used by the tenant-aware caches (the KEY_FUNCTION setting).
+    Keys are prefixed with the active schema, so tenants never read each other's entries.
+    """
+    return f'{connection.schema_name}:{key_prefix}:{version}:{key}'
+
+
+def get_global_cache():
+    """The cache for entries shared by all tenants, such as domain lookups. Keys are not schema-prefixed."""
+    return caches['global']
+
+
+# Backends whose entries live in the memory of one process: invalidation done by the job worker or
+# another gunicorn worker would never reach them
+PER_PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache_backend(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    return [
+        checks.Error(
+            f"The '{alias}' cache uses {config['BACKEND']}, which is not shared between processes.",
+            hint="Set CACHE_LOCATION to a Redis URL (see the compose files), or CACHE_BACKEND to another "
+                 "shared backend.",
+            id='shared.E001',
+        )
+        for alias, config in settings.CACHES.items()
+        if config['BACKEND'] in PER_PROCESS_CACHE_BACKENDS
+    ]
+
+
+# Per-model version counters
+# Every cached value that depends on a model includes the model's version in its key, so bumping
+# the version invalidates all of them at once without having to know or delete their keys.
+# Only the models registered with `register_versioned_model` have a version. They are registered
+# at import of their app's models or signals module, so every process (web or job worker) bumps
+# the versions of the rows it saves.
+
+_versioned_models = set()
+
+
+def _model_version_key(model):
+    return f'model-version:{model._meta.concrete_model._meta.label_lower}'
+
+
+def register_versioned_model(*models):
+    """Bump the version of each of `models` whenever one of its rows is saved or deleted."""
+    for model in models:
+        label = model._meta.concrete_model._meta.label_lower
+        _versioned_models.add(label)
+        post_save.connect(bump_saved_model_version, sender=model, dispatch_uid=f'model-version:{label}')
+        post_delete.connect(bump_saved_model_version, sender=model, dispatch_uid=f'model-version-delete:{label}')
+
+
+def _check_versioned(model):
+    if model._meta.concrete_model._meta.label_lower not in _versioned_models:
+        raise ImproperlyConfigured(
+            f"{model._meta.label} has no version: register it with register_versioned_model() so its saves "
+            f"invalidate what is cached against it."
+        )
+
+
+def get_model_version(model):
+    _check_versioned(model)
+    return cache.get_or_set(_model_version_key(model), 1, None)
+
+
+def get_models_version(models):
+    for model in models:
+        _check_versioned(model)
+    keys = [_model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_model_version(model):
+    """
+    Invalidate everything cached against `model` in the current schema.
+    Call it after queryset.update() and bulk_create(), which send no signals.
+    """
+    key = _model_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not cached yet or evicted; anything cached against the old value is unreachable after this
+        cache.set(key, int(time.time()), None)
+
+
+def bump_saved_model_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+# Single-flight recomputation
+# On a miss only one caller recomputes the value: threads of the same process wait on a local lock,
+# other processes and nodes wait on a lock entry added to the shared cache.
+
+_MISSING = object()
+# A fixed set of striped locks keeps memory bounded however many keys are computed
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def _get_local_lock(key):
+    return _local_locks[int(hashlib.md5(key.encode()).hexdigest(), 16) % len(_local_locks)]
+
+
+def get_or_compute(key, compute, timeout=300, cacheable=None, lock_timeout=30, wait_interval=0.05):
+    """
+    Return the cached value of `key`, calling `compute()` to fill it on a miss.
+    Concurrent misses for the same key run `compute()` once; the others wait for its result.
+    Values for which `cacheable(value)` is false are returned without being stored.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _get_local_lock(connection.schema_name + key):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'lock:{key}'
+        deadline = time.monotonic() + lock_timeout
+        while not cache.add(lock_key, 1, lock_timeout):
+            # Another process is computing the value
+            if time.monotonic() > deadline:
+                break
+            time.sleep(wait_interval)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        try:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+    return value
+
+
+def make_cache_key(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_response(timeout=300, models=None, per_user=True):
+    """
+    Decorator for viewset actions that caches successful GET responses.
+
+    The key is made of the view, the action, the full path with its query string, the user when
+    `per_user` is set, and the version counters of `models` (the viewset's queryset model by default),
+    so saving or deleting any row of those models invalidates the cached responses. The models must be
+    registered with `register_versioned_model`.
+
+        @cache_response(timeout=60, models=[Product, Location])
+        def list(self, request, *args, **kwargs):
+            return super().list(request, *args, **kwargs)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return func(self, request, *args, **kwargs)
+
+            dependencies = models or [self.get_queryset().model]
+            key = 'response:' + make_cache_key(
+                type(self).__module__, type(self).__name__, func.__name__, request.get_full_path(),
+                request.user.pk if per_user else '', get_models_version(dependencies),
+            )
+
+            def compute():
+                response = func(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    # Errors are returned as they are and never cached
+                    return response
+                return {'data': response.data, 'status': response.status_code}
+
+            cached = get_or_compute(key, compute, timeout, cacheable=lambda value: isinstance(value, dict))
+            if isinstance(cached, Response):
+                return cached
+            return Response(cached['data'], status=cached['status'])
+        return wrapper
+    return decorator
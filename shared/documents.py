@@ -0,0 +1,216 @@
+import functools
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from jobs.models import Job
+from jobs.queue import enqueue, task
+from jobs.views import accepted_response
+
+DOCUMENT_ROOT = 'documents'
+RENDER_TASK = 'documents.render'
+
+_renderers = {}
+
+
+def register_document(model, select_related=(), prefetch_related=()):
+    """
+    Register `render(instance, writer)` as the PDF renderer of `model`. Renderers live in each app's
+    documents.py, which is autodiscovered at startup. `select_related` and `prefetch_related` list
+    everything the renderer reads, so any number of documents loads with a fixed number of queries;
+    renderers must read related items with `.all()` for the prefetch to be used.
+    """
+    def decorator(render):
+        _renderers[model._meta.label_lower] = (model, render, select_related, prefetch_related)
+        return render
+    return decorator
+
+
+def get_renderer(label):
+    try:
+        return _renderers[label]
+    except KeyError:
+        raise LookupError(f"No document renderer registered for '{label}'.")
+
+
+def get_document_queryset(model):
+    """Queryset of `model` loading everything its renderer reads."""
+    _, _, select_related, prefetch_related = get_renderer(model._meta.label_lower)
+    return model.objects.select_related(*select_related).prefetch_related(*prefetch_related)
+
+
+@functools.cache
+def get_pdf_toolkit():
+    """
+    Import reportlab and load the font metrics once per process, so only the first document a
+    worker renders pays for them. Returns (Canvas class, page size).
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfgen.canvas import Canvas
+
+    for font_name in (DocumentWriter.font, DocumentWriter.bold_font):
+        pdfmetrics.getFont(font_name)
+    return Canvas, letter
+
+
+class DocumentWriter:
+    """Writes lines of text from the top of the page down, starting a new page when one is full."""
+    font = 'Helvetica'
+    bold_font = 'Helvetica-Bold'
+    font_size = 11
+    line_height = 20
+    margin = 60
+
+    def __init__(self, output):
+        canvas_class, self.page_size = get_pdf_toolkit()
+        # Pages are compressed as they are finished, keeping long documents small in memory
+        self.canvas = canvas_class(output, pagesize=self.page_size, pageCompression=1)
+        self.y = self.page_size[1] - self.margin
+
+    def new_page(self):
+        self.canvas.showPage()
+        self.y = self.page_size[1] - self.margin
+
+    def line(self, text='', bold=False, indent=0):
+        if self.y < self.margin:
+            self.new_page()
+        self.canvas.setFont(self.bold_font if bold else self.font, self.font_size)
+        self.canvas.drawString(self.margin + indent, self.y, str(text))
+        self.y -= self.line_height
+
+    def heading(self, text):
+        self.line(text, bold=True)
+        self.line()
+
+    def field(self, label, value):
+        self.line(f"{label}: {value if value not in (None, '') else 'None'}")
+
+    def save(self):
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+def _get_document_folder(instance):
+    return f'{DOCUMENT_ROOT}/{connection.schema_name}/{instance._meta.label_lower}/{instance.pk}'
+
+
+def get_document_name(instance):
+    """
+    Storage name of the rendered PDF of `instance`. It changes with `date_updated`, which models
+    registered with `register_fragment_model` also update when one of their items is saved, so edits
+    never serve a stale file.
+    """
+    updated = getattr(instance, 'date_updated', None)
+    stamp = updated.strftime('%Y%m%d%H%M%S%f') if updated else '0'
+    return f'{_get_document_folder(instance)}/{stamp}.pdf'
+
+
+def render_document(instance):
+    """Render the PDF of `instance` unless the current version is already on disk. Returns its storage name."""
+    name = get_document_name(instance)
+    if default_storage.exists(name):
+        return name
+    _, render, _, _ = get_renderer(instance._meta.label_lower)
+    output = io.BytesIO()
+    writer = DocumentWriter(output)
+    render(instance, writer)
+    writer.save()
+    saved_name = default_storage.save(name, ContentFile(output.getvalue()))
+    if saved_name != name:
+        # Another worker rendered the same version meanwhile and the storage picked a free name
+        default_storage.delete(saved_name)
+
+    # Only the latest version of a document is kept
+    folder = _get_document_folder(instance)
+    _, file_names = default_storage.listdir(folder)
+    for file_name in file_names:
+        if f'{folder}/{file_name}' != name:
+            default_storage.delete(f'{folder}/{file_name}')
+    return name
+
+
+@task(RENDER_TASK)
+def render_document_task(label, pk):
+    model = get_renderer(label)[0]
+    instance = get_document_queryset(model).get(pk=pk)
+    name = render_document(instance)
+    return {"name": name, "url": default_storage.url(name)}
+
+
+class DocumentPDFMixin:
+    """
+    Adds a `pdf` detail action. A document already rendered for its current version is streamed from
+    disk; otherwise rendering is queued as a background job and the response is `202 Accepted` with the
+    job's status URL. Once the job has succeeded, the same request returns the file.
+    The model needs a renderer registered with `register_document`, and the viewset must map
+    the `pdf` action in `action_permission_map`.
+    """
+
+    @action(detail=True, methods=['get'], url_path='pdf')
+    def pdf(self, request, *args, **kwargs):
+        instance = self.get_object()
+        name = get_document_name(instance)
+        if default_storage.exists(name):
+            filename = f'{instance._meta.verbose_name}_{instance.pk}.pdf'
+            return FileResponse(default_storage.open(name), as_attachment=True, filename=filename,
+                                content_type='application/pdf')
+
+        job_kwargs = {"label": instance._meta.label_lower, "pk": str(instance.pk)}
+        # Repeated requests while the document renders share one job
+        job = Job.objects.filter(task=RENDER_TASK, tenant=request.tenant, created_by=request.user.id,
+                                 kwargs=job_kwargs, status__in=('queued', 'running')).first()
+        if job is None:
+            job = enqueue(RENDER_TASK, tenant=request.tenant, created_by=request.user.id, **job_kwargs)
+        return accepted_response(request, job, "Document queued for rendering.")
+
+
+class BulkPrintMixin:
+    """
+    Adds a `bulk_print` list action returning the documents of many objects as one PDF, one document
+    per page run. It takes `?ids=a,b,c` or the viewset's usual filters and search, and loads all
+    documents and their items with a fixed number of queries. The whole PDF is built before anything
+    is sent: ReportLab keeps every finished page in memory until `save()`, which then writes the file
+    into a temporary file that spills to disk beyond BULK_PRINT_SPOOL_SIZE. Only that file is streamed
+    back in chunks; BULK_PRINT_MAX_DOCUMENTS bounds the memory a request can take.
+    """
+
+    @action(detail=False, methods=['get'], url_path='bulk-print')
+    def bulk_print(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        ids = request.query_params.get('ids')
+        if ids:
+            queryset = queryset.filter(pk__in=[value.strip() for value in ids.split(',') if value.strip()])
+
+        limit = settings.BULK_PRINT_MAX_DOCUMENTS
+        pks = list(queryset.values_list('pk', flat=True)[:limit + 1])
+        if not pks:
+            return Response({"error": "No documents match the request."}, status=status.HTTP_404_NOT_FOUND)
+        if len(pks) > limit:
+            return Response({"error": f"At most {limit} documents can be printed at once. Narrow the filters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        model = queryset.model
+        _, render, _, _ = get_renderer(model._meta.label_lower)
+        documents = get_document_queryset(model).in_bulk(pks)
+
+        output = tempfile.SpooledTemporaryFile(max_size=settings.BULK_PRINT_SPOOL_SIZE)
+        writer = DocumentWriter(output)
+        for index, pk in enumerate(pks):
+            if index:
+                writer.new_page()
+            render(documents[pk], writer)
+        writer.save()
+        output.seek(0)
+
+        filename = f'{model._meta.model_name}-{timezone.now():%Y%m%d%H%M%S}.pdf'
+        return FileResponse(output, as_attachment=True, filename=filename, content_type='application/pdf')
@@ -0,0 +1,80 @@
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from rest_framework.generics import get_object_or_404
+
+from shared.cache import cache, get_models_version
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_fragment_key(model, pk, stamp, variant='', models=()):
+    """
+    Key of the cached representation of one object. It includes `stamp`, the object's `date_updated`
+    read from the database, and the version counters of `models`, the other models the representation
+    reads from.
+    """
+    dependencies = get_models_version(models) if models else ''
+    return f'fragment:{model._meta.label_lower}:{pk}:{stamp.isoformat()}:{dependencies}:{variant}'
+
+
+def register_fragment_model(model, children=()):
+    """
+    Keep the `date_updated` of `model` objects current when one of their child items is saved or
+    deleted, so it stamps the whole document: cached fragments and rendered PDFs are keyed on it.
+    `children` is a list of (child model, foreign key attname).
+    """
+    for child_model, attname in children:
+        def touch_parent(sender, instance, attname=attname, **kwargs):
+            parent_pk = getattr(instance, attname, None)
+            if parent_pk is not None:
+                model._base_manager.filter(pk=parent_pk).update(date_updated=timezone.now())
+
+        uid = f'fragment:{model._meta.label_lower}:{child_model._meta.label_lower}'
+        post_save.connect(touch_parent, sender=child_model, weak=False, dispatch_uid=uid)
+        post_delete.connect(touch_parent, sender=child_model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+class FragmentCacheMixin:
+    """
+    Caches the serialized representation of detail objects in a terminal status.
+
+    `fragment_cache_statuses` lists the statuses whose documents no longer change in normal use;
+    `fragment_cache_models` lists the other models the representation reads from, which must be registered
+    with `register_versioned_model`. The model must be registered with `register_fragment_model` so saving
+    a child item updates its `date_updated`, which the fragments are keyed on.
+    """
+    fragment_cache_statuses = ()
+    fragment_cache_models = ()
+
+    def get_fragment_stamp(self):
+        """
+        Load only the primary key and `date_updated` of the requested object, with the same lookup,
+        filters and object permissions as `get_object()`. Raises Http404 when it does not exist.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        stamp = get_object_or_404(
+            queryset.select_related(None).prefetch_related(None).only(queryset.model._meta.pk.name, 'date_updated'),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(self.request, stamp)
+        return stamp
+
+    def get_cached_representation(self, build):
+        """Return `build(instance)` for the requested object, from the fragment cache when possible."""
+        stamp = self.get_fragment_stamp()
+        model = self.get_queryset().model
+        # Query params such as ?fields= change the representation
+        variant = f'{self.request.accepted_media_type or ""}?{self.request.query_params.urlencode()}'
+        key = get_fragment_key(model, stamp.pk, stamp.date_updated, variant=variant,
+                               models=self.fragment_cache_models)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        instance = self.get_object()
+        data = build(instance)
+        # Keyed on the stamp read above, so a save made meanwhile never gets the older representation
+        if (instance.date_updated == stamp.date_updated
+                and getattr(instance, 'status', None) in self.fragment_cache_statuses):
+            cache.set(key, data, FRAGMENT_CACHE_TIMEOUT)
+        return data
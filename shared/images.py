@@ -0,0 +1,110 @@
+import base64
+import binascii
+import hashlib
+import io
+import mimetypes
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+
+IMAGE_ROOT = 'images'
+ALLOWED_IMAGE_TYPES = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/jpg': 'jpg'}
+PIL_FORMATS = {'PNG': 'png', 'JPEG': 'jpg'}
+
+
+def is_stored_image(value):
+    """True for values that are storage names written by this module, False for legacy base64 blobs."""
+    return bool(value) and value.startswith(f'{IMAGE_ROOT}/')
+
+
+def get_thumbnail_name(name):
+    stem, _, extension = name.rpartition('.')
+    return f'{stem}_thumb.{extension}'
+
+
+def _build_name(folder, digest, extension):
+    # Content-hashed, so identical uploads share a file and names never collide
+    return f'{IMAGE_ROOT}/{connection.schema_name}/{folder}/{digest[:2]}/{digest}.{extension}'
+
+
+def _save_thumbnail(name, content):
+    from PIL import Image
+
+    thumbnail_name = get_thumbnail_name(name)
+    if default_storage.exists(thumbnail_name):
+        return
+    size = settings.IMAGE_THUMBNAIL_SIZE
+    with Image.open(content) as image:
+        image_format = image.format
+        image.thumbnail((size, size))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, format=image_format)
+    default_storage.save(thumbnail_name, ContentFile(output.getvalue()))
+
+
+def save_uploaded_image(image_file, folder, max_size=5 * 1024 * 1024):
+    """
+    Store an uploaded PNG or JPEG under MEDIA_ROOT with a content-hashed name and a thumbnail.
+    The upload is hashed and written in chunks, never read into memory at once.
+    Returns the storage name to keep on the model.
+    """
+    mime_type, _ = mimetypes.guess_type(image_file.name)
+    if mime_type not in ALLOWED_IMAGE_TYPES:
+        raise APIException(detail="Invalid file type. Only PNG and JPEG images are allowed.")
+    if image_file.size > max_size:
+        raise APIException(detail=f"File size exceeds the maximum limit of {max_size // (1024 * 1024)} MB.")
+
+    digest = hashlib.sha256()
+    for chunk in image_file.chunks():
+        digest.update(chunk)
+    name = _build_name(folder, digest.hexdigest(), ALLOWED_IMAGE_TYPES[mime_type])
+    if not default_storage.exists(name):
+        image_file.seek(0)
+        name = default_storage.save(name, image_file)
+    image_file.seek(0)
+    _save_thumbnail(name, image_file)
+    return name
+
+
+def save_base64_image(value, folder):
+    """Store a legacy base64 blob as a file. Returns the storage name, or None when it is not a valid image."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        content = base64.b64decode(value.split(',', 1)[-1], validate=True)
+        with Image.open(io.BytesIO(content)) as image:
+            extension = PIL_FORMATS.get(image.format)
+    except (binascii.Error, ValueError, UnidentifiedImageError):
+        return None
+    if extension is None:
+        return None
+    name = _build_name(folder, hashlib.sha256(content).hexdigest(), extension)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    _save_thumbnail(name, io.BytesIO(content))
+    return name
+
+
+def get_image_url(value, request=None, thumbnail=False):
+    """URL of a stored image. Legacy base64 values are returned unchanged until they are converted."""
+    if not is_stored_image(value):
+        return None if thumbnail else value
+    url = default_storage.url(get_thumbnail_name(value) if thumbnail else value)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class StoredImageField(serializers.ReadOnlyField):
+    """Read-only field rendering a stored image (or its thumbnail) as a URL."""
+
+    def __init__(self, thumbnail=False, **kwargs):
+        self.thumbnail = thumbnail
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return get_image_url(value, self.context.get('request'), thumbnail=self.thumbnail)
@@ -29,4 +29,26 @@ class GenericModel(models.Model):
         abstract = True
 
     def __str__(self):
-        return f"{self.__class__.__name__} - {self.pk}"
\ No newline at end of file
+        return f"{self.__class__.__name__} - {self.pk}"
+
+class StatusTransitionMixin:
+    """
+    Remembers the value of `transition_field` loaded from the database, so post_save receivers can act
+    on status transitions only and ignore every other save of the object.
+    """
+    transition_field = 'status'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_transition_value = instance.__dict__.get(cls.transition_field)
+        return instance
+
+    def transitioned_to(self, value):
+        """True when the last save moved `transition_field` to `value` (or its previous value is unknown)."""
+        return (getattr(self, self.transition_field) == value
+                and getattr(self, '_loaded_transition_value', None) != value)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_transition_value = getattr(self, self.transition_field)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser backed by orjson. Falls back to the default parser when orjson is not installed."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                content = content.decode(encoding).encode('utf-8')
+            return orjson.loads(content)
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
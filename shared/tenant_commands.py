@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_tenant_model, schema_context
+
+
+class TenantTaskCommand(BaseCommand):
+    """
+    Base class for management commands that run the same task in every tenant schema.
+
+    Subclasses implement `handle_schema(schema_name, **options)` and return a dict of
+    counts for that schema. Schemas are processed concurrently by a pool of worker
+    threads, each with its own database connection, and a summary report of the
+    per-schema results and failures is printed at the end.
+    """
+    default_workers = 8
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=self.default_workers,
+                            help='Number of schemas processed concurrently.')
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only process this schema. Can be given multiple times.')
+
+    def handle_schema(self, schema_name, **options):
+        raise NotImplementedError('subclasses of TenantTaskCommand must provide a handle_schema() method')
+
+    def get_schemas(self, schemas=None):
+        queryset = get_tenant_model().objects.exclude(schema_name='public').values_list('schema_name', flat=True)
+        if schemas:
+            queryset = queryset.filter(schema_name__in=schemas)
+            missing = set(schemas) - set(queryset)
+            if missing:
+                raise CommandError(f'The schema name(s) {", ".join(sorted(missing))} do not exist.')
+        return list(queryset)
+
+    def run_schema(self, schema_name, options):
+        started = time.monotonic()
+        try:
+            with schema_context(schema_name):
+                result = self.handle_schema(schema_name, **options)
+            return schema_name, result or {}, None, time.monotonic() - started
+        except Exception as e:
+            return schema_name, {}, e, time.monotonic() - started
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        schemas = self.get_schemas(options.get('schemas'))
+        self.stdout.write(self.style.NOTICE(f'Processing {len(schemas)} schema(s)...'))
+
+        totals = {}
+        failures = []
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            futures = [pool.submit(self.run_schema, schema_name, options) for schema_name in schemas]
+            for done, future in enumerate(as_completed(futures), start=1):
+                schema_name, result, error, duration = future.result()
+                prefix = f'[{done}/{len(schemas)}] {schema_name}'
+                if error is not None:
+                    failures.append((schema_name, error))
+                    self.stdout.write(self.style.ERROR(f'{prefix} failed: {error}'))
+                    continue
+                for key, value in result.items():
+                    totals[key] = totals.get(key, 0) + value
+                self.stdout.write(self.style.SUCCESS(f'{prefix} {result} ({duration:.2f}s)'))
+
+        self.stdout.write(self.style.NOTICE(
+            f'Summary: {len(schemas) - len(failures)} succeeded, {len(failures)} failed '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
+        for key, value in sorted(totals.items()):
+            self.stdout.write(f'  {key}: {value}')
+        for schema_name, error in failures:
+            self.stdout.write(self.style.ERROR(f'  {schema_name}: {error}'))
+        if failures:
+            raise CommandError(f'{len(failures)} schema(s) failed.')
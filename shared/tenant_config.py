@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+
+from shared.cache import cache, get_or_compute
+
+TENANT_CONFIG_CACHE_KEY = 'tenant-config'
+TENANT_CONFIG_CACHE_TIMEOUT = 3600
+
+COMPANY_PROFILE_FIELDS = ('currency', 'language', 'industry', 'country', 'company_size')
+
+
+@dataclass(frozen=True)
+class TenantConfig:
+    """
+    The per-tenant settings read on most requests: the MultiLocation option and the company profile.
+    Loaded once per tenant and cached (see `get_tenant_config`).
+    """
+    has_multi_location: bool = False
+    multi_location_activated: bool = False
+    company: dict = field(default_factory=dict)
+
+    @property
+    def single_location(self):
+        """True when the MultiLocation option exists and is deactivated."""
+        return self.has_multi_location and not self.multi_location_activated
+
+
+def load_tenant_config():
+    from companies.models import CompanyProfile
+    from inventory.models import MultiLocation
+
+    multi_location = MultiLocation.objects.values_list('is_activated', flat=True).first()
+    company = None
+    tenant_id = getattr(connection.tenant, 'pk', None)
+    if tenant_id is not None:
+        company = CompanyProfile.objects.filter(tenant_id=tenant_id).values(*COMPANY_PROFILE_FIELDS).first()
+    return TenantConfig(
+        has_multi_location=multi_location is not None,
+        multi_location_activated=bool(multi_location),
+        company=company or {},
+    )
+
+
+def get_tenant_config():
+    """Return the TenantConfig of the current schema, loading it on the first call."""
+    return get_or_compute(TENANT_CONFIG_CACHE_KEY, load_tenant_config, TENANT_CONFIG_CACHE_TIMEOUT)
+
+
+def clear_tenant_config():
+    """Drop the cached TenantConfig of the current schema, now and again once the transaction commits."""
+    cache.delete(TENANT_CONFIG_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(TENANT_CONFIG_CACHE_KEY))
@@ -0,0 +1,160 @@
+import base64
+import datetime
+import tempfile
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from shared.images import get_image_url, get_thumbnail_name, save_base64_image, save_uploaded_image
+from shared.parsers import ORJSONParser
+from shared.renderers import ORJSONRenderer
+from shared.tenant_commands import TenantTaskCommand
+
+
+class CountSchemaCommand(TenantTaskCommand):
+    """Reports the schema each worker thread ran in, without touching the database."""
+
+    def handle_schema(self, schema_name, **options):
+        if options.get('fail'):
+            raise RuntimeError('Task failed')
+        return {'schemas': 1, 'matched': int(connection.schema_name == schema_name)}
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--fail', action='store_true')
+
+
+class TenantTaskCommandTests(TenantTestCase):
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command(CountSchemaCommand(), stdout=out, workers=2, **options)
+        return out.getvalue()
+
+    def test_results_of_every_schema_are_summed(self):
+        output = self.run_command(schemas=[self.tenant.schema_name])
+
+        self.assertIn('Summary: 1 succeeded, 0 failed', output)
+        self.assertIn('  matched: 1', output)
+        self.assertIn('  schemas: 1', output)
+
+    def test_failed_schema_fails_the_command(self):
+        with self.assertRaisesMessage(CommandError, '1 schema(s) failed.'):
+            self.run_command(schemas=[self.tenant.schema_name], fail=True)
+
+    def test_unknown_schema_fails_before_running(self):
+        with self.assertRaisesMessage(CommandError, 'The schema name(s) missing do not exist.'):
+            self.run_command(schemas=[self.tenant.schema_name, 'missing'])
+
+
+class ORJSONTests(SimpleTestCase):
+
+    data = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'price': Decimal('12.50'),
+        'created_on': datetime.datetime(2024, 5, 1, 8, 30, tzinfo=datetime.timezone.utc),
+        'delivery_date': datetime.date(2024, 5, 2),
+        'label': gettext_lazy('Piece'),
+        'items': [{'name': 'Bolt', 'quantity': 3}],
+        1: 'non-string key',
+    }
+
+    def test_rendered_output_matches_the_default_renderer(self):
+        rendered = ORJSONRenderer().render(self.data, 'application/json')
+
+        expected = JSONRenderer().render(self.data, 'application/json')
+        self.assertEqual(JSONParser().parse(BytesIO(rendered)), JSONParser().parse(BytesIO(expected)))
+
+    def test_indented_output_uses_the_default_renderer(self):
+        rendered = ORJSONRenderer().render({'id': 1}, 'application/json; indent=2')
+
+        self.assertEqual(rendered, JSONRenderer().render({'id': 1}, 'application/json; indent=2'))
+
+    def test_none_renders_an_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parser_reads_utf8_and_other_encodings(self):
+        body = '{"currency_symbol": "€"}'
+
+        self.assertEqual(ORJSONParser().parse(BytesIO(body.encode())), {'currency_symbol': '€'})
+        self.assertEqual(ORJSONParser().parse(BytesIO(body.encode('utf-16')), parser_context={'encoding': 'utf-16'}),
+                         {'currency_symbol': '€'})
+
+    def test_invalid_json_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"id": '))
+
+    def test_missing_orjson_falls_back_to_the_default_implementation(self):
+        with mock.patch('shared.renderers.orjson', None), mock.patch('shared.parsers.orjson', None):
+            self.assertEqual(ORJSONRenderer().render({'id': 1}), JSONRenderer().render({'id': 1}))
+            self.assertEqual(ORJSONParser().parse(BytesIO(b'{"id": 1}')), {'id': 1})
+
+
+class ImageStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_URL='/media/', IMAGE_THUMBNAIL_SIZE=16))
+
+    @staticmethod
+    def make_image(image_format='PNG', size=(64, 32)):
+        from PIL import Image
+
+        output = BytesIO()
+        Image.new('RGB', size, 'red').save(output, format=image_format)
+        return output.getvalue()
+
+    def test_upload_is_stored_under_its_hash_with_a_thumbnail(self):
+        from PIL import Image
+
+        name = save_uploaded_image(SimpleUploadedFile('logo.png', self.make_image(), 'image/png'), 'logos')
+
+        self.assertTrue(name.startswith(f'images/{connection.schema_name}/logos/'))
+        self.assertTrue(name.endswith('.png'))
+        with default_storage.open(get_thumbnail_name(name)) as thumbnail, Image.open(thumbnail) as image:
+            self.assertEqual(image.size, (16, 8))
+
+    def test_identical_uploads_share_one_file(self):
+        content = self.make_image('JPEG')
+
+        first = save_uploaded_image(SimpleUploadedFile('a.jpg', content, 'image/jpeg'), 'users')
+        second = save_uploaded_image(SimpleUploadedFile('b.jpeg', content, 'image/jpeg'), 'users')
+
+        self.assertEqual(first, second)
+        directory = first.rpartition('/')[0]
+        self.assertEqual(len(default_storage.listdir(directory)[1]), 2)
+
+    def test_upload_of_another_type_is_refused(self):
+        with self.assertRaises(APIException):
+            save_uploaded_image(SimpleUploadedFile('logo.gif', b'GIF89a', 'image/gif'), 'logos')
+
+    def test_base64_image_is_converted_to_a_file(self):
+        content = self.make_image()
+        value = 'data:image/png;base64,' + base64.b64encode(content).decode()
+
+        name = save_base64_image(value, 'signatures')
+
+        with default_storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertTrue(default_storage.exists(get_thumbnail_name(name)))
+        self.assertIsNone(save_base64_image('not an image', 'signatures'))
+
+    def test_image_url_leaves_legacy_values_unchanged(self):
+        name = save_uploaded_image(SimpleUploadedFile('logo.png', self.make_image(), 'image/png'), 'logos')
+
+        self.assertEqual(get_image_url(name), f'/media/{name}')
+        self.assertEqual(get_image_url(name, thumbnail=True), f'/media/{get_thumbnail_name(name)}')
+        self.assertEqual(get_image_url('data:image/png;base64,AAAA'), 'data:image/png;base64,AAAA')
+        self.assertIsNone(get_image_url('data:image/png;base64,AAAA', thumbnail=True))
@@ -1,3 +1,7 @@
+import functools
+
+from django.contrib.auth.models import User
+from django_tenants.utils import get_public_schema_name
 from rest_framework.exceptions import ErrorDetail
 
 def extract_error_message(e):
@@ -23,3 +27,27 @@ def extract_error_message(e):
     elif isinstance(e, ErrorDetail):
         error_message = str(e)
     return error_message
+
+
+def get_public_user(user_id):
+    """
+    Load a django auth User from the public schema.
+    The table is schema-qualified, so the connection's search_path is left untouched
+    instead of switching to public and back around the query.
+    """
+    table = f'"{get_public_schema_name()}"."{User._meta.db_table}"'
+    users = list(User.objects.raw(f'SELECT * FROM {table} WHERE id = %s', [user_id]))
+    if not users:
+        raise User.DoesNotExist(f"User matching id {user_id} does not exist.")
+    return users[0]
+
+
+@functools.cache
+def get_timezone_choices():
+    """
+    Choices for the timezone fields, passed as a callable so they are built on first use rather than
+    at import: `pytz.all_timezones` checks every zone file when it is first read.
+    """
+    import pytz
+
+    return [(tz, tz) for tz in pytz.all_timezones]
@@ -0,0 +1,103 @@
+import hashlib
+
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from shared.cache import get_models_version
+
+UPDATE_TIMESTAMP_FIELDS = ('date_updated', 'updated_on', 'date_modified')
+CONDITIONAL_GET_ACTIONS = ('list', 'retrieve', 'search', 'active_list', 'hidden_list')
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Not modified.'
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests for lists and detail objects with `304 Not Modified` when nothing changed.
+
+    Viewsets opt in by setting `conditional_get_actions` (usually CONDITIONAL_GET_ACTIONS). The ETag
+    is derived from the tenant, the user, the full path, the max update timestamp and the row count
+    of the filtered queryset (one aggregate query), and the version counters of
+    `conditional_get_models`. That must list every other model the serialized data is read from,
+    nested details included (for instance units and stock quantities shown on products), registered
+    with `register_versioned_model`; a viewset whose serializer reads models without a version must
+    not opt in. A model without an update timestamp can list itself instead. It is checked before the
+    view runs, so unchanged data is never serialized.
+    """
+    conditional_get_actions = ()
+    conditional_get_models = ()
+
+    def get_update_timestamp_field(self):
+        field_names = {field.name for field in self.get_queryset().model._meta.concrete_fields}
+        return next((name for name in UPDATE_TIMESTAMP_FIELDS if name in field_names), None)
+
+    def get_conditional_state(self, request):
+        """Return (etag, last modified) for the request, or None when it is not supported."""
+        if request.method != 'GET' or self.action not in self.conditional_get_actions:
+            return None
+        timestamp_field = self.get_update_timestamp_field()
+        # Without an update timestamp the model's own version tells when its rows changed
+        if timestamp_field is None and self.get_queryset().model not in self.conditional_get_models:
+            return None
+        # The whole filtered collection, so next/prev ids and totals on detail responses stay correct
+        last_modified = {'last_modified': Max(timestamp_field)} if timestamp_field else {}
+        state = {'last_modified': None, **self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            count=Count('pk'), **last_modified
+        )}
+        # Changes to the queryset's own rows show in the timestamp and count
+        versions = get_models_version(self.conditional_get_models)
+        raw = ':'.join(str(part) for part in (
+            connection.schema_name, request.user.pk, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+            state['last_modified'], state['count'], versions,
+        ))
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"', state['last_modified']
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_state = self.get_conditional_state(request)
+        if self._conditional_state is None:
+            return
+        etag, last_modified = self._conditional_state
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Weak comparison: compression turns the ETag into W/"..."
+            etags = [value.removeprefix('W/') for value in parse_etags(if_none_match)]
+            if etag in etags or if_none_match.strip() == '*':
+                raise NotModified()
+            return
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        # Dependencies have no timestamp, so only the ETag can tell whether they changed
+        if (if_modified_since and last_modified and not self.conditional_get_models
+                and int(last_modified.timestamp()) <= if_modified_since):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            self._set_conditional_headers(response)
+            return response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self._set_conditional_headers(response)
+        return response
+
+    def _set_conditional_headers(self, response):
+        state = getattr(self, '_conditional_state', None)
+        if state is None:
+            return
+        etag, last_modified = state
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Responses differ per user and tenant
+        response['Cache-Control'] = 'private, no-cache'
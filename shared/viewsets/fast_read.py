@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+FAST_READ_PARAM = 'fast'
+FAST_READ_PROFILE = 'profile=fast'
+_PK_PLACEHOLDER = 'FASTREADPK'
+
+
+def _to_representation(value):
+    if isinstance(value, Decimal):
+        # Matches DecimalField, which renders decimals as strings
+        return str(value)
+    if hasattr(value, 'tzinfo') and hasattr(value, 'hour'):
+        value = timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+        # Matches DateTimeField, which writes UTC as Z
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return value
+
+
+class FastReadMixin:
+    """
+    Adds a fast read mode to list endpoints, enabled with `?fast=true` or an
+    `Accept: application/json; profile=fast` header.
+
+    Rows are built straight from a `values()` projection of the serializer's model fields, without
+    instantiating models or running the serializer. Nested `*_details` serializers, method fields and
+    computed properties are left out, and related objects are returned as their primary keys.
+    A `url` field is filled from a detail URL template reversed once per request.
+    Set `fast_read_fields` to a {output name: lookup} dict to choose the columns explicitly.
+    """
+    fast_read_fields = None
+
+    _fast_read_plans = {}
+
+    def use_fast_read(self):
+        request = self.request
+        if request.query_params.get(FAST_READ_PARAM, '').lower() in ('1', 'true', 'yes'):
+            return True
+        return FAST_READ_PROFILE in request.META.get('HTTP_ACCEPT', '').replace(' ', '')
+
+    def get_fast_read_plan(self):
+        """Return (columns, url field) for the serializer, computed once per viewset and serializer."""
+        serializer_class = self.get_serializer_class()
+        plan_key = (type(self), serializer_class)
+        plan = self._fast_read_plans.get(plan_key)
+        if plan is not None:
+            return plan
+
+        model = self.get_queryset().model
+        url_field = None
+        if self.fast_read_fields is not None:
+            columns = dict(self.fast_read_fields)
+        else:
+            columns = {}
+            # The serializer class itself: get_serializer() may have pruned fields for this request
+            serializer = serializer_class(context=self.get_serializer_context())
+            for name, field in serializer.fields.items():
+                if field.write_only:
+                    continue
+                if isinstance(field, serializers.HyperlinkedIdentityField):
+                    url_field = (name, field)
+                    continue
+                if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                    continue
+                lookup = self._get_fast_read_lookup(model, field.source)
+                if lookup is not None:
+                    columns[name] = lookup
+        plan = (columns, url_field)
+        self._fast_read_plans[plan_key] = plan
+        return plan
+
+    @staticmethod
+    def _get_fast_read_lookup(model, source):
+        if not source or source == '*':
+            return None
+        parts = source.split('.')
+        current = model
+        for index, part in enumerate(parts):
+            try:
+                model_field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                # Properties and other computed attributes need the model instance
+                return None
+            # Only columns and forward foreign keys; many-to-many and reverse relations are skipped
+            if not getattr(model_field, 'concrete', False):
+                return None
+            if index < len(parts) - 1:
+                if not model_field.is_relation:
+                    return None
+                current = model_field.related_model
+        return '__'.join(parts)
+
+    def get_fast_read_url_template(self, url_field):
+        if url_field is None:
+            return None
+        name, field = url_field
+        try:
+            path = reverse(field.view_name, kwargs={field.lookup_url_kwarg: _PK_PLACEHOLDER})
+        except NoReverseMatch:
+            return None
+        return name, field.lookup_field, self.request.build_absolute_uri(path)
+
+    def fast_read_response(self, queryset):
+        columns, url_field = self.get_fast_read_plan()
+        fields, expand = self.get_sparse_fieldset() if hasattr(self, 'get_sparse_fieldset') else (None, None)
+        if fields is not None:
+            columns = {name: lookup for name, lookup in columns.items() if name in fields}
+            if url_field is not None and url_field[0] not in fields:
+                url_field = None
+        url = self.get_fast_read_url_template(url_field)
+        lookups = list(dict.fromkeys(columns.values()))
+        if url is not None and url[1] not in lookups:
+            lookups.append(url[1])
+
+        rows = queryset.values(*lookups)
+        page = self.paginate_queryset(rows)
+        data = []
+        for row in (page if page is not None else rows):
+            item = {}
+            if url is not None:
+                item[url[0]] = url[2].replace(_PK_PLACEHOLDER, str(row[url[1]]))
+            for name, lookup in columns.items():
+                item[name] = _to_representation(row[lookup])
+            data.append(item)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def list(self, request, *args, **kwargs):
+        if self.use_fast_read():
+            return self.fast_read_response(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
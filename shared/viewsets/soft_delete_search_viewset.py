@@ -4,13 +4,20 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from shared.viewsets.conditional_get import ConditionalGetMixin
+from shared.viewsets.fast_read import FastReadMixin
+from shared.viewsets.sparse_fieldsets import SparseFieldsetMixin
 
-class SoftDeleteWithModelViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin,
-                                 mixins.RetrieveModelMixin, mixins.UpdateModelMixin):
+
+class SoftDeleteWithModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.GenericViewSet,
+                                 mixins.ListModelMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                                 mixins.UpdateModelMixin):
     """
     A viewset that provides default `list()`, `create()`, `retrieve()`, `update()`, `partial_update()`,
     and a custom `destroy()` action to hide instances instead of deleting them, a custom action to list
     hidden instances, a custom action to revert the hidden field back to False.
+    GET requests support ETag/Last-Modified revalidation where the viewset opts in (see `ConditionalGetMixin`) and
+    `?fields=`/`?expand=` sparse fieldsets (see `SparseFieldsetMixin`).
     """
 
     def get_queryset(self):
@@ -108,11 +115,12 @@ class SoftDeleteWithModelViewSet(viewsets.GenericViewSet, mixins.ListModelMixin,
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class SearchDeleteViewSet(SoftDeleteWithModelViewSet):
+class SearchDeleteViewSet(FastReadMixin, SoftDeleteWithModelViewSet):
     """
     A viewset that inherits from `SoftDeleteWithModelViewSet` and adds a custom `search` action to
     enable searching functionality.
     The search functionality can be accessed via the DRF API interface.
+    The list and search actions support the fast read mode of `FastReadMixin` (`?fast=true`).
     """
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = []
@@ -121,6 +129,8 @@ class SearchDeleteViewSet(SoftDeleteWithModelViewSet):
     @action(detail=False, methods=['get'])
     def search(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset()).filter(is_hidden=False)
+        if self.use_fast_read():
+            return self.fast_read_response(queryset)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
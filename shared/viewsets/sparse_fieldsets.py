@@ -0,0 +1,116 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def get_sparse_fieldset(request):
+    """
+    Parse `?fields=a,b` and `?expand=c,d` into (fields, expand).
+    `fields` is None when every field was asked for; both are None when neither param is given.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    fields = request.query_params.get(FIELDS_PARAM)
+    expand = request.query_params.get(EXPAND_PARAM)
+    if not fields and expand is None:
+        return None, None
+    fields = {name.strip() for name in fields.split(',') if name.strip()} if fields else None
+    expand = {name.strip() for name in (expand or '').split(',') if name.strip()}
+    return fields, expand
+
+
+def is_expandable(field):
+    """Nested serializers, such as `vendor_details` or `created_by_details`, are only sent when expanded."""
+    return isinstance(field, serializers.BaseSerializer)
+
+
+def get_kept_field_names(serializer_fields, fields, expand):
+    kept = []
+    for name, field in serializer_fields.items():
+        if is_expandable(field):
+            if name in expand or (fields is not None and name in fields):
+                kept.append(name)
+        elif fields is None or name in fields:
+            kept.append(name)
+    return kept
+
+
+def prune_serializer_fields(serializer, fields, expand):
+    """Drop the fields of `serializer` (or of its child for many=True) that were not asked for."""
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    kept = set(get_kept_field_names(target.fields, fields, expand))
+    for name in list(target.fields):
+        if name not in kept:
+            target.fields.pop(name)
+    return serializer
+
+
+class SparseFieldsetMixin:
+    """
+    Adds `?fields=` and `?expand=` to read endpoints.
+
+    `?fields=id,status,vendor_details` returns only those fields. Nested detail blocks are left out
+    unless they are listed in `fields` or `expand`, so `?expand=vendor_details` alone returns the
+    plain fields plus that one block. The queryset follows the serializer: big text columns that are
+    not returned are deferred, and the returned nested blocks are loaded with `select_related` or
+    `prefetch_related`. Without either param responses are unchanged.
+    """
+
+    def get_sparse_fieldset(self):
+        if not hasattr(self, '_sparse_fieldset'):
+            self._sparse_fieldset = get_sparse_fieldset(getattr(self, 'request', None))
+        return self._sparse_fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields, expand = self.get_sparse_fieldset()
+        if expand is not None:
+            prune_serializer_fields(serializer, fields, expand)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, expand = self.get_sparse_fieldset()
+        if expand is None or not isinstance(queryset, models.QuerySet):
+            return queryset
+        return self.optimize_sparse_queryset(queryset, fields, expand)
+
+    def optimize_sparse_queryset(self, queryset, fields, expand):
+        serializer_fields = self.get_serializer_class()(context=self.get_serializer_context()).fields
+        kept = set(get_kept_field_names(serializer_fields, fields, expand))
+        model = queryset.model
+        select_related, prefetch_related, returned_columns = [], [], set()
+        for name in kept:
+            field = serializer_fields[name]
+            source = field.source
+            if not source or source == '*' or '.' in source:
+                continue
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            returned_columns.add(model_field.name)
+            if not is_expandable(field) or not model_field.is_relation:
+                continue
+            if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                select_related.append(source)
+            elif model_field.one_to_many or model_field.many_to_many or model_field.one_to_one:
+                prefetch_related.append(source)
+
+        # Only large text columns (TextField, CKEditor5Field) are deferred; properties may read any other column
+        deferred = [
+            model_field.name for model_field in model._meta.concrete_fields
+            if model_field.get_internal_type() == 'TextField' and model_field.name not in returned_columns
+            and not model_field.primary_key
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
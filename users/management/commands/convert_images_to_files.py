@@ -0,0 +1,39 @@
+from companies.models import CompanyProfile
+from shared.images import IMAGE_ROOT, save_base64_image
+from shared.tenant_commands import TenantTaskCommand
+from users.models import TenantUser
+
+# (model, field, storage folder)
+IMAGE_FIELDS = (
+    (TenantUser, 'user_image', 'users'),
+    (TenantUser, 'signature', 'signatures'),
+    (CompanyProfile, 'logo', 'logos'),
+)
+
+
+class Command(TenantTaskCommand):
+    help = ('Moves the base64 images kept in TenantUser.user_image, TenantUser.signature and CompanyProfile.logo '
+            'into file storage with thumbnails, in every tenant schema. Safe to run repeatedly.')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows loaded per query.')
+
+    def handle_schema(self, schema_name, **options):
+        result = {}
+        for model, field, folder in IMAGE_FIELDS:
+            converted = invalid = 0
+            rows = (model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                    .exclude(**{f'{field}__startswith': f'{IMAGE_ROOT}/'}).values_list('pk', field))
+            for pk, value in rows.iterator(chunk_size=options['batch_size']):
+                name = save_base64_image(value, folder)
+                if name is None:
+                    invalid += 1
+                    continue
+                # update() keeps date_updated and the model signals untouched
+                model.objects.filter(pk=pk).update(**{field: name})
+                converted += 1
+            result[f'{model._meta.model_name}.{field}'] = converted
+            if invalid:
+                result[f'{model._meta.model_name}.{field}.invalid'] = invalid
+        return result
@@ -5,7 +5,7 @@ from django_tenants.utils import schema_context
 
 from companies.models import CompanyRole
 from registration.models import AccessRight, Tenant
-import pytz
+from shared.utils import get_public_user, get_timezone_choices
 from django.db import connection
 
 LANGUAGE_CHOICES = [
@@ -15,7 +15,7 @@ LANGUAGE_CHOICES = [
     # Add more language choices as needed
 ]
 
-TIMEZONE_CHOICES = [(tz, tz) for tz in pytz.all_timezones]
+TIMEZONE_CHOICES = get_timezone_choices
 
 ROLE_CHOICES = [
     ('admin', 'Administrator'),
@@ -54,8 +54,7 @@ class TenantUser(models.Model):
     @property
     def user(self):
         #return User.objects.using('public').get(id=self.user_id)
-        with schema_context('public'):
-            return User.objects.get(id=self.user_id)
+        return get_public_user(self.user_id)
 
     def __str__(self):
         return f"{self.user.email} - {self.tenant.company_name} ({self.role.name})"
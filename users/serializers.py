@@ -12,7 +12,8 @@ from registration.models import AccessRight, Tenant
 from users.models import AccessGroupRight, AccessGroupRightUser, TenantUser
 from django.db import transaction
 
-from users.utils import convert_to_base64, generate_access_code_for_access_group, generate_random_password
+from shared.images import StoredImageField, save_uploaded_image
+from users.utils import generate_access_code_for_access_group, generate_random_password
 from django_tenants.utils import schema_context
 from django.contrib.contenttypes.models import ContentType
 
@@ -237,13 +238,18 @@ class NewTenantUserSerializer(serializers.ModelSerializer):
     temp_password = serializers.CharField(read_only=True)
     signature_image = serializers.ImageField(write_only=True, required=False,  allow_null=True)
     user_image_image = serializers.ImageField(write_only=True, required=False,  allow_null=True)
+    signature = StoredImageField()
+    signature_thumbnail = StoredImageField(source='signature', thumbnail=True)
+    user_image = StoredImageField()
+    user_image_thumbnail = StoredImageField(source='user_image', thumbnail=True)
     company_role_details = CompanyRoleSerializer(source='company_role', read_only=True)
 
     class Meta:
         model = TenantUser
         fields = ['id', 'user_id', 'name', 'email', 'company_role', 'company_role_details', 'phone_number', 'language', 'timezone',
                   'in_app_notifications', 'email_notifications', 'access_codes', 'temp_password', 'date_created',
-                  'signature', 'signature_image', 'user_image_image', 'user_image']
+                  'signature', 'signature_thumbnail', 'signature_image', 'user_image_image', 'user_image',
+                  'user_image_thumbnail']
         extra_kwargs = {'signature': {'read_only': True}, 'user_image': {'read_only': True}, 'company_role_details': {'read_only': True}}
 
 
@@ -311,8 +317,8 @@ class NewTenantUserSerializer(serializers.ModelSerializer):
 
         validated_data["temp_password"] = password
         validated_data["password"] = new_user.password  
-        if 'user_image_image' in validated_data:
-            validated_data["user_image"] = convert_to_base64(validated_data.get("user_image_image", None))      
+        if validated_data.get("user_image_image", None) is not None:
+            validated_data["user_image"] = save_uploaded_image(validated_data["user_image_image"], 'users')
         
         access_codes = validated_data.pop('access_codes', [])
         validated_data.pop('name')
@@ -366,10 +372,10 @@ class NewTenantUserSerializer(serializers.ModelSerializer):
             tenant_user.email_notifications = validated_data["email_notifications"]
         
         if validated_data.get("signature_image", None) is not None:
-            tenant_user.signature = convert_to_base64(validated_data["signature_image"])
+            tenant_user.signature = save_uploaded_image(validated_data["signature_image"], 'signatures')
         
         if validated_data.get("user_image_image", None) is not None:
-            tenant_user.user_image = convert_to_base64(validated_data["user_image_image"])
+            tenant_user.user_image = save_uploaded_image(validated_data["user_image_image"], 'users')
         
         if validated_data.get("access_codes", None) is not None:
             access_codes = validated_data.pop("access_codes")
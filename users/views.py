@@ -18,7 +18,7 @@ from django.contrib.sites.shortcuts import get_current_site
 from .utils import Util, generate_access_code_for_access_group, generate_random_password
 from django_tenants.utils import schema_context
 from django.db import transaction
-from .utils import convert_to_base64
+from shared.images import save_uploaded_image
 from .models import AccessGroupRight, AccessGroupRightUser
 from .serializers import AccessGroupRightSerializer
 from rest_framework.exceptions import ValidationError
@@ -350,7 +350,7 @@ class NewTenantUserViewSet(SearchDeleteViewSet):
         tenant_schema_name = request.auth["schema_name"]
         serializer.validated_data["tenant_schema_name"] = tenant_schema_name
         if 'signature_image' in serializer.validated_data:
-            serializer.validated_data["signature"] = convert_to_base64(serializer.validated_data["signature_image"])
+            serializer.validated_data["signature"] = save_uploaded_image(serializer.validated_data["signature_image"], 'signatures')
         tenant_user, email = serializer.create(serializer.validated_data)
         self.send_account_email(tenant_user, email)
         headers = self.get_success_headers(serializer.validated_data)